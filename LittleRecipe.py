@@ -0,0 +1,7 @@
+"""Launcher script, equivalent to ``python -m little_recipe``."""
+import sys
+
+from little_recipe.__main__ import main
+
+if __name__ == "__main__":
+    sys.exit(main())
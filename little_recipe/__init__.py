@@ -0,0 +1,33 @@
+"""LittleRecipe calculates food recipe combinations for the game Elin.
+
+Importing the package is cheap: the engine, the food database and the GUI are
+only imported when one of their names is first used.
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_LAZY_ATTRS = {
+    "beam_search": "engine",
+    "contains_cha": "engine",
+    "FoodDatabase": "data",
+    "load_database": "data",
+    "get_database": "data",
+    "RecipeEngine": "recipe_engine",
+    "get_engine": "recipe_engine",
+    "RecipeApp": "ui",
+}
+
+__all__ = sorted(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # Cache so the lookup only happens once
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,42 @@
+"""Entry point: ``python -m little_recipe`` starts the GUI.
+
+With arguments, the command line interface runs instead (see ``cli.py``).
+"""
+import logging
+import os
+import sys
+
+from .data import current_dir
+
+
+def setup_logging():
+    """Set up logging to save console output to a log file."""
+    log_file_path = os.path.join(current_dir, "little_recipe.log")
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler(log_file_path),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+
+def main(argv=None):
+    setup_logging()
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        from .cli import main as cli_main
+        return cli_main(argv)
+
+    # The GUI is only imported when it is started
+    from .ui import RecipeApp
+
+    app = RecipeApp()
+    app.mainloop()
+
+
+# Run the application
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""SQLite archive of completed searches and their ranked results.
+
+Every search is recorded with its query and results, indexed by food name,
+ingredient type, priority stat and stat value, so questions like "the best
+known recipes with Dragon Meat" or "the top end recipes of 3 slots" are
+answered by index lookups instead of new searches.
+
+Writes go through a background thread that commits them in batches, so
+recording a search costs the caller only a queue put.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from .data import current_dir
+from .engine import result_sort_key
+
+logger = logging.getLogger(__name__)
+
+archive_path = os.path.join(current_dir, "Foods_Archive.sqlite")
+
+# Searches written per transaction, and the longest a search waits to be written
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    recipe TEXT NOT NULL,
+    slots INTEGER NOT NULL,
+    priority_stats TEXT NOT NULL,
+    calculation_mode INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    top_x INTEGER NOT NULL,
+    banned TEXT NOT NULL,
+    must_have TEXT NOT NULL,
+    stat_multipliers TEXT NOT NULL,
+    solver TEXT NOT NULL,
+    database TEXT
+);
+CREATE TABLE IF NOT EXISTS search_types (
+    search_id INTEGER NOT NULL REFERENCES searches(id),
+    ingre_type TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS search_priorities (
+    search_id INTEGER NOT NULL REFERENCES searches(id),
+    stat TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    search_id INTEGER NOT NULL REFERENCES searches(id),
+    rank INTEGER NOT NULL,
+    combination TEXT NOT NULL,
+    recipe_key TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    stats TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS result_foods (
+    result_id INTEGER NOT NULL REFERENCES results(id),
+    food TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS result_stats (
+    result_id INTEGER NOT NULL REFERENCES results(id),
+    stat TEXT NOT NULL,
+    value INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_types_type ON search_types (ingre_type, search_id);
+CREATE INDEX IF NOT EXISTS search_priorities_stat ON search_priorities (stat, search_id);
+CREATE INDEX IF NOT EXISTS results_search ON results (search_id);
+CREATE INDEX IF NOT EXISTS results_score ON results (score DESC);
+CREATE INDEX IF NOT EXISTS result_foods_food ON result_foods (food, result_id);
+CREATE INDEX IF NOT EXISTS result_stats_value ON result_stats (stat, value DESC, result_id);
+"""
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")  # Readers don't wait for the writer
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ResultArchive:
+    """Archive of searches in an SQLite file, written in batches by a background thread."""
+
+    def __init__(self, path=archive_path, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        _connect(path).close()  # Create the schema before the first read
+        self._queue = queue.Queue()
+        self._reader = None
+        self._reader_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="ResultArchiveWriter", daemon=True)
+        self._writer.start()
+
+    def record(self, recipe, priority_stats, results, calculation_mode=0, depth=1, top_x=5, banned_ingredients=(), must_have_ingredients=(), stat_multipliers=None, solver="beam", stat_cols=None, database=None):
+        """Queue a completed search and its results for writing."""
+        if stat_cols is None:
+            stat_cols = [key for key in results[0] if key not in ('Combination', 'Alternatives')] if results else []
+        sort_key = result_sort_key(list(priority_stats), calculation_mode, stat_cols)
+        self._queue.put({
+            "created": time.time(),
+            "recipe": list(recipe),
+            "priority_stats": list(priority_stats),
+            "calculation_mode": calculation_mode,
+            "depth": depth,
+            "top_x": top_x,
+            "banned": sorted(banned_ingredients),
+            "must_have": sorted(must_have_ingredients),
+            "stat_multipliers": stat_multipliers or {},
+            "solver": solver,
+            "database": database,
+            "results": [
+                (result['Combination'], sort_key(result)[0], {stat: result[stat] for stat in stat_cols})
+                for result in results
+            ],
+        })
+
+    def _write_loop(self):
+        connection = _connect(self.path)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        self._write_batch(connection, batch)
+                        return
+                    batch.append(item)
+                self._write_batch(connection, batch)
+        finally:
+            connection.close()
+
+    def _write_batch(self, connection, batch):
+        try:
+            with connection:  # One transaction per batch
+                for search in batch:
+                    self._write_search(connection, search)
+        except sqlite3.Error as error:
+            logger.warning(f"Could not archive {len(batch)} search(es): {error}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write_search(connection, search):
+        cursor = connection.execute(
+            "INSERT INTO searches (created, recipe, slots, priority_stats, calculation_mode, depth, top_x, banned, must_have, stat_multipliers, solver, database)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                search["created"], json.dumps(search["recipe"]), len(search["recipe"]), json.dumps(search["priority_stats"]),
+                search["calculation_mode"], search["depth"], search["top_x"], json.dumps(search["banned"]),
+                json.dumps(search["must_have"]), json.dumps(search["stat_multipliers"]), search["solver"], search["database"],
+            )
+        )
+        search_id = cursor.lastrowid
+        connection.executemany("INSERT INTO search_types VALUES (?, ?)", [(search_id, ingre_type) for ingre_type in set(search["recipe"])])
+        connection.executemany("INSERT INTO search_priorities VALUES (?, ?)", [(search_id, stat) for stat in set(search["priority_stats"])])
+        for rank, (combination, score, stats) in enumerate(search["results"], 1):
+            names = combination.split(', ')
+            cursor = connection.execute(
+                "INSERT INTO results (search_id, rank, combination, recipe_key, score, stats) VALUES (?, ?, ?, ?, ?, ?)",
+                (search_id, rank, combination, ', '.join(sorted(names)), int(score), json.dumps(stats))
+            )
+            result_id = cursor.lastrowid
+            connection.executemany("INSERT INTO result_foods VALUES (?, ?)", [(result_id, name) for name in set(names)])
+            connection.executemany("INSERT INTO result_stats VALUES (?, ?, ?)", [(result_id, stat, int(value)) for stat, value in stats.items()])
+
+    def flush(self):
+        """Wait until every queued search is written."""
+        self._queue.join()
+
+    def close(self):
+        """Write the queued searches and stop the writer thread."""
+        self._queue.put(None)
+        self._writer.join()
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def _query(self, sql, parameters):
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                self._reader.row_factory = sqlite3.Row
+            return [dict(row) for row in self._reader.execute(sql, parameters)]
+
+    def best_with_foods(self, foods, stat=None, slots=None, limit=10):
+        """Best archived recipes that use any of the given foods (exact names).
+
+        Ranked by the value of ``stat`` if given, else by their search score.
+        Each recipe is listed once.
+        """
+        foods = list(foods)
+        if not foods:
+            return []
+        value = "(SELECT value FROM result_stats WHERE result_id = r.id AND stat = ?)" if stat else "r.score"
+        sql = (
+            f"SELECT r.combination, r.stats, s.recipe, s.priority_stats, MAX({value}) AS value"
+            " FROM result_foods f JOIN results r ON r.id = f.result_id JOIN searches s ON s.id = r.search_id"
+            f" WHERE f.food IN ({', '.join('?' * len(foods))})"
+            + (" AND s.slots = ?" if slots else "")
+            + " GROUP BY r.recipe_key ORDER BY value DESC LIMIT ?"
+        )
+        parameters = ([stat] if stat else []) + foods + ([slots] if slots else []) + [limit]
+        return [self._decode(row) for row in self._query(sql, parameters)]
+
+    def best_for_stat(self, stat, slots=None, ingre_type=None, prioritized=True, limit=10):
+        """Best archived recipes by the value of a stat.
+
+        With ``prioritized`` only searches that had the stat as a priority
+        are considered. Each recipe is listed once.
+        """
+        sql = (
+            "SELECT r.combination, r.stats, s.recipe, s.priority_stats, MAX(v.value) AS value"
+            " FROM result_stats v JOIN results r ON r.id = v.result_id JOIN searches s ON s.id = r.search_id"
+            " WHERE v.stat = ?"
+            + (" AND EXISTS (SELECT 1 FROM search_priorities p WHERE p.search_id = s.id AND p.stat = ?)" if prioritized else "")
+            + (" AND s.slots = ?" if slots else "")
+            + (" AND EXISTS (SELECT 1 FROM search_types t WHERE t.search_id = s.id AND t.ingre_type = ?)" if ingre_type else "")
+            + " GROUP BY r.recipe_key ORDER BY value DESC LIMIT ?"
+        )
+        parameters = [stat] + ([stat] if prioritized else []) + ([slots] if slots else []) + ([ingre_type] if ingre_type else []) + [limit]
+        return [self._decode(row) for row in self._query(sql, parameters)]
+
+    def count(self):
+        """Number of archived searches."""
+        return self._query("SELECT COUNT(*) AS searches FROM searches", ())[0]["searches"]
+
+    @staticmethod
+    def _decode(row):
+        return {
+            'Combination': row['combination'],
+            **json.loads(row['stats']),
+            'Recipe': json.loads(row['recipe']),
+            'Priority': json.loads(row['priority_stats']),
+            'Value': row['value'],
+        }
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """Get the shared result archive, creating the file on first use."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = ResultArchive()
+            atexit.register(_archive.close)  # Write the last batch before exiting
+        return _archive
@@ -0,0 +1,277 @@
+"""Precomputed recipe atlas.
+
+The atlas stores the exact best recipes of common queries (small recipes, one
+or two priority stats, all tags allowed, no multipliers), solved offline with
+the exhaustive solver. Matching queries are then answered in milliseconds by
+filtering the stored recipes with the bans and tags of the query.
+
+Stored recipes are the best over every slot order of the recipe, so an atlas
+answer is at least as good as a live search of the same ingredients.
+
+The atlas isn't shipped, since it depends on the food database: the app
+builds it in the background when it is missing or out of date, one recipe
+size after the other, so small recipes are answered first.
+"""
+import logging
+import os
+import threading
+import time
+from itertools import combinations, combinations_with_replacement, permutations
+
+import numpy as np
+
+from .data import current_dir
+from .engine import equivalence_key, result_sort_key
+from .exhaustive import exhaustive_search
+from .progress import ProgressTracker
+
+logger = logging.getLogger(__name__)
+
+atlas_path = os.path.join(current_dir, "Foods_Atlas.npz")
+
+ATLAS_VERSION = 1
+
+# Largest recipe size precomputed
+DEFAULT_MAX_SLOTS = 3
+
+# Number of recipes stored per query
+DEFAULT_ENTRIES = 50
+
+# Queries with more combinations than this are left to the live search
+DEFAULT_MAX_COMBINATIONS = 20_000_000
+
+
+def normalize_mode(priority_stats, calculation_mode):
+    """Mode 1 only differs from mode 0 when a stat and its _pot are both prioritized."""
+    if calculation_mode == 1 and any(f"{stat}_pot" in priority_stats for stat in priority_stats):
+        return 1
+    return 0
+
+
+def atlas_key(recipe, priority_stats, calculation_mode):
+    """Key of a query in the atlas: recipe multiset, priority stat set and mode."""
+    return "|".join([
+        ",".join(sorted(recipe)),
+        ",".join(sorted(set(priority_stats))),
+        str(normalize_mode(priority_stats, calculation_mode)),
+    ])
+
+
+def _orders(recipe):
+    """Every distinct slot order of a recipe, in a stable order."""
+    return sorted(set(permutations(sorted(recipe))))
+
+
+def default_priority_sets(stat_cols):
+    """Every set of one or two priority stats."""
+    return [(stat,) for stat in stat_cols] + list(combinations(stat_cols, 2))
+
+
+def _solve(db, recipe, priority_stats, calculation_mode, entries, max_combinations):
+    """Get the best recipes over every slot order, with the order index of each."""
+    merged = {}
+    for order_index, order in enumerate(_orders(recipe)):
+        results = exhaustive_search(
+            list(order), list(priority_stats), db.foods_list, [], [],
+            top_x=entries, calculation_mode=calculation_mode, stat_cols=db.stat_cols,
+            max_combinations=max_combinations
+        )
+        for result in results:
+            foods = tuple(sorted(result['Combination'].split(', ')))
+            if foods not in merged:
+                merged[foods] = (result, order_index)
+
+    sort_key = result_sort_key(list(priority_stats), calculation_mode, db.stat_cols)
+    solved = sorted(merged.values(), key=lambda item: sort_key(item[0]), reverse=True)
+    return solved[:entries]
+
+
+def build_atlas(db, path=atlas_path, max_slots=DEFAULT_MAX_SLOTS, ingredient_types=None, priority_sets=None, modes=(0, 1), entries=DEFAULT_ENTRIES, max_combinations=DEFAULT_MAX_COMBINATIONS, progress_callback=None):
+    """Solve the common queries and write them to an atlas file.
+
+    Queries are every multiset of up to ``max_slots`` ingredient types, times
+    every priority stat set, times every mode. Queries with more than
+    ``max_combinations`` combinations per order are skipped. Returns the
+    number of queries stored. The file is replaced at once when it is
+    complete, so readers never see a partial atlas.
+    """
+    fingerprint = db.fingerprint()  # A reload during the build makes the atlas stale, not wrong
+    ingredient_types = sorted(ingredient_types or db.ingredient_types)
+    priority_sets = [tuple(sorted(stats)) for stats in (priority_sets or default_priority_sets(db.stat_cols))]
+
+    queries = {}
+    for slot_count in range(1, max_slots + 1):
+        for recipe in combinations_with_replacement(ingredient_types, slot_count):
+            for priority_stats in priority_sets:
+                for mode in modes:
+                    if normalize_mode(priority_stats, mode) == mode:
+                        queries.setdefault(atlas_key(recipe, priority_stats, mode), (recipe, priority_stats, mode))
+
+    names = {}  # Food name -> index in the names array
+    keys, offsets, complete, foods, orders, stats = [], [0], [], [], [], []
+    start_time = time.perf_counter()
+    tracker = ProgressTracker(progress_callback, len(queries))
+    for key, (recipe, priority_stats, mode) in sorted(queries.items()):
+        tracker.advance()
+        try:
+            solved = _solve(db, recipe, priority_stats, mode, entries, max_combinations)
+        except ValueError:  # Too many combinations
+            continue
+        keys.append(key)
+        complete.append(len(solved) < entries)  # Every valid recipe is stored
+        for result, order_index in solved:
+            row = [names.setdefault(name, len(names)) for name in result['Combination'].split(', ')]
+            foods.append(row + [-1] * (max_slots - len(row)))
+            orders.append(order_index)
+            stats.append([result[stat] for stat in db.stat_cols])
+        offsets.append(len(foods))
+    tracker.finish()
+
+    partial_path = os.path.splitext(path)[0] + ".partial.npz"
+    np.savez_compressed(
+        partial_path,
+        version=np.array(ATLAS_VERSION),
+        fingerprint=np.array(fingerprint),
+        stat_cols=np.array(db.stat_cols),
+        names=np.array(sorted(names, key=names.get)),
+        keys=np.array(keys),
+        offsets=np.array(offsets, dtype=np.int64),
+        complete=np.array(complete, dtype=bool),
+        foods=np.array(foods, dtype=np.int32).reshape(len(foods), max_slots),
+        orders=np.array(orders, dtype=np.uint8),
+        stats=np.array(stats, dtype=np.int16).reshape(len(stats), len(db.stat_cols)),
+    )
+    os.replace(partial_path, path)
+    logger.info(f"Atlas with {len(keys)} queries written to {path} in {time.perf_counter() - start_time:.1f}s")
+    return len(keys)
+
+
+def _allowed(food, selected_tags, banned_ingredients):
+    """Same tag and ban filters as ``tag_allowed_foods`` and ``build_slots``."""
+    if isinstance(food['Tag'], list) and any(tag not in selected_tags for tag in food['Tag']):
+        return False
+    return not any(ban.lower() in food['Foods'].lower() for ban in banned_ingredients)
+
+
+class RecipeAtlas:
+    """Read-only view of an atlas file."""
+
+    def __init__(self, path=atlas_path):
+        with np.load(path, allow_pickle=False) as archive:
+            if int(archive['version']) != ATLAS_VERSION:
+                raise ValueError(f"Unsupported atlas version in {path}")
+            self.fingerprint = str(archive['fingerprint'])
+            self.stat_cols = [str(stat) for stat in archive['stat_cols']]
+            self.names = [str(name) for name in archive['names']]
+            self.index = {str(key): i for i, key in enumerate(archive['keys'])}
+            self.offsets = archive['offsets']
+            self.complete = archive['complete']
+            self.foods = archive['foods']
+            self.orders = archive['orders']
+            self.stats = archive['stats']
+        self.path = path
+        self.modified = os.path.getmtime(path)
+        self._classes = None  # (database version, (type, equivalence key) -> foods)
+
+    def _class_members(self, db):
+        """Index the foods of the database by ingredient type and equivalence class."""
+        if self._classes is None or self._classes[0] != db.version:
+            classes = {}
+            for food in db.foods_list:
+                key = equivalence_key(food)
+                for ingre_type in food['IngreType']:
+                    classes.setdefault((ingre_type, key), []).append(food)
+            self._classes = (db.version, classes)
+        return self._classes[1]
+
+    def lookup(self, db, recipe, priority_stats, selected_tags, banned_ingredients, must_have_ingredients, top_x=5, calculation_mode=0, stat_multipliers=None):
+        """Answer a query from the atlas, or return None if it can't guarantee the answer.
+
+        Results have the same format as ``beam_search`` with alternatives.
+        """
+        if must_have_ingredients or db.fingerprint() != self.fingerprint or db.stat_cols != self.stat_cols:
+            return None
+        if stat_multipliers and any(value != 1.0 for value in stat_multipliers.values()):
+            return None
+        query = self.index.get(atlas_key(recipe, priority_stats, calculation_mode))
+        if query is None:
+            return None
+
+        classes = self._class_members(db)
+        orders = _orders(recipe)
+        results = []
+        for row in range(self.offsets[query], self.offsets[query + 1]):
+            slot_types = orders[self.orders[row]]
+            alternatives = []
+            for ingre_type, food_index in zip(slot_types, self.foods[row]):
+                representative = db.foods_by_name.get(self.names[food_index])
+                if representative is None:
+                    return None
+                members = classes.get((ingre_type, equivalence_key(representative)), [])
+                allowed = [food['Foods'] for food in members if _allowed(food, selected_tags, banned_ingredients)]
+                if not allowed:
+                    break
+                alternatives.append(allowed)
+            else:
+                results.append({
+                    'Combination': ', '.join(names[0] for names in alternatives),
+                    **{stat: int(value) for stat, value in zip(self.stat_cols, self.stats[row])},
+                    'Alternatives': alternatives,
+                })
+                if len(results) >= top_x:
+                    return results
+
+        # Fewer results than asked: only an answer if every valid recipe was stored
+        return results if self.complete[query] else None
+
+
+_atlas = None
+_atlas_lock = threading.Lock()
+_build_thread = None
+
+
+def get_atlas(path=atlas_path):
+    """Get the shared atlas, or None if there is no atlas file.
+
+    The file is read again when it was rebuilt.
+    """
+    global _atlas
+    with _atlas_lock:
+        if not os.path.exists(path):
+            return None
+        if _atlas is None or _atlas.path != path or _atlas.modified != os.path.getmtime(path):
+            try:
+                _atlas = RecipeAtlas(path)
+            except (OSError, ValueError, KeyError) as error:
+                logger.warning(f"Could not load the recipe atlas: {error}")
+                return None
+        return _atlas
+
+
+def build_atlas_in_background(db, path=atlas_path, max_slots=DEFAULT_MAX_SLOTS):
+    """Build the atlas on a daemon thread if it is missing or stale.
+
+    The atlas is written after each recipe size, so the smaller ones can be
+    answered while the larger ones are solved. Returns the thread, or None if
+    the atlas is current or already being built.
+    """
+    global _build_thread
+    atlas = get_atlas(path)
+    if atlas is not None and atlas.fingerprint == db.fingerprint():
+        return None
+    with _atlas_lock:
+        if _build_thread is not None and _build_thread.is_alive():
+            return None
+
+        def build():
+            for slot_count in range(1, max_slots + 1):
+                try:
+                    build_atlas(db, path, max_slots=slot_count)
+                except (OSError, ValueError) as error:
+                    logger.warning(f"Could not build the recipe atlas: {error}")
+                    return
+
+        logger.info(f"Building the recipe atlas in the background at {path}")
+        _build_thread = threading.Thread(target=build, name="atlas-build", daemon=True)
+        _build_thread.start()
+        return _build_thread
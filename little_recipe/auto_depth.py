@@ -0,0 +1,112 @@
+"""Automatic search depth: deepen until the top recipes stop changing.
+
+Instead of guessing a depth, the search runs at depth 1, 2, 3... on the same
+prepared query (slot candidates, stats and sort keys are compiled once) and
+merges the results of every depth, so the answer never gets worse. It stops
+once the top results have been the same for ``patience`` more depths, when
+the next depth would overrun the time budget, or at the maximum depth.
+
+The convergence curve (best score, sum of the top scores and time of each
+depth) is returned with the results, so the depth that settled the answer is
+visible.
+"""
+import logging
+import time
+from typing import NamedTuple
+
+from .engine import default_beam_width, diverse_results, diversity_cap, result_sort_key
+
+logger = logging.getLogger(__name__)
+
+# Deepest depth tried by default, the end of the settings slider
+DEFAULT_MAX_DEPTH = 10
+
+# Extra depths the top results must stay the same for
+DEFAULT_PATIENCE = 1
+
+
+class DepthPoint(NamedTuple):
+    """One depth of the convergence curve."""
+    depth: int
+    beam_width: int
+    seconds: float  # Time of the search at this depth
+    best: float  # Priority score of the best result so far
+    total: float  # Sum of the priority scores of the top results so far
+    changed: bool  # The top results differ from the previous depth
+
+
+class AutoDepthResult(NamedTuple):
+    results: list
+    beam: list  # Final beam of the deepest search, for exports and refinement
+    curve: list  # DepthPoint of every depth searched
+    stable_depth: int  # Depth from which the top results stopped changing
+    reason: str  # Why the deepening stopped
+
+    def describe(self):
+        """The curve as text, one line per depth."""
+        last = self.curve[-1].depth if self.curve else 0
+        if not self.results:
+            lines = [f"No recipe found up to depth {last} ({self.reason})"]
+        elif self.reason == "stable":
+            lines = [f"Stable from depth {self.stable_depth}, checked up to depth {last}"]
+        else:
+            lines = [f"Last changed at depth {self.stable_depth}, stopped at depth {last} ({self.reason})"]
+        for point in self.curve:
+            lines.append(
+                f"Depth {point.depth}: best {point.best:g}, top sum {point.total:g}, "
+                f"{point.seconds:.2f}s{' (changed)' if point.changed else ''}"
+            )
+        return "\n".join(lines)
+
+
+def _merge(previous, results, top_x, sort_key, min_distance):
+    """Best top_x of two result lists, each recipe once."""
+    merged = {}
+    for result in previous + results:
+        merged.setdefault(tuple(sorted(result['Combination'].split(', '))), result)
+    merged = sorted(merged.values(), key=sort_key, reverse=True)
+    if min_distance > 0:
+        return diverse_results(merged, top_x, min_distance)
+    return merged[:top_x]
+
+
+def auto_depth_search(prepared, top_x=5, max_depth=DEFAULT_MAX_DEPTH, time_budget=None, patience=DEFAULT_PATIENCE, stat_multipliers=None, progress_callback=None, solver="beam", min_distance=0, list_alternatives=True, ingredient_cap=None, max_memory=None, spill_dir=None):
+    """Search a prepared query at increasing depths until its top results are stable.
+
+    ``time_budget`` is in seconds: a depth is only started if it is expected
+    to finish within it, from the time of the previous depth (the work grows
+    about linearly with the depth). Depth 1 always runs. Without an
+    ``ingredient_cap`` each depth uses the default cap of ``min_distance``.
+    """
+    sort_key = result_sort_key(list(prepared.priority_stats), prepared.calculation_mode, prepared.stat_cols)
+    results, beam, curve = [], [], []
+    stable_depth = 1
+    reason = "maximum depth"
+    start = time.perf_counter()
+    for depth in range(1, max_depth + 1):
+        if curve and time_budget is not None:
+            last = curve[-1]
+            if time.perf_counter() - start + last.seconds * depth / last.depth > time_budget:
+                reason = "time budget"
+                break
+
+        depth_start = time.perf_counter()
+        beam_width = default_beam_width(len(prepared.recipe), depth)
+        cap = None
+        if solver == "beam":
+            cap = ingredient_cap or diversity_cap(beam_width, min_distance)
+        beam, _ = prepared.search(depth, stat_multipliers, progress_callback, cap, solver, max_memory, spill_dir)
+        merged = _merge(results, prepared.select(beam, top_x, stat_multipliers, list_alternatives, min_distance), top_x, sort_key, min_distance)
+        changed = [sort_key(result) for result in merged] != [sort_key(result) for result in results]
+        results = merged
+
+        keys = [sort_key(result)[0] for result in results]
+        curve.append(DepthPoint(depth, beam_width, time.perf_counter() - depth_start, keys[0] if keys else 0, sum(keys), changed))
+        logger.info(f"Auto depth {depth}: best {curve[-1].best:g}, top sum {curve[-1].total:g}{', changed' if changed else ''}")
+        if changed or not results:  # No recipe found yet is not an answer
+            stable_depth = depth
+        elif depth - stable_depth >= patience:
+            reason = "stable"
+            break
+
+    return AutoDepthResult(results, beam, curve, stable_depth, reason)
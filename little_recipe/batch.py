@@ -0,0 +1,246 @@
+"""Batch execution of many independent queries on a pool of worker processes.
+
+Each query, for example a saved preset, runs whole in one worker. The food
+database is loaded once by the parent: workers started with ``fork`` inherit
+it copy-on-write, and with ``spawn`` (Windows, macOS) they rebuild it around
+the stat matrix in shared memory plus the small name, type and tag columns,
+without reading the workbook again. Their stats stay views of the shared
+matrix for the lifetime of the worker.
+
+The most expensive queries are started first, so the batch doesn't end
+waiting on one long query started last. Results are streamed back in the
+order of the queries. A query that runs past its timeout is stopped at its
+next progress report and reported as timed out, and its worker moves on.
+"""
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+from .engine import default_beam_width, estimate_work
+from .meet_in_middle import MIN_SLOTS as MEET_IN_THE_MIDDLE_MIN_SLOTS
+from .progress import ProgressTracker
+
+logger = logging.getLogger(__name__)
+
+# Database and engine of a worker process, set by the pool initializer
+_database = None
+_engine = None
+
+# Shared memory block of the stat matrix, kept open by a spawned worker
+_shared_block = None
+
+# Solvers a preset can ask for; "auto" picks meet in the middle for long recipes
+SOLVERS = ("beam", "middle", "auto")
+
+
+class QueryTimeout(Exception):
+    """Raised from the progress callback of a query that ran out of time."""
+
+
+class BatchResult(NamedTuple):
+    index: int  # Position of the query in the batch
+    name: str
+    results: list
+    seconds: float
+    error: str = ""  # Why the query has no results, e.g. a timeout
+
+
+def load_presets(paths):
+    """Read preset files (as saved by the GUI) and directories of them, as (name, query) pairs.
+
+    Directories are read in file name order.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.json"))))
+        else:
+            files.append(path)
+    presets = []
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as file:
+            preset = json.load(file)
+        if not isinstance(preset, dict) or not preset.get("recipe") or not preset.get("priority_stats"):
+            raise ValueError(f"{file_path} is not a preset with a recipe and priority stats")
+        try:
+            query = preset_query(preset)
+        except ValueError as error:
+            raise ValueError(f"{file_path}: {error}") from error
+        presets.append((os.path.splitext(os.path.basename(file_path))[0], query))
+    return presets
+
+
+def preset_query(preset):
+    """The search arguments of a preset, with the defaults of the GUI for what it leaves out.
+
+    Raises ValueError for an unknown solver.
+    """
+    solver = preset.get("solver", "beam")
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', use one of {', '.join(SOLVERS)}")
+    if solver == "auto":
+        solver = "middle" if len(preset["recipe"]) >= MEET_IN_THE_MIDDLE_MIN_SLOTS else "beam"
+    return {
+        "recipe": list(preset["recipe"]),
+        "priority_stats": list(preset["priority_stats"]),
+        "banned_ingredients": [ban.lower() for ban in preset.get("banned_ingredients", [])],
+        "must_have_ingredients": [must.lower() for must in preset.get("must_have_ingredients", [])],
+        "top_x": int(preset.get("top_x") or 5),  # Saved as the text of the entry
+        "depth": int(preset.get("depth", 1)),
+        "calculation_mode": int(preset.get("calculation_mode", 1)),
+        "stat_multipliers": preset.get("stat_multipliers"),
+        "selected_tags": preset.get("selected_tags"),
+        "solver": solver,
+    }
+
+
+def estimate_cost(database, query):
+    """Rough cost of a query: the combinations its beam search scores."""
+    type_counts = {}
+    for food in database.foods_list:
+        for ingre_type in food['IngreType']:
+            type_counts[ingre_type] = type_counts.get(ingre_type, 0) + 1
+    slot_sizes = [type_counts.get(ingre_type, 0) for ingre_type in query["recipe"]]
+    return estimate_work(slot_sizes, default_beam_width(len(query["recipe"]), query.get("depth", 1)))
+
+
+def _share_database(database):
+    """Copy the stat matrix of the database into shared memory.
+
+    Returns the shared memory block and the arguments that rebuild the
+    database from it in a worker.
+    """
+    stats = np.array([food['stats'] for food in database.foods_list], dtype=float).reshape(len(database.foods_list), len(database.stat_cols))
+    block = shared_memory.SharedMemory(create=True, size=max(1, stats.nbytes))
+    np.ndarray(stats.shape, dtype=stats.dtype, buffer=block.buf)[:] = stats
+    columns = {
+        'Foods': [food['Foods'] for food in database.foods_list],
+        'IngreType': [", ".join(food['IngreType']) for food in database.foods_list],
+        'Tag': [", ".join(food['Tag']) if isinstance(food['Tag'], list) else None for food in database.foods_list],
+    }
+    return block, (block.name, stats.shape, columns, list(database.stat_cols))
+
+
+def _attach_database(block_name, shape, columns, stat_cols):
+    """Rebuild the database of the parent around the stat matrix in shared memory. Runs in a worker process.
+
+    Returns the database and the matrix. The stats of every food are
+    read-only views of its row, so the block stays open until the worker
+    exits.
+    """
+    import pandas as pd
+
+    from .data import FoodDatabase
+
+    global _shared_block
+    _shared_block = shared_memory.SharedMemory(name=block_name)
+    stats = np.ndarray(shape, dtype=float, buffer=_shared_block.buf)
+    stats.flags.writeable = False
+    database = FoodDatabase(pd.concat([pd.DataFrame(columns), pd.DataFrame(stats, columns=stat_cols, copy=False)], axis=1, copy=False))
+    for food, row in zip(database.foods_list, stats):
+        food['stats'] = row
+    return database, stats
+
+
+def _init_worker(shared):
+    """Set up the engine of a worker, on the inherited or the shared database."""
+    global _database, _engine
+    from .recipe_engine import RecipeEngine
+
+    food_matrix = None
+    if shared is not None:
+        _database, food_matrix = _attach_database(*shared)
+    _engine = RecipeEngine(_database, food_matrix=food_matrix)
+
+
+def _timeout_callback(timeout):
+    if timeout is None:
+        return None
+    deadline = time.perf_counter() + timeout
+
+    def check(report):
+        if time.perf_counter() > deadline:
+            raise QueryTimeout()
+    return check
+
+
+def run_query(engine, query, timeout=None):
+    """Run one batch query on an engine and return its results."""
+    selected_tags = query.get("selected_tags")
+    stat_multipliers = query.get("stat_multipliers")
+    if stat_multipliers is not None:
+        stat_multipliers = {stat: float(stat_multipliers.get(stat, 1.0)) for stat in engine.database.stat_cols}
+    prepared = engine.prepare(
+        query["recipe"], query["priority_stats"], set(selected_tags) if selected_tags is not None else None,
+        query.get("banned_ingredients", ()), query.get("must_have_ingredients", ()), query.get("calculation_mode", 1)
+    )
+    return prepared.execute(
+        top_x=query.get("top_x", 5), depth=query.get("depth", 1), stat_multipliers=stat_multipliers,
+        progress_callback=_timeout_callback(timeout), solver=query.get("solver", "beam")
+    )
+
+
+def _run_in_worker(index, name, query, timeout):
+    start = time.perf_counter()
+    try:
+        results = run_query(_engine, query, timeout)
+    except QueryTimeout:
+        return BatchResult(index, name, [], time.perf_counter() - start, f"timed out after {timeout:g}s")
+    except (ValueError, KeyError) as error:
+        return BatchResult(index, name, [], time.perf_counter() - start, f"{type(error).__name__}: {error}")
+    return BatchResult(index, name, results, time.perf_counter() - start)
+
+
+def run_batch(queries, database=None, workers=None, timeout=None, progress_callback=None, start_method=None):
+    """Run (name, query) pairs on a pool of worker processes.
+
+    Yields a ``BatchResult`` per query, in the order of ``queries``, as soon
+    as it and every query before it are done. ``timeout`` is in seconds per
+    query. ``start_method`` is "fork" or "spawn", by default fork where it is
+    available. ``progress_callback`` counts finished queries.
+    """
+    if database is None:
+        from .data import get_database
+
+        database = get_database()
+    queries = list(queries)
+    if not queries:
+        return
+    workers = max(1, min(len(queries), workers or os.cpu_count() or 1))
+    if start_method is None:
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+
+    global _database
+    block = None
+    shared = None
+    if start_method == "fork":
+        _database = database  # Inherited copy-on-write by the forked workers
+    else:
+        block, shared = _share_database(database)
+
+    # Longest job first: the queries are queued in order of decreasing estimated cost
+    order = sorted(range(len(queries)), key=lambda index: estimate_cost(database, queries[index][1]), reverse=True)
+    tracker = ProgressTracker(progress_callback, len(queries))
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(start_method), initializer=_init_worker, initargs=(shared,)) as executor:
+            futures = {index: executor.submit(_run_in_worker, index, *queries[index], timeout) for index in order}
+            for index in range(len(queries)):
+                result = futures.pop(index).result()
+                tracker.advance()
+                yield result
+    finally:
+        _database = None
+        if block is not None:
+            block.close()
+            block.unlink()
+    tracker.finish()
+    logger.info(f"Ran {len(queries)} queries on {workers} worker(s) in {time.perf_counter() - start:.2f}s")
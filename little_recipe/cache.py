@@ -0,0 +1,75 @@
+"""Cache of search results, invalidated per food when the database reloads."""
+import threading
+from collections import OrderedDict
+
+
+def query_key(recipe, priority_stats, selected_tags, banned_ingredients, must_have_ingredients, top_x, depth, calculation_mode, stat_multipliers, solver="beam", inventory=None):
+    """Build a hashable key that identifies a search query and the solver that ran it."""
+    return (
+        tuple(recipe),
+        tuple(priority_stats),
+        frozenset(selected_tags),
+        frozenset(banned_ingredients),
+        tuple(sorted(must_have_ingredients)),
+        top_x,
+        depth,
+        calculation_mode,
+        tuple(sorted(stat_multipliers.items())),
+        solver,
+        tuple(sorted(inventory.items())) if inventory is not None else None,
+    )
+
+
+class ResultCache:
+    """Least-recently-used cache of search results.
+
+    Each entry remembers the ingredient types of its recipe and the foods its
+    results use, so a database reload only drops the entries that used a
+    changed food or whose recipe has a slot a changed food can fill.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (results, recipe types, food names)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, results):
+        recipe_types = set(key[0])
+        food_names = set()
+        for result in results:
+            food_names.update(result['Combination'].split(', '))
+            for names in result.get('Alternatives', []):
+                food_names.update(names)
+
+        with self._lock:
+            self._entries[key] = (results, recipe_types, food_names)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, changes):
+        """Drop the entries affected by a FoodChanges and return how many were dropped."""
+        names = changes.names
+        with self._lock:
+            stale = [
+                key for key, (_, recipe_types, food_names) in self._entries.items()
+                if recipe_types & changes.types or food_names & names
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,132 @@
+"""Cooking chains: intermediate ingredients cooked from their own sub-recipes.
+
+Some ingredient types (doughs, sauces, tempura flour...) are cooked from
+other ingredients. A chain file maps such a type to the ingredient types of
+its sub-recipe, e.g.::
+
+    {"Bread Dough": ["Flour", "Egg"], "Tempura Flour": ["Flour", "Egg"]}
+
+In chain mode every slot of an intermediate type can also take the best
+results of its sub-recipe, as cooked foods named after their ingredients,
+like "Bread Dough (Wheat + Egg)", whose stats are the stats of that result.
+Sub-recipes can contain intermediates themselves. Each level only passes its
+best results up, and sub-results are memoized by sub-recipe, filters and
+scoring, so a whole cooking tree costs one search per intermediate type
+instead of the product of every level.
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .data import current_dir
+from .engine import beam_search
+
+logger = logging.getLogger(__name__)
+
+chains_path = os.path.join(current_dir, "Foods_Chains.json")
+
+# Sub-recipe results offered to the slots of an intermediate
+DEFAULT_SUB_RESULTS = 20
+
+# Memoized sub-recipe results kept, least recently used dropped first
+MAX_MEMO = 256
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def load_chains(path=chains_path):
+    """Read a chain file, mapping intermediate types to the ingredient types of their sub-recipe.
+
+    Returns an empty mapping if the file doesn't exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        chains = json.load(file)
+    if not isinstance(chains, dict) or not all(isinstance(types, list) and types for types in chains.values()):
+        raise ValueError(f"{path} must map ingredient types to non-empty lists of ingredient types")
+    return chains
+
+
+def clear_memo():
+    """Forget the memoized sub-recipe results, e.g. after the food database changed."""
+    with _memo_lock:
+        _memo.clear()
+
+
+def _cooked_food(ingre_type, result, stat_cols):
+    """A sub-recipe result as a food record of its intermediate type."""
+    stats = np.array([result[stat] for stat in stat_cols], dtype=float)
+    # " + " keeps the name free of the ", " that separates the foods of a combination
+    return {
+        'Foods': f"{ingre_type} ({result['Combination'].replace(', ', ' + ')})",
+        'IngreType': [ingre_type],
+        'Tag': None,  # Not tagged: the tags of its ingredients were already applied
+        **{stat: result[stat] for stat in stat_cols},
+        'stats': stats,
+    }
+
+
+def _foods_key(foods):
+    return hash(tuple((food['Foods'], np.asarray(food['stats']).tobytes()) for food in foods))
+
+
+def cooked_foods(ingre_type, chains, priority_stats, tag_allowed_foods, banned_ingredients=(), calculation_mode=0, stat_multipliers=None, stat_cols=None, depth=1, sub_results=DEFAULT_SUB_RESULTS, _stack=()):
+    """Best results of the sub-recipe of an intermediate type, as food records.
+
+    The sub-recipe is scored with the query's priority stats, mode and
+    multipliers, so the cooked foods are the ones that help the final recipe.
+    """
+    if ingre_type in _stack:
+        raise ValueError(f"Cooking chain loop: {' -> '.join(_stack + (ingre_type,))}")
+    sub_recipe = chains[ingre_type]
+    key = (
+        ingre_type, tuple(sub_recipe), tuple(priority_stats), _foods_key(tag_allowed_foods), frozenset(banned_ingredients),
+        calculation_mode, tuple(sorted((stat_multipliers or {}).items())), depth, sub_results,
+    )
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+
+    foods = chain_foods(
+        sub_recipe, chains, priority_stats, tag_allowed_foods, banned_ingredients, calculation_mode,
+        stat_multipliers, stat_cols, depth, sub_results, _stack + (ingre_type,)
+    )
+    results = beam_search(
+        sub_recipe, priority_stats, foods, banned_ingredients, [], top_x=sub_results, depth=depth,
+        calculation_mode=calculation_mode, stat_multipliers=stat_multipliers, stat_cols=stat_cols
+    )
+    cooked = [_cooked_food(ingre_type, result, stat_cols) for result in results]
+    logger.info(f"Cooked {len(cooked)} {ingre_type} from {', '.join(sub_recipe)}")
+
+    with _memo_lock:
+        _memo[key] = cooked
+        while len(_memo) > MAX_MEMO:
+            _memo.popitem(last=False)
+    return cooked
+
+
+def recipe_cooked_foods(recipe, chains, priority_stats, tag_allowed_foods, banned_ingredients=(), calculation_mode=0, stat_multipliers=None, stat_cols=None, depth=1, sub_results=DEFAULT_SUB_RESULTS, _stack=()):
+    """The cooked foods of every intermediate type of the recipe."""
+    foods = []
+    for ingre_type in dict.fromkeys(recipe):  # Each intermediate once, in recipe order
+        if ingre_type in chains:
+            foods.extend(cooked_foods(
+                ingre_type, chains, priority_stats, tag_allowed_foods, banned_ingredients, calculation_mode,
+                stat_multipliers, stat_cols, depth, sub_results, _stack
+            ))
+    return foods
+
+
+def chain_foods(recipe, chains, priority_stats, tag_allowed_foods, banned_ingredients=(), calculation_mode=0, stat_multipliers=None, stat_cols=None, depth=1, sub_results=DEFAULT_SUB_RESULTS, _stack=()):
+    """The allowed foods plus the cooked foods of every intermediate type of the recipe."""
+    return list(tag_allowed_foods) + recipe_cooked_foods(
+        recipe, chains, priority_stats, tag_allowed_foods, banned_ingredients, calculation_mode,
+        stat_multipliers, stat_cols, depth, sub_results, _stack
+    )
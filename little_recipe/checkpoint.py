@@ -0,0 +1,157 @@
+"""Checkpoints of long beam searches, to resume them after a crash or a restart.
+
+A checkpoint holds the beam after the last finished slot, or in the middle of
+a slot the beam entries expanded so far and the best ``beam_width`` of their
+expansions, together with the query and a fingerprint of the food database.
+It is a compressed ``.npz`` file, replaced atomically on every save.
+
+Resuming refuses a checkpoint whose query or food database differs from the
+current one, since its beam would be meaningless.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+from .data import current_dir
+
+logger = logging.getLogger(__name__)
+
+checkpoint_path = os.path.join(current_dir, "Foods_Search.checkpoint.npz")
+
+# Format of the checkpoint files, bumped when it changes
+FORMAT_VERSION = 1
+
+# Default time between two checkpoints in the middle of a slot, in seconds
+DEFAULT_INTERVAL = 60.0
+
+# Query fields that change the beam; top_x and min_distance only change the selection
+SEARCH_FIELDS = (
+    "recipe", "priority_stats", "selected_tags", "banned_ingredients", "must_have_ingredients",
+    "calculation_mode", "depth", "stat_multipliers", "ingredient_cap", "chains", "inventory",
+)
+
+
+def query_fingerprint(query):
+    """Hash of the fields of a query that change the beam."""
+    normalized = {field: query.get(field) for field in SEARCH_FIELDS}
+    for field in ("selected_tags", "banned_ingredients", "must_have_ingredients"):
+        normalized[field] = sorted(normalized[field] or [])
+    normalized["chains"] = normalized["chains"] or {}
+    normalized["inventory"] = normalized["inventory"] or {}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _encode_entries(entries, names, ids, stat_count, size):
+    """Beam entries as an id matrix and a stats matrix, registering new names."""
+    food_ids = np.zeros((len(entries), size), dtype=np.int32)
+    stats = np.zeros((len(entries), stat_count))
+    for row, (combo, combo_stats) in enumerate(entries):
+        for column, name in enumerate(combo):
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+            food_ids[row, column] = ids[name]
+        stats[row] = combo_stats
+    return food_ids, stats
+
+
+def _decode_entries(food_ids, stats, names):
+    return [([names[food] for food in row], combo_stats.copy()) for row, combo_stats in zip(food_ids, stats)]
+
+
+class SearchCheckpoint:
+    """Checkpoint file of one search.
+
+    ``query`` is a dictionary with the ``SEARCH_FIELDS`` (and optionally
+    top_x and min_distance), stored so the search can be rerun from the file
+    alone. ``database`` is the fingerprint of the food database.
+    """
+
+    def __init__(self, query, database, path=checkpoint_path, interval=DEFAULT_INTERVAL):
+        self.query = {field: sorted(value) if isinstance(value, (set, frozenset)) else value for field, value in query.items()}
+        self.fingerprint = query_fingerprint(query)
+        self.database = database
+        self.path = path
+        self.interval = interval
+        self._last_save = time.monotonic()
+
+    def due(self):
+        """True when a checkpoint in the middle of a slot is due."""
+        return self.interval is not None and time.monotonic() - self._last_save >= self.interval
+
+    def save(self, slot, beam, position=0, partial=()):
+        """Write the search state: ``slot`` is the slot being expanded, of which the first
+        ``position`` beam entries are done, with their best expansions in ``partial``."""
+        start = time.perf_counter()
+        stat_count = len(beam[0][1]) if beam else (len(partial[0][1]) if partial else 0)
+        names, ids = [], {}
+        beam_ids, beam_stats = _encode_entries(beam, names, ids, stat_count, slot)
+        partial_ids, partial_stats = _encode_entries(partial, names, ids, stat_count, slot + 1)
+        header = {
+            "format": FORMAT_VERSION,
+            "query": self.query,
+            "fingerprint": self.fingerprint,
+            "database": self.database,
+            "slot": slot,
+            "position": position,
+            "names": names,
+            "saved": time.time(),
+        }
+
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as file:
+            np.savez_compressed(
+                file, header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+                beam_ids=beam_ids, beam_stats=beam_stats, partial_ids=partial_ids, partial_stats=partial_stats
+            )
+        os.replace(temporary, self.path)  # A crash while saving keeps the previous checkpoint
+        self._last_save = time.monotonic()
+        logger.info(f"Checkpoint at slot {slot + 1}, entry {position} of {len(beam)}, saved in {time.perf_counter() - start:.2f}s")
+
+    def clear(self):
+        """Remove the checkpoint file once the search has finished."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def load(self):
+        """Read the saved state of this search, as the ``resume`` argument of ``run_beam``.
+
+        Raises ValueError if the checkpoint belongs to another query or food database.
+        """
+        header, arrays = read_checkpoint(self.path)
+        if header["fingerprint"] != self.fingerprint:
+            raise ValueError("The checkpoint was made for a different query")
+        if header["database"] != self.database:
+            raise ValueError("The food database changed since the checkpoint was made")
+        names = header["names"]
+        return {
+            "slot": header["slot"],
+            "position": header["position"],
+            "beam": _decode_entries(arrays["beam_ids"], arrays["beam_stats"], names),
+            "partial": _decode_entries(arrays["partial_ids"], arrays["partial_stats"], names),
+        }
+
+
+def read_checkpoint(path=checkpoint_path):
+    """Read a checkpoint file: its header dictionary and its arrays."""
+    if not os.path.exists(path):
+        raise ValueError(f"No checkpoint at {path}")
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+    header = json.loads(arrays.pop("header").tobytes().decode("utf-8"))
+    if header.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format {header.get('format')}")
+    return header, arrays
+
+
+def checkpoint_query(path=checkpoint_path):
+    """The query saved in a checkpoint, or None if there is no checkpoint."""
+    try:
+        return read_checkpoint(path)[0]["query"]
+    except (ValueError, OSError, KeyError) as error:
+        logger.info(f"No usable checkpoint: {error}")
+        return None
@@ -0,0 +1,468 @@
+"""Command line interface, for running searches without the GUI.
+
+Example::
+
+    python -m little_recipe search --recipe Meat Vegetable --priority str --top 5
+"""
+import argparse
+import logging
+import sys
+
+from .atlas import DEFAULT_MAX_SLOTS as ATLAS_MAX_SLOTS
+from .auto_depth import DEFAULT_MAX_DEPTH
+from .chain import chains_path
+from .checkpoint import DEFAULT_INTERVAL as CHECKPOINT_INTERVAL, checkpoint_path
+from .data import get_database
+from .inventory import inventory_path
+from .engine import default_beam_width, diversity_cap, search_beam
+from .meet_in_middle import MIN_SLOTS as MEET_IN_THE_MIDDLE_MIN_SLOTS, search_meet_in_the_middle
+from .progress import print_progress
+from .recipe_engine import get_engine
+from .spill import DEFAULT_MAX_MEMORY
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_multipliers(values, stat_cols):
+    """Parse ``stat=value`` pairs into a full stat multiplier dictionary."""
+    stat_multipliers = {stat: 1.0 for stat in stat_cols}
+    for value in values or []:
+        stat, _, multiplier = value.partition("=")
+        if stat not in stat_multipliers:
+            raise SystemExit(f"Unknown stat '{stat}', use one of: {', '.join(stat_cols)}")
+        stat_multipliers[stat] = float(multiplier)
+    return stat_multipliers
+
+
+def add_query_arguments(parser):
+    """Add the arguments that describe a search query."""
+    parser.add_argument("--recipe", nargs="+", required=True, help="Ingredient type of each slot")
+    parser.add_argument("--priority", nargs="+", required=True, help="Priority stats")
+    parser.add_argument("--ban", nargs="*", default=[], help="Banned ingredient names (substring match)")
+    parser.add_argument("--must-have", nargs="*", default=[], help="Must-have ingredient names (substring match)")
+    parser.add_argument("--exclude-tag", nargs="*", default=[], help="Tags to deselect (all are allowed by default)")
+    parser.add_argument("--top", type=int, default=5, help="Number of top recipes to show")
+    parser.add_argument("--depth", type=int, default=1, help="Search depth (1-10)")
+    parser.add_argument("--mode", type=int, default=1, help="Calculation mode: 0 stat level, 1 XP gain")
+    parser.add_argument("--multiplier", nargs="*", default=[], metavar="STAT=VALUE", help="Stat multipliers")
+    parser.add_argument("--progress", action=argparse.BooleanOptionalAction, default=None, help="Show progress and time left (default: when run in a terminal)")
+    parser.add_argument(
+        "--solver", choices=("auto", "beam", "middle"), default="auto",
+        help=f"Search method: beam search, meet in the middle, or auto (meet in the middle for {MEET_IN_THE_MIDDLE_MIN_SLOTS}+ slots)"
+    )
+
+
+def _progress_callback(args):
+    """Print progress to stderr if asked, by default when it is a terminal."""
+    show = args.progress if args.progress is not None else sys.stderr.isatty()
+    return print_progress if show else None
+
+
+def query_from_args(args, db):
+    """Build the keyword arguments of a search from parsed arguments."""
+    selected_tags = set(db.unique_tags) - set(args.exclude_tag)
+    return {
+        "recipe": args.recipe,
+        "priority_stats": args.priority,
+        "tag_allowed_foods": db.tag_allowed_foods(selected_tags),
+        "banned_ingredients": [ban.lower() for ban in args.ban],
+        "must_have_ingredients": [must.lower() for must in args.must_have],
+        "depth": args.depth,
+        "calculation_mode": args.mode,
+        "stat_multipliers": _parse_multipliers(args.multiplier, db.stat_cols),
+        "stat_cols": db.stat_cols,
+        "progress_callback": _progress_callback(args),
+    }
+
+
+def search_function(args):
+    """Get the search function chosen by the --solver argument."""
+    # The per-food caps of a diversity search and the inventory counts live in the beam, and checkpoints save the beam
+    beam_only = getattr(args, "diverse", 0) > 0 or getattr(args, "checkpoint", None) is not None or getattr(args, "inventory", None) is not None
+    if args.solver == "middle" or (args.solver == "auto" and len(args.recipe) >= MEET_IN_THE_MIDDLE_MIN_SLOTS and not beam_only):
+        return search_meet_in_the_middle
+    return search_beam
+
+
+def format_result(rank, result, stat_cols):
+    """Format a result as one line per recipe plus its non-zero stats."""
+    stats = ", ".join(f"{stat}: {result[stat]}" for stat in stat_cols if result[stat] != 0)
+    text = f"{rank}. {result['Combination']}\n   {stats}"
+    for names in result.get('Alternatives', []):
+        if len(names) > 1:
+            text += f"\n   {names[0]} = {', '.join(names[1:])}"
+    return text
+
+
+def _atlas_results(args, db, query):
+    """Answer the query from the recipe atlas, or return None."""
+    from .atlas import get_atlas
+
+    atlas = get_atlas()
+    if atlas is None:
+        return None
+    return atlas.lookup(
+        db, query["recipe"], query["priority_stats"], set(db.unique_tags) - set(args.exclude_tag),
+        query["banned_ingredients"], query["must_have_ingredients"], top_x=args.top,
+        calculation_mode=query["calculation_mode"], stat_multipliers=query["stat_multipliers"]
+    )
+
+
+def print_results(results, stat_cols):
+    if not results:
+        print("No valid recipes found.")
+    for rank, result in enumerate(results, 1):
+        print(format_result(rank, result, stat_cols))
+
+
+def _archive_results(args, db, query, results, solver):
+    """Record a completed search in the result archive, unless --no-archive."""
+    if args.no_archive:
+        return
+    from .archive import get_archive
+
+    get_archive().record(
+        query["recipe"], query["priority_stats"], results, calculation_mode=query["calculation_mode"],
+        depth=query["depth"], top_x=args.top, banned_ingredients=query["banned_ingredients"],
+        must_have_ingredients=query["must_have_ingredients"], stat_multipliers=query["stat_multipliers"],
+        solver=solver, stat_cols=db.stat_cols, database=db.fingerprint()
+    )
+
+
+def run_search(args):
+    from .export import export_beam
+
+    db = get_database()
+    query = query_from_args(args, db)
+
+    # The atlas has no beam to export, no diversity, checkpoints, cooked foods or inventories, so those always run the search
+    results = None
+    if not args.export and not args.no_atlas and not args.diverse and args.checkpoint is None and not args.chain and args.inventory is None:
+        results = _atlas_results(args, db, query)
+        if results is not None:
+            logger.info("Answered from the recipe atlas")
+
+    # Atlas answers go through the same refinement and archiving as searches
+    solver = "atlas"
+    beam = []
+    inventory = checkpoint = None
+    chains = {}
+    if results is None:
+        if args.auto_depth and args.checkpoint is not None:
+            raise ValueError("Checkpoints save the beam of one depth, they can't be used with --auto-depth")
+        solver = "middle" if search_function(args) is search_meet_in_the_middle else "beam"
+        ingredient_cap = None
+        if solver == "beam":
+            ingredient_cap = args.ingredient_cap or diversity_cap(default_beam_width(len(args.recipe), args.depth), args.diverse)
+        if args.inventory is not None:
+            from .inventory import load_inventory, resolve_inventory
+
+            if args.chain:
+                raise ValueError("Cooked foods don't use up the inventory, --inventory can't be combined with --chain")
+            if isinstance(args.inventory, dict):  # Resumed from a checkpoint
+                inventory = args.inventory
+            else:
+                inventory = resolve_inventory(load_inventory(args.inventory), db.foods_by_name)
+        cooked = []
+        if args.chain:
+            from .chain import load_chains, recipe_cooked_foods
+
+            chains = load_chains(args.chain)
+            cooked = recipe_cooked_foods(
+                query["recipe"], chains, query["priority_stats"], query["tag_allowed_foods"], query["banned_ingredients"],
+                query["calculation_mode"], query["stat_multipliers"], db.stat_cols, args.depth
+            )
+            query["tag_allowed_foods"] = query["tag_allowed_foods"] + cooked
+        prepared = get_engine().prepare(
+            query["recipe"], query["priority_stats"], set(db.unique_tags) - set(args.exclude_tag), query["banned_ingredients"],
+            query["must_have_ingredients"], calculation_mode=query["calculation_mode"], extra_foods=cooked, inventory=inventory
+        )
+        resume = None
+        if args.checkpoint is not None and solver == "beam":
+            from .checkpoint import SearchCheckpoint
+
+            checkpoint = SearchCheckpoint(
+                {**prepared.describe(args.depth, query["stat_multipliers"], ingredient_cap), "top_x": args.top, "min_distance": args.diverse, "chains": chains},
+                db.fingerprint(), path=args.checkpoint, interval=args.checkpoint_interval
+            )
+            if getattr(args, "resume", False):
+                resume = checkpoint.load()
+        auto = exact = None
+        if args.auto_depth:
+            from .auto_depth import auto_depth_search
+
+            auto = auto_depth_search(
+                prepared, top_x=args.top, max_depth=args.auto_depth, time_budget=args.time_budget,
+                stat_multipliers=query["stat_multipliers"], progress_callback=query["progress_callback"], solver=solver,
+                min_distance=args.diverse, ingredient_cap=args.ingredient_cap, max_memory=args.max_memory * 1024 ** 2,
+                spill_dir=args.spill_dir
+            )
+            beam = auto.beam
+            query["depth"] = auto.curve[-1].depth
+            print(auto.describe())
+        else:
+            if args.solver != "middle" and not ingredient_cap and not args.export and checkpoint is None:
+                # Single priority stat queries are answered exactly, without a beam
+                exact = prepared.exact(args.top, query["stat_multipliers"], query["progress_callback"])
+            if exact is None:
+                beam, _ = prepared.search(
+                    depth=args.depth, stat_multipliers=query["stat_multipliers"], progress_callback=query["progress_callback"],
+                    ingredient_cap=ingredient_cap, solver=solver, max_memory=args.max_memory * 1024 ** 2, spill_dir=args.spill_dir,
+                    checkpoint=checkpoint, resume=resume
+                )
+
+        if args.export:
+            export_beam(
+                beam, args.export, query["priority_stats"], query["must_have_ingredients"], db.stat_cols,
+                stat_multipliers=query["stat_multipliers"], include_rejected=args.include_rejected
+            )
+
+        if auto is not None:
+            results = auto.results
+            solver += "+auto"
+        elif exact is not None:
+            results = exact
+            solver = "exact"
+        else:
+            results = prepared.select(beam, args.top, query["stat_multipliers"], min_distance=args.diverse)
+
+    if args.refine > 0:
+        from .refine import BEAM_SEEDS, refine_results
+
+        results, improved = refine_results(
+            results, query["recipe"], query["priority_stats"], query["tag_allowed_foods"], query["banned_ingredients"],
+            query["must_have_ingredients"], top_x=args.top, calculation_mode=query["calculation_mode"],
+            stat_multipliers=query["stat_multipliers"], stat_cols=db.stat_cols, list_alternatives=True, time_budget=args.refine,
+            seeds=[names for names, _ in beam[:BEAM_SEEDS]], min_distance=args.diverse, inventory=inventory
+        )
+        print(f"Local search improved {improved} recipe(s).")
+        solver += f"+refine{args.refine}"
+    if args.diverse:
+        solver += f"+diverse{args.diverse}"
+    if chains:
+        solver += "+chain"
+    if inventory is not None:
+        solver += "+inventory"
+    _archive_results(args, db, query, results, solver)
+    print_results(results, db.stat_cols)
+    if checkpoint is not None:
+        checkpoint.clear()
+    return 0
+
+
+def run_resume(args):
+    """Continue the search of a checkpoint, with the query saved in it."""
+    from .checkpoint import read_checkpoint
+
+    db = get_database()
+    query = read_checkpoint(args.checkpoint)[0]["query"]
+    search_args = build_parser().parse_args(
+        ["search", "--recipe", *query["recipe"], "--priority", *query["priority_stats"], "--solver", "beam", "--no-atlas"]
+    )
+    search_args.ban = query["banned_ingredients"]
+    search_args.must_have = query["must_have_ingredients"]
+    search_args.exclude_tag = sorted(set(db.unique_tags) - set(query["selected_tags"]))
+    search_args.top = query.get("top_x", 5)
+    search_args.depth = query["depth"]
+    search_args.mode = query["calculation_mode"]
+    search_args.multiplier = [f"{stat}={value}" for stat, value in query["stat_multipliers"].items()]
+    search_args.diverse = query.get("min_distance", 0)
+    search_args.ingredient_cap = query["ingredient_cap"]
+    search_args.progress = args.progress
+    search_args.checkpoint = args.checkpoint
+    search_args.checkpoint_interval = args.checkpoint_interval
+    search_args.chain = chains_path if query.get("chains") else None
+    search_args.inventory = None
+    if query.get("inventory"):
+        # The counts saved in the checkpoint, not the inventory file, which may have changed since
+        search_args.inventory = query["inventory"]
+    search_args.auto_depth = None
+    search_args.resume = True
+    print(f"Resuming {', '.join(query['recipe'])} with priority {', '.join(query['priority_stats'])}")
+    return run_search(search_args)
+
+
+def _parse_sweep(values):
+    """Parse ``stat=start:stop:points`` arguments into sweep axes."""
+    from .sweep import sweep_values
+
+    axes = {}
+    for value in values:
+        stat, _, spec = value.partition("=")
+        parts = spec.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"Invalid sweep '{value}', use STAT=START:STOP:POINTS")
+        axes[stat] = sweep_values(float(parts[0]), float(parts[1]), int(parts[2]))
+    return axes
+
+
+def run_sweep(args):
+    from .sweep import multiplier_grid, sweep_multipliers, sweep_report
+
+    db = get_database()
+    query = query_from_args(args, db)
+    grid = multiplier_grid(query.pop("stat_multipliers"), _parse_sweep(args.sweep))
+    sweep = sweep_multipliers(grid=grid, top_x=args.top, **query)
+    print(sweep_report(sweep, query["priority_stats"]))
+    return 0
+
+
+def run_atlas(args):
+    from .atlas import atlas_path, build_atlas, default_priority_sets
+
+    db = get_database()
+    priority_sets = [(stat,) for stat in db.stat_cols] if args.single_stat else default_priority_sets(db.stat_cols)
+    count = build_atlas(
+        db, args.output or atlas_path, max_slots=args.max_slots, ingredient_types=args.types or None,
+        priority_sets=priority_sets, entries=args.entries, max_combinations=args.max_combinations,
+        progress_callback=_progress_callback(args)
+    )
+    print(f"Stored {count} queries in the recipe atlas.")
+    return 0
+
+
+def _food_names(db, terms):
+    """Exact food names that contain any of the terms, case-insensitively."""
+    terms = [term.lower() for term in terms]
+    return [name for name in db.foods_by_name if any(term in name.lower() for term in terms)]
+
+
+def run_archive(args):
+    from .archive import get_archive
+
+    db = get_database()
+    archive = get_archive()
+    if args.stat and args.stat not in db.stat_cols:
+        raise ValueError(f"Unknown stat '{args.stat}', use one of: {', '.join(db.stat_cols)}")
+    if args.food:
+        foods = _food_names(db, args.food)
+        if not foods:
+            raise ValueError(f"No food matches {', '.join(args.food)}")
+        results = archive.best_with_foods(foods, stat=args.stat, slots=args.slots, limit=args.limit)
+    elif args.stat:
+        results = archive.best_for_stat(args.stat, slots=args.slots, ingre_type=args.type, limit=args.limit)
+    else:
+        raise ValueError("Give --food, --stat or both")
+
+    print(f"{archive.count()} archived searches.")
+    if not results:
+        print("No archived recipes match.")
+    for rank, result in enumerate(results, 1):
+        print(format_result(rank, result, db.stat_cols))
+        print(f"   from {', '.join(result['Recipe'])} with priority {', '.join(result['Priority'])}")
+    return 0
+
+
+def run_verify(args):
+    from .differential import differential_report, run_differential
+
+    db = get_database()
+    reports = run_differential(
+        db, queries=args.queries, seed=args.seed, max_slots=args.max_slots, top_x=args.top, depth=args.depth,
+        solver=args.solver, max_combinations=args.max_combinations, ingredient_types=args.types or None,
+        progress_callback=_progress_callback(args)
+    )
+    print(differential_report(reports, show=args.show))
+    return 1 if any(report["errors"] for report in reports) else 0
+
+
+def run_batch(args):
+    from .batch import load_presets, run_batch as run_queries
+
+    db = get_database()
+    presets = load_presets(args.presets)
+    if not presets:
+        raise ValueError(f"No presets found in {', '.join(args.presets)}")
+    failed = 0
+    for result in run_queries(presets, db, workers=args.workers, timeout=args.timeout, progress_callback=_progress_callback(args)):
+        print(f"== {result.name} ({result.seconds:.2f}s)")
+        if result.error:
+            failed += 1
+            print(f"Failed: {result.error}")
+        else:
+            print_results(result.results, db.stat_cols)
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="little_recipe", description="Calculate food recipe combinations for Elin.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search = subparsers.add_parser("search", help="Run a search and print the best recipes")
+    add_query_arguments(search)
+    search.add_argument("--export", help="Export the whole final beam to a .csv, .jsonl, .xlsx or .parquet file")
+    search.add_argument("--include-rejected", action="store_true", help="Also export the beam entries rejected by the final filters")
+    search.add_argument("--refine", type=float, default=0, metavar="SECONDS", help="Improve the results with a local search for up to SECONDS")
+    search.add_argument("--no-atlas", action="store_true", help="Always run the search, even if the recipe atlas has the answer")
+    search.add_argument("--diverse", type=int, default=0, metavar="N", help="Only return recipes that differ by at least N ingredients")
+    search.add_argument("--ingredient-cap", type=int, metavar="N", help="Keep each food in at most N beam entries (default with --diverse: a quarter of the beam)")
+    search.add_argument("--max-memory", type=int, default=DEFAULT_MAX_MEMORY // 1024 ** 2, metavar="MB", help="Expand slots that need more memory than this through temporary files")
+    search.add_argument("--spill-dir", help="Directory of those temporary files (default: the system temporary directory)")
+    search.add_argument("--chain", nargs="?", const=chains_path, metavar="PATH", help="Also fill intermediate slots with the best results of their sub-recipes (default: Foods_Chains.json)")
+    search.add_argument("--inventory", nargs="?", const=inventory_path, metavar="PATH", help="Only use the foods of an inventory file, each at most as many times as owned (default: Foods_Inventory.json)")
+    search.add_argument("--checkpoint", nargs="?", const=checkpoint_path, metavar="PATH", help="Save checkpoints of the search, to continue it with the resume command")
+    search.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL, metavar="SECONDS", help="Time between checkpoints in the middle of a slot")
+    search.add_argument("--auto-depth", nargs="?", type=int, const=DEFAULT_MAX_DEPTH, metavar="MAX", help=f"Deepen the search until the top recipes stop changing, up to depth MAX (default {DEFAULT_MAX_DEPTH})")
+    search.add_argument("--time-budget", type=float, metavar="SECONDS", help="With --auto-depth, don't start a depth that would end after SECONDS")
+    search.add_argument("--no-archive", action="store_true", help="Don't record the search in the result archive")
+    search.set_defaults(handler=run_search)
+
+    sweep = subparsers.add_parser("sweep", help="Show how the best recipes change across stat multiplier values")
+    add_query_arguments(sweep)
+    sweep.add_argument("--sweep", nargs="+", required=True, metavar="STAT=START:STOP:POINTS", help="Multiplier ranges to sweep, combined as a grid")
+    sweep.set_defaults(handler=run_sweep)
+
+    atlas = subparsers.add_parser("atlas", help="Precompute the best recipes of common queries")
+    atlas.add_argument("--output", help="Atlas file (default: Foods_Atlas.npz next to the food database)")
+    atlas.add_argument("--max-slots", type=int, default=ATLAS_MAX_SLOTS, help="Largest recipe size to precompute")
+    atlas.add_argument("--types", nargs="*", default=[], help="Ingredient types to combine (default: all)")
+    atlas.add_argument("--single-stat", action="store_true", help="Only precompute single priority stats, not pairs")
+    atlas.add_argument("--entries", type=int, default=50, help="Recipes stored per query")
+    atlas.add_argument("--progress", action=argparse.BooleanOptionalAction, default=None, help="Show progress and time left (default: when run in a terminal)")
+    atlas.add_argument("--max-combinations", type=int, default=20_000_000, help="Skip queries with more combinations than this")
+    atlas.set_defaults(handler=run_atlas)
+
+    resume = subparsers.add_parser("resume", help="Continue an interrupted search from its checkpoint")
+    resume.add_argument("--checkpoint", default=checkpoint_path, metavar="PATH", help="Checkpoint file (default: Foods_Search.checkpoint.npz next to the food database)")
+    resume.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL, metavar="SECONDS", help="Time between checkpoints in the middle of a slot")
+    resume.add_argument("--progress", action=argparse.BooleanOptionalAction, default=None, help="Show progress and time left (default: when run in a terminal)")
+    resume.set_defaults(handler=run_resume)
+
+    archive = subparsers.add_parser("archive", help="Look up the best recipes of past searches")
+    archive.add_argument("--food", nargs="+", default=[], help="Recipes using any food whose name contains one of these")
+    archive.add_argument("--stat", help="Rank by this stat (without --food: only searches that prioritized it)")
+    archive.add_argument("--slots", type=int, help="Only recipes with this many slots")
+    archive.add_argument("--type", help="Only searches with a slot of this ingredient type (with --stat alone)")
+    archive.add_argument("--limit", type=int, default=10, help="Number of recipes to show")
+    archive.set_defaults(handler=run_archive)
+
+    verify = subparsers.add_parser("verify", help="Compare a solver with the exhaustive solver on random small queries")
+    verify.add_argument("--queries", type=int, default=100, help="Number of random queries")
+    verify.add_argument("--seed", type=int, help="Seed of the random queries, to repeat a run")
+    verify.add_argument("--max-slots", type=int, default=2, help="Largest recipe size to draw")
+    verify.add_argument("--types", nargs="*", default=[], help="Ingredient types to draw from (default: all)")
+    verify.add_argument("--top", type=int, default=5, help="Number of top recipes to compare")
+    verify.add_argument("--depth", type=int, default=1, help="Search depth of the solver")
+    verify.add_argument("--solver", choices=("beam", "middle"), default="beam", help="Solver to check")
+    verify.add_argument("--max-combinations", type=int, default=20_000_000, help="Draw again queries with more combinations than this")
+    verify.add_argument("--show", type=int, default=10, help="Number of mismatching queries to detail")
+    verify.add_argument("--progress", action=argparse.BooleanOptionalAction, default=None, help="Show progress and time left (default: when run in a terminal)")
+    verify.set_defaults(handler=run_verify)
+
+    batch = subparsers.add_parser("batch", help="Run saved presets in parallel and print their best recipes")
+    batch.add_argument("presets", nargs="+", metavar="PATH", help="Preset files, or directories of .json presets")
+    batch.add_argument("--workers", type=int, help="Worker processes (default: one per CPU core)")
+    batch.add_argument("--timeout", type=float, metavar="SECONDS", help="Give up on a preset after SECONDS")
+    batch.add_argument("--progress", action=argparse.BooleanOptionalAction, default=None, help="Show progress and time left (default: when run in a terminal)")
+    batch.set_defaults(handler=run_batch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except (ValueError, ImportError, OSError) as error:
+        logger.error(str(error))
+        return 1
@@ -0,0 +1,290 @@
+"""Food database loading.
+
+Nothing is read from disk at import time; the database is loaded on the first
+call to ``get_database``.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Set paths
+package_dir = os.path.dirname(os.path.abspath(__file__))
+current_dir = os.path.dirname(package_dir)
+input_path = os.path.join(current_dir, "Foods.xlsx")
+separated_input_path = os.path.join(current_dir, "Foods_Separated.xlsx")
+cache_dir = os.path.join(current_dir, ".food_cache")
+output_path = os.path.join(current_dir, "Foods_Calculated.xlsx")
+
+
+def _tags_of(food):
+    """Get the tags of a food record, an empty tuple when it has none."""
+    return tuple(food['Tag']) if isinstance(food['Tag'], list) else ()
+
+
+def _same_food(old, new):
+    """Check whether two records of the same food are identical."""
+    return (
+        old['IngreType'] == new['IngreType']
+        and _tags_of(old) == _tags_of(new)
+        and np.array_equal(old['stats'], new['stats'])
+    )
+
+
+class FoodChanges:
+    """Foods added, removed or changed by a reload, by name."""
+
+    def __init__(self, added=(), removed=(), changed=(), types=(), tags_changed=False, types_changed=False):
+        self.added = set(added)
+        self.removed = set(removed)
+        self.changed = set(changed)
+        self.types = set(types)  # Ingredient types of every affected food, old and new
+        self.tags_changed = tags_changed  # The set of unique tags changed
+        self.types_changed = types_changed  # The set of ingredient types changed
+
+    @property
+    def names(self):
+        return self.added | self.removed | self.changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+
+class FoodDatabase:
+    """Preprocessed food table loaded from the food workbook.
+
+    ``apply`` swaps in a reloaded table, touching only the foods that changed,
+    and notifies the subscribed listeners.
+    """
+
+    def __init__(self, data, load_report=None, source_path=None):
+        self.source_path = source_path
+        self.version = 0
+        self._fingerprint = None  # (version, hash)
+        self._lock = threading.RLock()
+        self._listeners = []
+
+        self.data = self._prepare(data)
+        self.load_report = load_report
+        self.stat_cols = [col for col in data.columns if col not in ['Foods', 'IngreType', 'Tag']]
+
+        # Convert stats to numpy arrays for faster calculations
+        self.foods_list = self._records(self.data)
+        self.foods_by_name = {food['Foods']: food for food in self.foods_list}
+
+        # Count foods per tag and per ingredient type so reloads can update them
+        self._tag_counts = Counter()
+        self._type_counts = Counter()
+        for food in self.foods_list:
+            self._count(food, 1)
+        self._refresh_unique_values()
+
+    @staticmethod
+    def _prepare(data):
+        # Split the comma-separated columns into lists
+        data['IngreType'] = data['IngreType'].str.split(', ')
+        data['Tag'] = data['Tag'].str.split(', ')  # Split tags into lists
+        return data
+
+    def _records(self, data):
+        foods_list = data.to_dict('records')
+        for food in foods_list:
+            food['stats'] = np.array([food[col] for col in self.stat_cols])
+        return foods_list
+
+    def _count(self, food, delta):
+        self._tag_counts.update({tag: delta for tag in _tags_of(food)})
+        self._type_counts.update({ingre_type: delta for ingre_type in food['IngreType']})
+
+    def _refresh_unique_values(self):
+        # Get unique tags from the "Tag" column, sorted alphabetically
+        self.unique_tags = sorted(tag for tag, count in self._tag_counts.items() if count > 0)
+
+        # Get unique ingredient types
+        self.ingredient_types = sorted(ingre_type for ingre_type, count in self._type_counts.items() if count > 0)
+
+    def fingerprint(self):
+        """Hash of the food table; it changes whenever a food is added, removed or edited."""
+        with self._lock:
+            if self._fingerprint is None or self._fingerprint[0] != self.version:
+                digest = hashlib.sha256()
+                for food in self.foods_list:
+                    digest.update(repr((food['Foods'], food['IngreType'], _tags_of(food))).encode("utf-8"))
+                    digest.update(np.asarray(food['stats'], dtype=float).tobytes())
+                self._fingerprint = (self.version, digest.hexdigest())
+            return self._fingerprint[1]
+
+    def subscribe(self, listener):
+        """Call ``listener(database, changes)`` after every reload that changed foods."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def apply(self, data, load_report=None):
+        """Replace the table with a reloaded one and return the FoodChanges.
+
+        Records of unchanged foods are kept as they are, so anything holding on
+        to them stays valid; only added, removed and changed foods update the
+        indexes.
+        """
+        data = self._prepare(data)
+        stat_cols = [col for col in data.columns if col not in ['Foods', 'IngreType', 'Tag']]
+        if stat_cols != self.stat_cols:
+            raise ValueError("The stat columns of the food database changed, restart the application to load it")
+
+        with self._lock:
+            old_tags, old_types = self.unique_tags, self.ingredient_types
+            new_foods = self._records(data)
+            new_names = {food['Foods'] for food in new_foods}
+
+            changes = FoodChanges()
+            foods_list = []
+            for food in new_foods:
+                old = self.foods_by_name.get(food['Foods'])
+                if old is not None and _same_food(old, food):
+                    foods_list.append(old)  # Keep the existing record
+                    continue
+                if old is None:
+                    changes.added.add(food['Foods'])
+                else:
+                    changes.changed.add(food['Foods'])
+                    changes.types.update(old['IngreType'])
+                    self._count(old, -1)
+                changes.types.update(food['IngreType'])
+                self._count(food, 1)
+                self.foods_by_name[food['Foods']] = food
+                foods_list.append(food)
+
+            for name in [name for name in self.foods_by_name if name not in new_names]:
+                old = self.foods_by_name.pop(name)
+                changes.removed.add(name)
+                changes.types.update(old['IngreType'])
+                self._count(old, -1)
+
+            self.data = data
+            self.foods_list = foods_list
+            if load_report is not None:
+                self.load_report = load_report
+            if not changes:
+                return changes
+
+            self._refresh_unique_values()
+            changes.tags_changed = self.unique_tags != old_tags
+            changes.types_changed = self.ingredient_types != old_types
+            self.version += 1
+            listeners = list(self._listeners)
+
+        logger.info(f"Food database reloaded (version {self.version}): {changes}")
+        for listener in listeners:
+            listener(self, changes)
+        return changes
+
+    def tag_allowed_foods(self, selected_tags):
+        """Filter foods based on the selected tags."""
+        tag_allowed_foods = []
+        for food in self.foods_list:
+            if not isinstance(food['Tag'], list):  # Add if tags are missing because it's a normal ingredient
+                tag_allowed_foods.append(food)
+                continue
+            # Check if the food has any of the deselected tags
+            if any(tag not in selected_tags for tag in food['Tag']):
+                continue  # Skip this food if it has any deselected tag
+            tag_allowed_foods.append(food)
+        return tag_allowed_foods
+
+
+def default_source():
+    """Get the food workbook to load.
+
+    The per-category workbook is preferred; the merged Foods.xlsx is used
+    when it is missing.
+    """
+    if os.path.exists(separated_input_path):
+        return separated_input_path
+    return input_path
+
+
+def load_database(path=None):
+    """Read the food workbook (all of its sheets) and preprocess it."""
+    from .workbook import read_food_workbook
+
+    if path is None:
+        path = default_source()
+    logger.info(f"Loading food database from {path}")
+    data, report = read_food_workbook(path, cache_dir=cache_dir)
+    logger.info(str(report))
+    return FoodDatabase(data, report, source_path=path)
+
+
+def reload_database(database):
+    """Reload the database from its source file and apply the changes."""
+    from .workbook import read_food_workbook
+
+    data, report = read_food_workbook(database.source_path, cache_dir=cache_dir)
+    logger.info(str(report))
+    return database.apply(data, report)
+
+
+class FoodDatabaseWatcher(threading.Thread):
+    """Background thread that reloads the database when its source file changes.
+
+    The file is polled, so no extra dependency is needed. Only the edited
+    sheets are parsed again thanks to the workbook sheet cache.
+    """
+
+    def __init__(self, database, interval=2.0):
+        super().__init__(name="FoodDatabaseWatcher", daemon=True)
+        self.database = database
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._signature = self._file_signature()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.database.source_path)
+        except OSError:  # The file is being replaced
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def check(self):
+        """Reload the database if the source file changed since the last check."""
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return None
+        self._signature = signature
+        try:
+            return reload_database(self.database)
+        except Exception as error:  # The file may be half written, it is retried when it changes again
+            logger.warning(f"Could not reload the food database: {error}")
+            return None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def get_database():
+    """Get the shared food database, loading it on first use."""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = load_database()
+    return _database
@@ -0,0 +1,201 @@
+"""Differential testing of the fast solvers against the exhaustive solver.
+
+The exhaustive solver checks every combination, so on small recipes its
+results are the true optimum. This harness draws random queries (recipes,
+priority stats, tags, bans, must-have ingredients, stat multipliers and both
+calculation modes), solves each with both, and compares the ranked results
+score by score. Recipes with equal scores are interchangeable, so only the
+scores at each rank are compared, not the food names.
+
+A fast result scoring higher than the optimum at the same rank means one of
+the solvers is wrong, and is reported as an error rather than a gap.
+
+Example::
+
+    python -m little_recipe verify --queries 200 --max-slots 2 --seed 1
+"""
+import logging
+import time
+
+import numpy as np
+
+from .engine import result_sort_key
+from .exhaustive import exhaustive_search
+from .progress import ProgressTracker
+from .recipe_engine import RecipeEngine
+
+logger = logging.getLogger(__name__)
+
+# Queries with more combinations than this are drawn again
+DEFAULT_MAX_COMBINATIONS = 20_000_000
+
+# Attempts at drawing a small enough query before giving up
+MAX_DRAWS = 50
+
+# Range of the random stat multipliers, within the range of the sliders
+MULTIPLIER_RANGE = (0.25, 3.0)
+
+
+def random_query(db, rng, max_slots=2, ingredient_types=None):
+    """Draw a random query, as a dictionary of the search arguments.
+
+    Must-have ingredients are picked among the foods of the recipe, so most
+    queries still have valid recipes.
+    """
+    ingredient_types = list(ingredient_types or db.ingredient_types)
+    base_stats = [stat for stat in db.stat_cols if not stat.endswith("_pot")]
+    recipe = [str(ingre_type) for ingre_type in rng.choice(ingredient_types, size=int(rng.integers(1, max_slots + 1)))]
+
+    stat = str(rng.choice(base_stats))
+    kind = rng.integers(3)
+    if kind == 0:
+        priority_stats = [stat]
+    elif kind == 1 and f"{stat}_pot" in db.stat_cols:
+        priority_stats = [stat, f"{stat}_pot"]  # The only case where mode 1 ranks differently
+    else:
+        priority_stats = [stat, str(rng.choice([other for other in db.stat_cols if other != stat]))]
+
+    selected_tags = [tag for tag in db.unique_tags if rng.random() > 0.3]
+    candidates = sorted({
+        food['Foods'] for food in db.tag_allowed_foods(set(selected_tags))
+        if any(ingre_type in food['IngreType'] for ingre_type in recipe)
+    })
+    banned = [str(name).lower() for name in rng.choice(candidates, size=min(len(candidates), int(rng.integers(3))), replace=False)]
+    allowed = [name for name in candidates if not any(ban in name.lower() for ban in banned)]
+    must_have = [str(rng.choice(allowed)).lower()] if allowed and rng.random() < 0.3 else []
+
+    stat_multipliers = {stat: 1.0 for stat in db.stat_cols}
+    if rng.random() < 0.5:
+        for stat in rng.choice(db.stat_cols, size=int(rng.integers(1, 4)), replace=False):
+            stat_multipliers[str(stat)] = round(float(rng.uniform(*MULTIPLIER_RANGE)), 2)
+
+    return {
+        "recipe": recipe,
+        "priority_stats": priority_stats,
+        "selected_tags": selected_tags,
+        "banned_ingredients": banned,
+        "must_have_ingredients": must_have,
+        "calculation_mode": int(rng.integers(2)),
+        "stat_multipliers": stat_multipliers,
+    }
+
+
+def compare_query(db, query, top_x=5, depth=1, solver="beam", max_combinations=DEFAULT_MAX_COMBINATIONS, engine=None):
+    """Solve a query with the exhaustive solver and a fast one, and compare their results.
+
+    Raises ValueError if the query has more than ``max_combinations``
+    combinations.
+    """
+    start = time.perf_counter()
+    expected = exhaustive_search(
+        query["recipe"], query["priority_stats"], db.tag_allowed_foods(set(query["selected_tags"])),
+        query["banned_ingredients"], query["must_have_ingredients"], top_x=top_x,
+        calculation_mode=query["calculation_mode"], stat_multipliers=query["stat_multipliers"],
+        stat_cols=db.stat_cols, max_combinations=max_combinations
+    )
+    oracle_seconds = time.perf_counter() - start
+
+    engine = engine or RecipeEngine(db)
+    start = time.perf_counter()
+    found = engine.prepare(
+        query["recipe"], query["priority_stats"], query["selected_tags"], query["banned_ingredients"],
+        query["must_have_ingredients"], query["calculation_mode"]
+    ).execute(
+        top_x=top_x, depth=depth, stat_multipliers=query["stat_multipliers"], solver=solver, list_alternatives=False
+    )
+    solver_seconds = time.perf_counter() - start
+
+    sort_key = result_sort_key(query["priority_stats"], query["calculation_mode"], db.stat_cols)
+    mismatches = []
+    errors = []
+    for rank in range(max(len(expected), len(found))):
+        expected_result = expected[rank] if rank < len(expected) else None
+        found_result = found[rank] if rank < len(found) else None
+        expected_key = sort_key(expected_result) if expected_result else None
+        found_key = sort_key(found_result) if found_result else None
+        if expected_key == found_key:
+            continue
+        mismatches.append((rank + 1, expected_result, found_result, expected_key, found_key))
+        if expected_key is None or (found_key is not None and found_key > expected_key):
+            errors.append(rank + 1)
+
+    # Relative loss of the best priority score
+    if not expected:
+        gap = 0.0
+    elif not found:
+        gap = 1.0
+    else:
+        best = sort_key(expected[0])[0]
+        gap = (best - sort_key(found[0])[0]) / abs(best) if best else 0.0
+
+    return {
+        "query": query,
+        "expected": expected,
+        "found": found,
+        "mismatches": mismatches,
+        "errors": errors,
+        "gap": gap,
+        "oracle_seconds": oracle_seconds,
+        "solver_seconds": solver_seconds,
+    }
+
+
+def run_differential(db, queries=100, seed=None, max_slots=2, top_x=5, depth=1, solver="beam", max_combinations=DEFAULT_MAX_COMBINATIONS, ingredient_types=None, progress_callback=None):
+    """Compare a solver with the exhaustive solver on random queries.
+
+    Returns the report of each query (see ``compare_query``). The same seed
+    draws the same queries.
+    """
+    rng = np.random.default_rng(seed)
+    engine = RecipeEngine(db)
+    reports = []
+    tracker = ProgressTracker(progress_callback, queries)
+    for _ in range(queries):
+        for _ in range(MAX_DRAWS):
+            query = random_query(db, rng, max_slots, ingredient_types)
+            try:
+                report = compare_query(db, query, top_x, depth, solver, max_combinations, engine)
+            except ValueError:  # Too many combinations
+                continue
+            reports.append(report)
+            if report["mismatches"]:
+                logger.info(f"Mismatch on {', '.join(query['recipe'])} with priority {', '.join(query['priority_stats'])}")
+            break
+        else:
+            raise ValueError(f"Could not draw a query with at most {max_combinations} combinations, lower --max-slots")
+        tracker.advance()
+    tracker.finish()
+    return reports
+
+
+def _describe_query(query):
+    text = f"{', '.join(query['recipe'])} | priority {', '.join(query['priority_stats'])} | mode {query['calculation_mode']}"
+    if query["banned_ingredients"]:
+        text += f" | ban {', '.join(query['banned_ingredients'])}"
+    if query["must_have_ingredients"]:
+        text += f" | must have {', '.join(query['must_have_ingredients'])}"
+    multipliers = {stat: value for stat, value in query["stat_multipliers"].items() if value != 1.0}
+    if multipliers:
+        text += f" | multipliers {', '.join(f'{stat}={value}' for stat, value in multipliers.items())}"
+    return text
+
+
+def differential_report(reports, show=10):
+    """Summary of a differential run, with the details of up to ``show`` mismatching queries."""
+    if not reports:
+        return "No queries compared."
+    gaps = np.array([report["gap"] for report in reports])
+    mismatched = [report for report in reports if report["mismatches"]]
+    errors = [report for report in reports if report["errors"]]
+    lines = [
+        f"{len(reports)} queries, {len(reports) - len(mismatched)} with the optimal top results, {len(mismatched)} with mismatches, {len(errors)} with errors.",
+        f"Best recipe gap: mean {gaps.mean():.2%}, max {gaps.max():.2%}, optimal in {np.mean(gaps == 0):.0%} of the queries.",
+        f"Time: exhaustive {sum(report['oracle_seconds'] for report in reports):.1f}s, solver {sum(report['solver_seconds'] for report in reports):.1f}s.",
+    ]
+    for report in (errors + [report for report in mismatched if not report["errors"]])[:show]:
+        lines.append("")
+        lines.append(("ERROR " if report["errors"] else "") + _describe_query(report["query"]) + f" | gap {report['gap']:.2%}")
+        for rank, expected, found, expected_key, found_key in report["mismatches"]:
+            lines.append(f"  {rank}. expected {expected['Combination'] if expected else '-'} {expected_key or ''}")
+            lines.append(f"     found    {found['Combination'] if found else '-'} {found_key or ''}")
+    return "\n".join(lines)
@@ -0,0 +1,591 @@
+"""Recipe search engine.
+
+This module only depends on NumPy so it can be imported by tools that do not
+need the food database loader or the GUI.
+"""
+import logging
+from datetime import datetime  # For timing the search
+
+import numpy as np
+
+from .progress import ProgressTracker
+from .spill import expansion_bytes, spill_expand
+
+logger = logging.getLogger(__name__)
+
+# Columns of a food record that are not stats
+NON_STAT_COLS = ('Foods', 'IngreType', 'Tag', 'stats')
+
+# Share of the beam a single food may appear in, in diversity mode
+DIVERSITY_CAP_FRACTION = 0.25
+
+# Candidates (beam entries times slot foods) scored per block of a slot expansion
+EXPANSION_BLOCK = 250_000
+
+# Bit count of every 16-bit value, for the popcount of stat masks
+_POPCOUNT16 = np.unpackbits(np.arange(1 << 16, dtype=">u2").view(np.uint8)).reshape(-1, 16).sum(axis=1).astype(np.uint8)
+
+# Variable to control tqdm output visibility in the console
+SHOW_TQDM_IN_CONSOLE = False  # Set to True to enable tqdm output in the console
+
+
+def _progress_iter(iterable, **kwargs):
+    """Wrap an iterable in tqdm only when console output is enabled."""
+    if not SHOW_TQDM_IN_CONSOLE:
+        return iterable
+    from tqdm import tqdm  # Imported lazily, it is only needed for console output
+    return tqdm(iterable, **kwargs)
+
+
+def infer_stat_cols(foods):
+    """Get the stat column names from the food records, in column order."""
+    if not foods:
+        return []
+    return [col for col in foods[0] if col not in NON_STAT_COLS]
+
+
+# Add this function to check if an ingredient contains the word "cha"
+def contains_cha(ingredient_name):
+    return "cha" in ingredient_name.lower().split()
+
+def equivalence_key(food, must_have_ingredients=()):
+    """Key under which foods are interchangeable during the search.
+
+    Foods with the same stats, the same tags, the same "cha" status and that
+    match the same must-have ingredients always score and filter the same way.
+    """
+    tags = tuple(food['Tag']) if isinstance(food['Tag'], list) else ()
+    name = food['Foods'].lower()
+    must_have_hits = tuple(sorted({must for must in must_have_ingredients if must.lower() in name}))
+    return (np.asarray(food['stats'], dtype=float).tobytes(), tags, contains_cha(food['Foods']), must_have_hits)
+
+
+def group_equivalent_foods(foods, must_have_ingredients=()):
+    """Collapse interchangeable foods into one representative per class.
+
+    Returns the representatives, in the order of their first member, and a
+    dictionary mapping each representative name to the names of all the
+    foods in its class.
+    """
+    classes = {}
+    for food in foods:
+        classes.setdefault(equivalence_key(food, must_have_ingredients), []).append(food)
+
+    representatives = []
+    members = {}
+    for class_foods in classes.values():
+        representative = class_foods[0]
+        representatives.append(representative)
+        members[representative['Foods']] = [food['Foods'] for food in class_foods]
+    return representatives, members
+
+def inventory_foods(foods, inventory):
+    """The foods of which the inventory (food name -> count) holds at least one."""
+    return [food for food in foods if inventory.get(food['Foods'], 0) > 0]
+
+
+def build_slots(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, collapse_equivalent=True):
+    """Get the candidate foods of each recipe slot, best priority stats first.
+
+    Returns the candidates per slot and, per slot, a dictionary mapping each
+    candidate name to the names of the foods it stands for.
+    """
+    slots = []
+    slot_members = []  # Per slot: representative name -> interchangeable food names
+    for ingre_type in recipe:
+        valid_foods = [food for food in tag_allowed_foods if ingre_type in food['IngreType'] and not any(ban.lower() in food['Foods'].lower() for ban in banned_ingredients)]
+        valid_foods.sort(
+            key=lambda x: sum(x[stat] for stat in priority_stats),
+            reverse=True
+        )
+        if collapse_equivalent:
+            # Search over one representative per class of interchangeable foods
+            valid_foods, members = group_equivalent_foods(valid_foods, must_have_ingredients)
+        else:
+            members = {food['Foods']: [food['Foods']] for food in valid_foods}
+        slots.append(valid_foods)
+        slot_members.append(members)
+    return slots, slot_members
+
+
+def beam_sort_key(priority_stats, calculation_mode, stat_cols):
+    """Get the sort key of beam entries (combo, stats) for the calculation_mode."""
+    if calculation_mode == 1:
+        return lambda x: (sum(x[1][stat_cols.index(stat)] * x[1][stat_cols.index(f"{stat}_pot")] if f"{stat}_pot" in priority_stats else x[1][stat_cols.index(stat)] for stat in priority_stats), sum(x[1]))
+    return lambda x: (sum(x[1][stat_cols.index(stat)] for stat in priority_stats), sum(x[1]))
+
+
+def beam_key_arrays(priority_stats, calculation_mode, stat_cols):
+    """Get a function computing the ``beam_sort_key`` of every row of a stats matrix at once.
+
+    The sums are added column by column, in the order of ``beam_sort_key``,
+    so both give the same floats. When the primary key is a plain sum of
+    stats, the function's ``priority_indexes`` attribute lists their columns,
+    else it is None.
+    """
+    priority_indexes = [stat_cols.index(stat) for stat in priority_stats]
+    pot_indexes = [stat_cols.index(f"{stat}_pot") if calculation_mode == 1 and f"{stat}_pot" in priority_stats else None for stat in priority_stats]
+
+    def key_arrays(stats):
+        primary = np.zeros(len(stats))
+        for stat_index, pot_index in zip(priority_indexes, pot_indexes):
+            primary = primary + (stats[:, stat_index] * stats[:, pot_index] if pot_index is not None else stats[:, stat_index])
+        secondary = np.zeros(len(stats))
+        for column in range(stats.shape[1]):
+            secondary = secondary + stats[:, column]
+        return primary, secondary
+    key_arrays.priority_indexes = None if any(index is not None for index in pot_indexes) else priority_indexes
+    return key_arrays
+
+
+def stat_masks(stats):
+    """Packed positive-stat signature of every row of a stats matrix: bit i is set when stat i is positive.
+
+    Up to 16 stats fit in a uint16, up to 64 in a uint64.
+    """
+    count = stats.shape[1]
+    if count > 64:
+        raise ValueError(f"Stat masks hold at most 64 stats, not {count}")
+    dtype = np.uint16 if count <= 16 else np.uint32 if count <= 32 else np.uint64
+    weights = np.left_shift(np.ones(count, dtype=dtype), np.arange(count, dtype=dtype))
+    return (stats > 0).astype(dtype) @ weights if count else np.zeros(len(stats), dtype=dtype)
+
+
+def popcount(masks):
+    """Number of set bits of every stat mask."""
+    counts = np.zeros(masks.shape, dtype=np.uint8)
+    for shift in range(0, masks.dtype.itemsize * 8, 16):
+        counts += _POPCOUNT16[(masks >> masks.dtype.type(shift)) & masks.dtype.type(0xFFFF)]
+    return counts
+
+
+def mask_bits(masks, count):
+    """Unpack stat masks into 0/1 rows of ``count`` stats."""
+    return (masks[..., None] >> np.arange(count, dtype=masks.dtype)) & masks.dtype.type(1)
+
+
+def result_sort_key(priority_stats, calculation_mode, stat_cols):
+    """Get the sort key of result rows for the calculation_mode."""
+    if calculation_mode == 1:
+        return lambda x: (sum(x[stat] * x[f"{stat}_pot"] if f"{stat}_pot" in priority_stats else x[stat] for stat in priority_stats), sum(x[stat] for stat in stat_cols if stat not in priority_stats))
+    return lambda x: (sum(x[stat] for stat in priority_stats), sum(x[stat] for stat in stat_cols if stat not in priority_stats))
+
+
+def default_beam_width(slot_count, depth=1):
+    """Beam width of a search: wide for short recipes, where it is cheap."""
+    return (1000 if slot_count > 2 else 100000) * depth
+
+
+def recipe_distance(first, second):
+    """Number of ingredients of ``first`` that ``second`` doesn't share, as multisets of names."""
+    remaining = list(second)
+    shared = 0
+    for name in first:
+        if name in remaining:
+            remaining.remove(name)
+            shared += 1
+    return max(len(first), len(second)) - shared
+
+
+def diversity_cap(beam_width, min_distance):
+    """Default per-food cap of the beam for a diversity search, or None when diversity is off."""
+    if min_distance <= 0:
+        return None
+    return max(1, int(beam_width * DIVERSITY_CAP_FRACTION))
+
+
+def cap_beam(entries, beam_width, ingredient_cap):
+    """Keep the first ``beam_width`` entries in which no food is used by more than ``ingredient_cap`` kept entries."""
+    counts = {}
+    kept = []
+    for entry in entries:
+        names = set(entry[0])
+        if any(counts.get(name, 0) >= ingredient_cap for name in names):
+            continue
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+        kept.append(entry)
+        if len(kept) == beam_width:
+            break
+    return kept
+
+
+def diverse_results(results, top_x, min_distance):
+    """Greedily keep the best results at least ``min_distance`` ingredients away from every kept one.
+
+    ``results`` must be sorted best first.
+    """
+    kept = []
+    kept_names = []
+    for result in results:
+        names = result['Combination'].split(', ')
+        if all(recipe_distance(names, other) >= min_distance for other in kept_names):
+            kept.append(result)
+            kept_names.append(names)
+            if len(kept) == top_x:
+                break
+    return kept
+
+
+def estimate_work(slot_sizes, beam_width, beam_size=1):
+    """Estimate the combinations a beam search scores: beam size times candidates, per slot.
+
+    The beam can only shrink below its width through duplicates, so this is
+    an upper bound that gets revised as the search runs.
+    """
+    total = 0
+    for size in slot_sizes:
+        total += beam_size * size
+        beam_size = min(beam_width, beam_size * size)
+    return total
+
+
+def search_beam(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, progress_callback=None, depth=1, calculation_mode=0, stat_multipliers=None, stat_cols=None, collapse_equivalent=True, ingredient_cap=None, max_memory=None, spill_dir=None, inventory=None):
+    """Run the beam search and return the final beam and the slot members.
+
+    The beam is a list of (food names, multiplied stats) tuples, best first,
+    before the final filters of ``evaluate_beam`` are applied.
+    ``progress_callback`` receives a ``ProgressReport`` a few times per second.
+    With ``ingredient_cap`` no food is kept in more than that many beam
+    entries, so one strong food can't crowd out every other recipe. With
+    ``max_memory`` (bytes), slots whose expansion would need more are
+    expanded through sorted runs in ``spill_dir`` (see ``spill``). With an
+    ``inventory`` (food name -> count) only owned foods are candidates and no
+    recipe uses a food more times than it is owned.
+    """
+    if stat_cols is None:
+        stat_cols = infer_stat_cols(tag_allowed_foods)
+    if stat_multipliers is None:
+        stat_multipliers = {stat: 1.0 for stat in stat_cols}
+    if inventory is not None:
+        tag_allowed_foods = inventory_foods(tag_allowed_foods, inventory)
+        collapse_equivalent = False  # Interchangeable foods have their own counts
+
+    slots, slot_members = build_slots(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, collapse_equivalent)
+    multipliers = np.array([stat_multipliers[stat] for stat in stat_cols])
+    beam = run_beam(
+        [[food['Foods'] for food in slot] for slot in slots],
+        [np.array([food['stats'] for food in slot], dtype=float).reshape(len(slot), len(stat_cols)) * multipliers for slot in slots],
+        default_beam_width(len(recipe), depth), beam_sort_key(priority_stats, calculation_mode, stat_cols),
+        progress_callback=progress_callback, ingredient_cap=ingredient_cap,
+        key_arrays=beam_key_arrays(priority_stats, calculation_mode, stat_cols), max_memory=max_memory, spill_dir=spill_dir,
+        food_limits=inventory
+    )
+    return beam, slot_members
+
+
+def _entry_arrays(entries, food_ids, size, stat_count):
+    """Food id and stats matrices of beam entries."""
+    ids = np.array([[food_ids[name] for name in combo] for combo, _ in entries], dtype=np.int32).reshape(len(entries), size)
+    stats = np.array([combo_stats for _, combo_stats in entries], dtype=float).reshape(len(entries), stat_count)
+    return ids, stats
+
+
+def expand_slot(beam, names, stats, beam_width, key_arrays, ingredient_cap=None, tracker=None, partial=(), position=0, checkpoint=None, slot=0, food_limits=None):
+    """Expand a beam by one slot, scoring blocks of candidates at once.
+
+    Every beam entry and food carries a packed positive-stat mask, so the
+    overlap penalty of a whole block is a bitwise AND. When the primary key
+    is a plain sum and the beam is already full, the popcount of the
+    overlapping priority bits gives each candidate's exact primary score
+    before its stats are built, and candidates that can't reach the beam are
+    skipped. Duplicate combinations keep their first expansion, and ties keep
+    expansion order, like a stable sort. (A combination reached in several
+    food orders with different stats, see ``spill``, keeps its first
+    expansion that wasn't skipped.)
+
+    ``partial`` and ``position`` resume a slot (see ``run_beam``); a due
+    ``checkpoint`` is saved between blocks. ``food_limits`` maps food names
+    to the most times a combination may use them, and expansions over a
+    limit are dropped before they are scored. Returns the new beam and the
+    number of candidates scored.
+    """
+    stat_count = stats.shape[1]
+    food_count = len(names)
+    if food_count == 0:
+        return [], 0
+    size = len(beam[0][0]) if beam else 0
+
+    # Combinations are compared as sorted rows of food ids
+    food_ids = {}
+    id_names = []
+    for name in list(names) + [name for combo, _ in list(beam) + list(partial) for name in combo]:
+        if name not in food_ids:
+            food_ids[name] = len(id_names)
+            id_names.append(name)
+    slot_ids = np.array([food_ids[name] for name in names], dtype=np.int32)
+    beam_ids, beam_stats = _entry_arrays(beam, food_ids, size, stat_count)
+    beam_masks = stat_masks(beam_stats)
+    slot_masks = stat_masks(stats)
+    slot_limits = None
+    if food_limits is not None:
+        slot_limits = np.array([food_limits.get(name, np.inf) for name in names], dtype=float)
+
+    priority_indexes = getattr(key_arrays, "priority_indexes", None)
+    bounded = priority_indexes is not None and not ingredient_cap
+    if bounded:
+        priority_row = np.zeros((1, stat_count))
+        priority_row[0, priority_indexes] = 1
+        priority_mask = stat_masks(priority_row)[0]
+        beam_primary = beam_stats[:, priority_indexes].sum(axis=1)
+        slot_primary = stats[:, priority_indexes].sum(axis=1)
+
+    # Best expansions so far, sorted; resumed ones come before every new one
+    kept_ids, kept_stats = _entry_arrays(partial, food_ids, size + 1, stat_count)
+    kept_primary, kept_secondary = key_arrays(kept_stats)
+    kept_seq = np.arange(len(partial), dtype=np.int64) - len(partial)
+
+    def decode(count):
+        return [([id_names[food] for food in row], row_stats.copy()) for row, row_stats in zip(kept_ids[:count], kept_stats[:count])]
+
+    scored = 0
+    rows_per_block = max(1, EXPANSION_BLOCK // max(1, food_count))
+    for start in range(position, len(beam), rows_per_block):
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save(slot, beam, start, decode(beam_width))
+        stop = min(start + rows_per_block, len(beam))
+        if tracker is not None:
+            tracker.advance((stop - start) * food_count)
+
+        # Deduct 1 for every pair of the same stat: the set bits of both masks
+        overlap = beam_masks[start:stop, None] & slot_masks[None, :]
+        if bounded and len(kept_primary) >= beam_width:
+            threshold = kept_primary[beam_width - 1]
+            primary_bound = beam_primary[start:stop, None] + slot_primary[None, :] - popcount(overlap & priority_mask)
+            # The tolerance only absorbs the rounding of the two ways of summing
+            rows, foods = np.nonzero(primary_bound >= threshold - 1e-9 * max(1.0, abs(threshold)))
+        else:
+            rows, foods = np.divmod(np.arange((stop - start) * food_count), food_count)
+        if slot_limits is not None:
+            # The entries are within the limits, so only the added food can go over
+            used = (beam_ids[rows + start] == slot_ids[foods, None]).sum(axis=1)
+            allowed = used < slot_limits[foods]
+            rows, foods = rows[allowed], foods[allowed]
+        if len(rows) == 0:
+            continue
+        scored += len(rows)
+        entries = rows + start
+        new_stats = beam_stats[entries] + stats[foods] - mask_bits(overlap[rows, foods], stat_count)
+        new_ids = np.hstack([beam_ids[entries], slot_ids[foods, None]])
+        primary, secondary = key_arrays(new_stats)
+
+        all_ids = np.vstack([kept_ids, new_ids])
+        all_seq = np.concatenate([kept_seq, entries.astype(np.int64) * food_count + foods])
+        all_primary = np.concatenate([kept_primary, primary])
+        all_secondary = np.concatenate([kept_secondary, secondary])
+        all_stats = np.vstack([kept_stats, new_stats])
+
+        # Keep the first expansion of each combination, then sort like the stable sort of beam_sort_key
+        by_seq = np.argsort(all_seq, kind="stable")
+        _, first = np.unique(np.sort(all_ids[by_seq], axis=1), axis=0, return_index=True)
+        unique = by_seq[first]
+        order = unique[np.lexsort((all_seq[unique], -all_secondary[unique], -all_primary[unique]))]
+        if not ingredient_cap:
+            order = order[:beam_width]
+        kept_ids, kept_stats, kept_seq = all_ids[order], all_stats[order], all_seq[order]
+        kept_primary, kept_secondary = all_primary[order], all_secondary[order]
+
+    if ingredient_cap:
+        entries = (([id_names[food] for food in row], row_stats.copy()) for row, row_stats in zip(kept_ids, kept_stats))
+        return cap_beam(entries, beam_width, ingredient_cap), scored
+    return decode(beam_width), scored
+
+
+def run_beam(slot_names, slot_stats, beam_width, sort_key, progress_callback=None, ingredient_cap=None, key_arrays=None, max_memory=None, spill_dir=None, checkpoint=None, resume=None, on_slot=None, food_limits=None):
+    """Beam search over prepared slots.
+
+    ``slot_names`` are the candidate names of each slot and ``slot_stats``
+    their multiplied stats, one row per candidate. Returns the final beam.
+    ``key_arrays`` is the vectorized ``sort_key`` (see ``beam_key_arrays``);
+    without it the keys are computed row by row.
+    A ``SearchCheckpoint`` is saved after every slot and, while a slot runs,
+    whenever it is due; ``resume`` is the state loaded from one, or any beam
+    of the first slots to start from. ``on_slot`` is called with the number
+    of slots done and the beam after every slot. ``food_limits`` caps the
+    uses of each food per combination, see ``expand_slot``.
+    """
+    stat_count = slot_stats[0].shape[1] if slot_stats else 0
+    if key_arrays is None:
+        def key_arrays(stats):
+            keys = [sort_key((None, row)) for row in stats]
+            return np.array([key[0] for key in keys], dtype=float), np.array([key[1] for key in keys], dtype=float)
+    beam = [([], np.zeros(stat_count))]
+    start_slot, position, partial = 0, 0, []
+    if resume is not None:
+        start_slot, position, beam, partial = resume["slot"], resume["position"], resume["beam"], resume["partial"]
+        logger.info(f"Resuming at slot {start_slot + 1}, entry {position} of {len(beam)}")
+    slot_sizes = [len(names) for names in slot_names]
+    tracker = ProgressTracker(progress_callback, estimate_work(slot_sizes[start_slot:], beam_width, len(beam)))
+
+    # Initialize iteration counters
+    total_iterations = 0
+    start_time = datetime.now()
+
+    for i, (names, stats) in enumerate(_progress_iter(list(zip(slot_names, slot_stats)), desc="Processing recipe slots")):
+        if i < start_slot:
+            continue
+        # Inventory slots are small, and the food limits are only applied in memory
+        if max_memory and not food_limits and beam and expansion_bytes(len(beam), len(names), stats.shape[1], beam_width, EXPANSION_BLOCK, bool(ingredient_cap)) > max_memory:
+            # Too big for memory: expand through sorted runs on disk
+            total_iterations += len(beam) * len(names)
+            beam = spill_expand(beam, names, stats, beam_width, key_arrays, ingredient_cap, max_memory, spill_dir, tracker)
+            tracker.set_total(tracker.done + estimate_work(slot_sizes[i + 1:], beam_width, len(beam)))
+            if checkpoint is not None:
+                checkpoint.save(i + 1, beam)
+            if on_slot is not None:
+                on_slot(i + 1, beam)
+            continue
+
+        # A resumed slot continues after the entries it had done, with their best expansions.
+        # Expansions trimmed from those can't reach the beam: beam_width better ones are kept
+        beam, scored = expand_slot(
+            beam, names, stats, beam_width, key_arrays, ingredient_cap, tracker,
+            partial if i == start_slot else (), position if i == start_slot else 0,
+            # The caps depend on the whole expansion, so capped searches only save between slots
+            checkpoint if not ingredient_cap else None, i, food_limits
+        )
+        total_iterations += scored
+
+        # Revise the remaining work with the actual beam size
+        tracker.set_total(tracker.done + estimate_work(slot_sizes[i + 1:], beam_width, len(beam)))
+        if checkpoint is not None:
+            checkpoint.save(i + 1, beam)
+        if on_slot is not None:
+            on_slot(i + 1, beam)
+
+    # Calculate iterations per second
+    end_time = datetime.now()
+    time_elapsed = (end_time - start_time).total_seconds()
+    iterations_per_second = total_iterations / time_elapsed if time_elapsed > 0 else 0
+
+    # Log the total iterations and iterations per second
+    logger.info(f"Total iterations: {total_iterations}")
+    logger.info(f"Iterations per second: {iterations_per_second:.2f}")
+    tracker.finish()
+
+    return beam
+
+
+def evaluate_beam(beam, priority_stats, must_have_ingredients, stat_cols, stat_multipliers=None, include_rejected=False):
+    """Turn beam entries into result rows, in beam order.
+
+    Entries that fail a constraint are skipped, or with ``include_rejected``
+    yielded with the name of the failed constraint in their 'Rejected' column
+    (empty for accepted rows). This is a generator, so large beams can be
+    streamed to a file.
+    """
+    if stat_multipliers is None:
+        stat_multipliers = {stat: 1.0 for stat in stat_cols}
+    multipliers = np.array([stat_multipliers[stat] for stat in stat_cols])
+    unique_final_combinations = set()  # Track unique combinations in the final results
+
+    for combo, stats in beam:
+        # Divide the stats by the multipliers to restore the actual stats
+        actual_stats = stats / multipliers
+        stat_dict = {stat_cols[i]: int(actual_stats[i]) for i in range(len(stat_cols))}  # Convert stats to integers
+
+        # Ensure "per" stat is not lower than -2
+        if "per" in stat_dict and stat_dict["per"] < -2:
+            stat_dict["per"] = -2
+
+        rejected = ""
+        if not all(stat_dict[stat] > 0 for stat in priority_stats):
+            rejected = "priority stat not positive"
+        elif must_have_ingredients and not has_must_haves(combo, must_have_ingredients):
+            # The must-have ingredients must appear the required number of times
+            rejected = "missing must-have ingredient"
+        elif sum(1 for ingredient in combo if contains_cha(ingredient)) > 1:
+            # More than one ingredient contains the word "cha"
+            rejected = "more than one cha ingredient"
+        else:
+            # Create a sorted tuple of the combo to check for uniqueness
+            sorted_combo = tuple(sorted(combo))
+            if sorted_combo in unique_final_combinations:
+                rejected = "duplicate"
+            else:
+                unique_final_combinations.add(sorted_combo)  # Mark this combination as processed
+
+        if rejected and not include_rejected:
+            continue
+
+        row = {
+            'Combination': ', '.join(combo),
+            **stat_dict
+        }
+        if include_rejected:
+            row['Rejected'] = rejected
+        yield row
+
+
+def has_must_haves(combo, must_have_ingredients):
+    """Check that a combo includes every must-have ingredient the required number of times."""
+    combo_ingredients = [ing.lower() for ing in combo]
+    must_have_counts = {must: must_have_ingredients.count(must) for must in set(must_have_ingredients)}
+
+    combo_counts = {must: sum(1 for food in combo_ingredients if must.lower() in food.lower()) for must in set(must_have_ingredients)}
+
+    return all(combo_counts.get(must, 0) >= count for must, count in must_have_counts.items())
+
+
+def add_alternatives(results, slot_members):
+    """Add the interchangeable foods of each slot to the results, as 'Alternatives'."""
+    for result in results:
+        result['Alternatives'] = [
+            slot_members[i].get(name, [name])
+            for i, name in enumerate(result['Combination'].split(', '))
+        ]
+    return results
+
+
+def select_results(beam, slot_members, priority_stats, must_have_ingredients, stat_cols, stat_multipliers, top_x=5, calculation_mode=0, list_alternatives=False, min_distance=0):
+    """Get the top_x results of a final beam.
+
+    With ``min_distance`` every result differs from the better ones by at
+    least that many ingredients.
+    """
+    results = list(evaluate_beam(beam, priority_stats, must_have_ingredients, stat_cols, stat_multipliers))
+
+    # Final sorting based on calculation_mode
+    results.sort(key=result_sort_key(priority_stats, calculation_mode, stat_cols), reverse=True)
+    if min_distance > 0:
+        results = diverse_results(results, top_x, min_distance)
+    else:
+        results = results[:top_x]
+
+    # Expand the classes back to concrete food names for the returned results
+    if list_alternatives:
+        add_alternatives(results, slot_members)
+
+    return results
+
+
+# Beam Search
+def beam_search(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, top_x=5, progress_callback=None, depth=1, calculation_mode=0, stat_multipliers=None, stat_cols=None, collapse_equivalent=True, list_alternatives=False, min_distance=0, ingredient_cap=None, inventory=None):
+    if stat_cols is None:
+        stat_cols = infer_stat_cols(tag_allowed_foods)
+    if stat_multipliers is None:
+        stat_multipliers = {stat: 1.0 for stat in stat_cols}
+    if ingredient_cap is None:
+        ingredient_cap = diversity_cap(default_beam_width(len(recipe), depth), min_distance)
+
+    if not ingredient_cap and inventory is None:
+        from .single_stat import single_stat_query, single_stat_search
+
+        if single_stat_query(priority_stats, stat_multipliers):
+            # Answered exactly, and much faster than the beam
+            slots, slot_members = build_slots(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, collapse_equivalent)
+            results = single_stat_search(
+                [[food['Foods'] for food in slot] for slot in slots],
+                [np.array([food['stats'] for food in slot], dtype=float).reshape(len(slot), len(stat_cols)) for slot in slots],
+                priority_stats[0], must_have_ingredients, stat_cols, stat_multipliers, top_x, progress_callback
+            )
+            if results is not None:
+                return add_alternatives(results, slot_members) if list_alternatives else results
+
+    beam, slot_members = search_beam(
+        recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients,
+        progress_callback=progress_callback, depth=depth, calculation_mode=calculation_mode,
+        stat_multipliers=stat_multipliers, stat_cols=stat_cols, collapse_equivalent=collapse_equivalent,
+        ingredient_cap=ingredient_cap, inventory=inventory
+    )
+    return select_results(beam, slot_members, priority_stats, must_have_ingredients, stat_cols, stat_multipliers, top_x, calculation_mode, list_alternatives, min_distance)
@@ -0,0 +1,158 @@
+"""Exhaustive search over every combination of a recipe.
+
+Vectorized with NumPy and processed in chunks, so recipes of 1-3 slots are
+feasible. It applies the same scoring, penalty and filters as ``beam_search``
+but checks every combination, so its results are the true optimum.
+"""
+import logging
+from math import factorial, prod
+
+import numpy as np
+
+from .engine import add_alternatives, build_slots, contains_cha, infer_stat_cols
+
+logger = logging.getLogger(__name__)
+
+# Default number of (prefix, food) combinations scored per chunk
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def count_combinations(slots):
+    """Number of ordered combinations of the candidate slots."""
+    return prod(len(slot) for slot in slots)
+
+
+def _expand(prefix_stats, slot_stats):
+    """Add every food of a slot to every prefix, with the overlap penalty."""
+    totals = prefix_stats[:, None, :] + slot_stats[None, :, :]
+    # Deduct 1 for every pair of the same stat
+    totals -= (prefix_stats[:, None, :] > 0) & (slot_stats[None, :, :] > 0)
+    return totals
+
+
+def _score(actual, priority_indexes, pot_indexes, other_indexes, calculation_mode):
+    """Primary and secondary sort keys of integer stat rows, as in ``result_sort_key``."""
+    if calculation_mode == 1:
+        primary = np.zeros(actual.shape[:-1], dtype=np.int64)
+        for stat_index, pot_index in zip(priority_indexes, pot_indexes):
+            if pot_index is None:
+                primary += actual[..., stat_index]
+            else:
+                primary += actual[..., stat_index] * actual[..., pot_index]
+    else:
+        primary = actual[..., priority_indexes].sum(axis=-1)
+    secondary = actual[..., other_indexes].sum(axis=-1)
+    return primary, secondary
+
+
+def exhaustive_search(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, top_x=5, calculation_mode=0, stat_multipliers=None, stat_cols=None, list_alternatives=False, chunk_size=DEFAULT_CHUNK_SIZE, max_combinations=None):
+    """Find the true top_x recipes by scoring every combination.
+
+    Takes the same query arguments as ``beam_search`` and returns results in
+    the same format. Raises ValueError if the recipe has more than
+    ``max_combinations`` combinations.
+    """
+    if stat_cols is None:
+        stat_cols = infer_stat_cols(tag_allowed_foods)
+    if stat_multipliers is None:
+        stat_multipliers = {stat: 1.0 for stat in stat_cols}
+
+    slots, slot_members = build_slots(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients)
+    total = count_combinations(slots)
+    if max_combinations is not None and total > max_combinations:
+        raise ValueError(f"The recipe has {total} combinations, more than the limit of {max_combinations}")
+    if total == 0 or top_x <= 0:
+        return []
+
+    multipliers = np.array([stat_multipliers[stat] for stat in stat_cols])
+    slot_stats = [np.array([food['stats'] for food in slot], dtype=float) * multipliers for slot in slots]
+    slot_names = [[food['Foods'] for food in slot] for slot in slots]
+    slot_cha = [np.array([contains_cha(name) for name in names], dtype=np.int8) for names in slot_names]
+    must_terms = sorted(set(must_have_ingredients))
+    must_required = np.array([must_have_ingredients.count(must) for must in must_terms], dtype=np.int16)
+    slot_must = [
+        np.array([[must.lower() in name.lower() for must in must_terms] for name in names], dtype=np.int16).reshape(len(names), len(must_terms))
+        for names in slot_names
+    ]
+
+    priority_indexes = [stat_cols.index(stat) for stat in priority_stats]
+    pot_indexes = [stat_cols.index(f"{stat}_pot") if f"{stat}_pot" in priority_stats else None for stat in priority_stats]
+    other_indexes = [i for i, stat in enumerate(stat_cols) if stat not in priority_stats]
+    per_index = stat_cols.index("per") if "per" in stat_cols else None
+
+    # Every prefix of all slots but the last one, kept in full
+    prefix_stats = np.zeros((1, len(stat_cols)))
+    prefix_foods = np.zeros((1, 0), dtype=np.int32)
+    prefix_cha = np.zeros(1, dtype=np.int8)
+    prefix_must = np.zeros((1, len(must_terms)), dtype=np.int16)
+    for stats, cha, must in zip(slot_stats[:-1], slot_cha[:-1], slot_must[:-1]):
+        count = len(stats)
+        rows = len(prefix_stats) * count
+        prefix_stats = _expand(prefix_stats, stats).reshape(rows, len(stat_cols))
+        prefix_foods = np.hstack([np.repeat(prefix_foods, count, axis=0), np.tile(np.arange(count, dtype=np.int32), len(prefix_foods))[:, None]])
+        prefix_cha = (prefix_cha[:, None] + cha[None, :]).reshape(rows)
+        prefix_must = (prefix_must[:, None, :] + must[None, :, :]).reshape(rows, len(must_terms))
+
+    # Each multiset of foods can appear once per slot ordering, keep enough to fill top_x after deduplication
+    keep = top_x * factorial(len(slots))
+    last_stats, last_cha, last_must = slot_stats[-1], slot_cha[-1], slot_must[-1]
+    rows_per_chunk = max(1, chunk_size // len(last_stats))
+
+    best_primary = np.zeros(0, dtype=np.int64)
+    best_secondary = np.zeros(0, dtype=np.int64)
+    best_prefix = np.zeros(0, dtype=np.int64)
+    best_last = np.zeros(0, dtype=np.int64)
+    best_actual = np.zeros((0, len(stat_cols)), dtype=np.int64)
+
+    for start in range(0, len(prefix_stats), rows_per_chunk):
+        stop = min(start + rows_per_chunk, len(prefix_stats))
+        totals = _expand(prefix_stats[start:stop], last_stats)
+
+        # Divide the stats by the multipliers to restore the actual stats, truncated like int()
+        actual = np.trunc(totals / multipliers).astype(np.int64)
+        if per_index is not None:
+            np.maximum(actual[..., per_index], -2, out=actual[..., per_index])
+
+        valid = (actual[..., priority_indexes] > 0).all(axis=-1)
+        valid &= (prefix_cha[start:stop, None] + last_cha[None, :]) <= 1
+        if must_terms:
+            valid &= ((prefix_must[start:stop, None, :] + last_must[None, :, :]) >= must_required).all(axis=-1)
+
+        prefix_index, last_index = np.nonzero(valid)
+        if len(prefix_index) == 0:
+            continue
+        actual = actual[prefix_index, last_index]
+        primary, secondary = _score(actual, priority_indexes, pot_indexes, other_indexes, calculation_mode)
+
+        best_primary = np.concatenate([best_primary, primary])
+        best_secondary = np.concatenate([best_secondary, secondary])
+        best_prefix = np.concatenate([best_prefix, prefix_index + start])
+        best_last = np.concatenate([best_last, last_index])
+        best_actual = np.concatenate([best_actual, actual])
+
+        if len(best_primary) > keep:
+            order = np.lexsort((-best_secondary, -best_primary))[:keep]
+            best_primary, best_secondary = best_primary[order], best_secondary[order]
+            best_prefix, best_last, best_actual = best_prefix[order], best_last[order], best_actual[order]
+
+    order = np.lexsort((-best_secondary, -best_primary))
+    results = []
+    seen = set()
+    for row in order:
+        foods = list(prefix_foods[best_prefix[row]]) + [best_last[row]]
+        combo = [slot_names[slot][food] for slot, food in enumerate(foods)]
+        sorted_combo = tuple(sorted(combo))
+        if sorted_combo in seen:
+            continue
+        seen.add(sorted_combo)
+        results.append({
+            'Combination': ', '.join(combo),
+            **{stat: int(value) for stat, value in zip(stat_cols, best_actual[row])}
+        })
+        if len(results) >= top_x:
+            break
+
+    logger.info(f"Exhaustive search checked {total} combinations")
+    if list_alternatives:
+        add_alternatives(results, slot_members)
+    return results
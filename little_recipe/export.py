@@ -0,0 +1,162 @@
+"""Streaming export of search results.
+
+Rows are pulled from a generator (usually ``evaluate_beam``) and written in
+chunks, so exporting a whole beam never builds a second copy of it in memory.
+"""
+import csv
+import json
+import logging
+import os
+from itertools import islice
+
+from .engine import evaluate_beam, infer_stat_cols, search_beam
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "jsonl", "xlsx", "parquet")
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _chunks(rows, chunk_size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def format_from_path(path):
+    """Get the export format from a file extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == "json":
+        extension = "jsonl"
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{extension}', use one of: {', '.join(EXPORT_FORMATS)}")
+    return extension
+
+
+def _write_csv(chunks, path, columns):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=columns)
+        writer.writeheader()
+        for chunk in chunks:
+            writer.writerows(chunk)
+
+
+def _write_jsonl(chunks, path, columns):
+    with open(path, "w", encoding="utf-8") as file:
+        for chunk in chunks:
+            file.write("".join(json.dumps(row) + "\n" for row in chunk))
+
+
+def _write_xlsx(chunks, path, columns):
+    from openpyxl import Workbook  # Write-only mode streams rows to a temporary file
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Results")
+    sheet.append(columns)
+    for chunk in chunks:
+        for row in chunk:
+            sheet.append([row[column] for column in columns])
+    workbook.save(path)
+
+
+def _write_parquet(chunks, path, columns):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs the pyarrow package") from None
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pylist(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+class _CountingChunks:
+    """Iterate over chunks while counting the rows."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.count = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.count += len(chunk)
+            yield chunk
+
+
+_WRITERS = {
+    "csv": _write_csv,
+    "jsonl": _write_jsonl,
+    "xlsx": _write_xlsx,
+    "parquet": _write_parquet,
+}
+
+
+def export_rows(rows, path, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write result rows to a CSV, JSONL, XLSX or Parquet file.
+
+    The format defaults to the file extension. A 'Rank' column is added in
+    front. Returns the number of rows written.
+    """
+    file_format = file_format or format_from_path(path)
+    if file_format not in _WRITERS:
+        raise ValueError(f"Unsupported export format '{file_format}', use one of: {', '.join(EXPORT_FORMATS)}")
+
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        columns = ["Rank", "Combination"]
+        chunks = iter(())
+    else:
+        columns = ["Rank", *first.keys()]
+
+        def ranked():
+            yield {"Rank": 1, **first}
+            for rank, row in enumerate(rows, 2):
+                yield {"Rank": rank, **row}
+
+        chunks = _chunks(ranked(), chunk_size)
+
+    counted = _CountingChunks(chunks)
+    _WRITERS[file_format](counted, path, columns)
+    logger.info(f"Exported {counted.count} rows to {path}")
+    return counted.count
+
+
+def export_beam(beam, path, priority_stats, must_have_ingredients, stat_cols, stat_multipliers=None, include_rejected=False, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Export every entry of a final beam, in beam order.
+
+    With ``include_rejected`` the entries removed by the final filters are
+    exported too, with the constraint that rejected them in the 'Rejected'
+    column.
+    """
+    rows = evaluate_beam(beam, priority_stats, must_have_ingredients, stat_cols, stat_multipliers, include_rejected=include_rejected)
+    return export_rows(rows, path, file_format=file_format, chunk_size=chunk_size)
+
+
+def export_search(path, recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, include_rejected=False, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE, **search_options):
+    """Run a search and export its whole final beam.
+
+    ``search_options`` are passed to ``search_beam`` (depth, calculation_mode,
+    stat_multipliers, stat_cols, ...).
+    """
+    beam, _ = search_beam(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, **search_options)
+    stat_cols = search_options.get("stat_cols")
+    if stat_cols is None:
+        stat_cols = infer_stat_cols(tag_allowed_foods)
+    return export_beam(
+        beam, path, priority_stats, must_have_ingredients, stat_cols,
+        stat_multipliers=search_options.get("stat_multipliers"),
+        include_rejected=include_rejected, file_format=file_format, chunk_size=chunk_size
+    )
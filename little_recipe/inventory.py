@@ -0,0 +1,53 @@
+"""Inventory mode: search only the foods the player actually holds.
+
+An inventory file maps food names to the number owned, e.g.::
+
+    {"Carrot": 3, "Marbled Dragon Meat": 1, "God Egg": 2}
+
+In inventory mode the candidates of every slot are the owned foods, and no
+recipe uses a food more times than it is owned. The counts are enforced
+while the beam is expanded, so the beam is never filled with recipes that
+can't be cooked. A few dozen owned foods instead of the whole database make
+the search space orders of magnitude smaller.
+"""
+import json
+import logging
+import os
+
+from .data import current_dir
+
+logger = logging.getLogger(__name__)
+
+inventory_path = os.path.join(current_dir, "Foods_Inventory.json")
+
+
+def load_inventory(path=inventory_path):
+    """Read an inventory file, mapping food names to the number owned.
+
+    Foods with a count of 0 are left out.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        inventory = json.load(file)
+    if not isinstance(inventory, dict) or not all(isinstance(count, int) and count >= 0 for count in inventory.values()):
+        raise ValueError(f"{path} must map food names to counts")
+    return {name: count for name, count in inventory.items() if count > 0}
+
+
+def resolve_inventory(inventory, food_names):
+    """Match the names of an inventory to the food database, ignoring case.
+
+    Raises ValueError listing the names that match no food.
+    """
+    by_lower = {name.lower(): name for name in food_names}
+    resolved = {}
+    unknown = []
+    for name, count in inventory.items():
+        food = by_lower.get(name.strip().lower())
+        if food is None:
+            unknown.append(name)
+        else:
+            resolved[food] = resolved.get(food, 0) + count
+    if unknown:
+        raise ValueError(f"Unknown foods in the inventory: {', '.join(unknown)}")
+    logger.info(f"Inventory of {len(resolved)} foods, {sum(resolved.values())} items")
+    return resolved
@@ -0,0 +1,248 @@
+"""Meet-in-the-middle search for recipes of 4 or more slots.
+
+The beam search keeps only ``1000 * depth`` entries per slot for long recipes,
+so good recipes whose first ingredients score poorly are cut early. Here the
+recipe is split into two halves instead. Each half keeps a much larger list of
+its best partial combinations, and the two lists are joined pair by pair.
+
+Joining a first half with stats ``a`` and a second half with stats ``b``
+costs one extra overlap penalty on every stat that is positive in ``a`` and
+positive in some food of ``b`` (its positive-stat signature). This is exact
+when stats are not negative. The best joined recipes are then replayed food by
+food, so the returned stats always follow the exact scoring rules.
+"""
+import logging
+import time
+
+import numpy as np
+
+from .engine import build_slots, contains_cha, estimate_work, infer_stat_cols
+from .progress import ProgressTracker
+from .exhaustive import _expand, _score
+
+logger = logging.getLogger(__name__)
+
+# Recipes with at least this many slots are worth splitting
+MIN_SLOTS = 4
+
+# Partial combinations kept per half and per bucket, times the depth
+DEFAULT_HALF_WIDTH = 2000
+
+# Number of (first half, second half) pairs scored per chunk
+DEFAULT_CHUNK_SIZE = 2_000_000
+
+
+class _Half:
+    """Bounded list of partial combinations of some recipe slots, as arrays."""
+
+    def __init__(self, stat_count, must_count):
+        self.stats = np.zeros((1, stat_count))  # Multiplied stats, with penalties
+        self.foods = np.zeros((1, 0), dtype=np.int32)  # Candidate index in each slot
+        self.ids = np.zeros((1, 0), dtype=np.int32)  # Global food id in each slot, for deduplication
+        self.cha = np.zeros(1, dtype=np.int8)
+        self.must = np.zeros((1, must_count), dtype=np.int16)
+        self.signature = np.zeros((1, stat_count), dtype=bool)  # Stats positive in some food
+
+    def take(self, rows):
+        for name in ("stats", "foods", "ids", "cha", "must", "signature"):
+            setattr(self, name, getattr(self, name)[rows])
+
+
+def _beam_score(stats, priority_indexes, pot_indexes, calculation_mode):
+    """Primary and secondary keys of multiplied stat rows, as in ``beam_sort_key``."""
+    if calculation_mode == 1:
+        primary = np.zeros(len(stats))
+        for stat_index, pot_index in zip(priority_indexes, pot_indexes):
+            primary += stats[:, stat_index] if pot_index is None else stats[:, stat_index] * stats[:, pot_index]
+    else:
+        primary = stats[:, priority_indexes].sum(axis=1)
+    return primary, stats.sum(axis=1)
+
+
+def _build_half(slot_stats, slot_ids, slot_cha, slot_must, must_required, width, priority_indexes, pot_indexes, calculation_mode, tracker):
+    """Expand the slots of one half, keeping the best ``width`` rows per bucket.
+
+    Buckets group rows by their "cha" count and must-have counts, so rows
+    that are needed to satisfy the constraints are not pushed out by rows
+    that score better but can never be joined into a valid recipe.
+    """
+    half = _Half(slot_stats[0].shape[1], len(must_required))
+    for stats, ids, cha, must in zip(slot_stats, slot_ids, slot_cha, slot_must):
+        count = len(stats)
+        rows = len(half.stats) * count
+        tracker.advance(rows)
+        expanded = _Half(stats.shape[1], len(must_required))
+        expanded.stats = _expand(half.stats, stats).reshape(rows, stats.shape[1])
+        expanded.foods = np.hstack([np.repeat(half.foods, count, axis=0), np.tile(np.arange(count, dtype=np.int32), len(half.foods))[:, None]])
+        expanded.ids = np.hstack([np.repeat(half.ids, count, axis=0), np.tile(ids, len(half.ids))[:, None]])
+        expanded.cha = (half.cha[:, None] + cha[None, :]).reshape(rows)
+        expanded.must = (half.must[:, None, :] + must[None, :, :]).reshape(rows, len(must_required))
+        expanded.signature = (half.signature[:, None, :] | (stats > 0)[None, :, :]).reshape(rows, stats.shape[1])
+
+        # A recipe can't have more than one "cha" ingredient
+        keep = expanded.cha <= 1
+
+        # Skip orderings of combinations that are already in the list
+        sorted_ids = np.sort(expanded.ids, axis=1)
+        _, first = np.unique(sorted_ids, axis=0, return_index=True)
+        unique = np.zeros(rows, dtype=bool)
+        unique[first] = True
+        expanded.take(np.nonzero(keep & unique)[0])
+
+        # Best rows first, then the first `width` rows of each bucket
+        primary, secondary = _beam_score(expanded.stats, priority_indexes, pot_indexes, calculation_mode)
+        expanded.take(np.lexsort((-secondary, -primary)))
+        buckets = np.column_stack([expanded.cha, np.minimum(expanded.must, must_required)])
+        _, bucket_ids = np.unique(buckets, axis=0, return_inverse=True)
+        bucket_ids = bucket_ids.reshape(-1)
+        rank = np.zeros(len(bucket_ids), dtype=np.int64)
+        for bucket in np.unique(bucket_ids):
+            members = np.nonzero(bucket_ids == bucket)[0]
+            rank[members] = np.arange(len(members))
+        expanded.take(np.nonzero(rank < width)[0])
+        half = expanded
+    return half
+
+
+def _add_food(totals, food_stats):
+    """Add one food to each row, with the overlap penalty."""
+    return totals + food_stats - ((totals > 0) & (food_stats > 0))
+
+
+def search_meet_in_the_middle(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, progress_callback=None, depth=1, calculation_mode=0, stat_multipliers=None, stat_cols=None, collapse_equivalent=True, half_width=None, pool_size=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Search by joining the best partial combinations of both recipe halves.
+
+    Takes the same arguments as ``search_beam`` and returns a final beam and
+    the slot members in the same format, so ``select_results`` and the
+    exports work unchanged.
+    """
+    if stat_cols is None:
+        stat_cols = infer_stat_cols(tag_allowed_foods)
+    if stat_multipliers is None:
+        stat_multipliers = {stat: 1.0 for stat in stat_cols}
+    if half_width is None:
+        half_width = DEFAULT_HALF_WIDTH * depth
+    if pool_size is None:
+        pool_size = max(1000, 100 * len(recipe))
+
+    start_time = time.perf_counter()
+    slots, slot_members = build_slots(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, collapse_equivalent)
+    if any(len(slot) == 0 for slot in slots):
+        return [], slot_members
+
+    multipliers = np.array([stat_multipliers[stat] for stat in stat_cols])
+    food_ids = {}
+    slot_stats = [np.array([food['stats'] for food in slot], dtype=float) * multipliers for slot in slots]
+    slot_ids = [np.array([food_ids.setdefault(food['Foods'], len(food_ids)) for food in slot], dtype=np.int32) for slot in slots]
+    slot_cha = [np.array([contains_cha(food['Foods']) for food in slot], dtype=np.int8) for slot in slots]
+    must_terms = sorted(set(must_have_ingredients))
+    must_required = np.array([must_have_ingredients.count(must) for must in must_terms], dtype=np.int16)
+    slot_must = [
+        np.array([[must.lower() in food['Foods'].lower() for must in must_terms] for food in slot], dtype=np.int16).reshape(len(slot), len(must_terms))
+        for slot in slots
+    ]
+
+    priority_indexes = [stat_cols.index(stat) for stat in priority_stats]
+    pot_indexes = [stat_cols.index(f"{stat}_pot") if f"{stat}_pot" in priority_stats else None for stat in priority_stats]
+    other_indexes = [i for i, stat in enumerate(stat_cols) if stat not in priority_stats]
+    per_index = stat_cols.index("per") if "per" in stat_cols else None
+
+    split = len(slots) // 2
+    slot_sizes = [len(slot) for slot in slots]
+    first_size = min(half_width, np.prod(slot_sizes[:split]))
+    second_size = min(half_width, np.prod(slot_sizes[split:]))
+    tracker = ProgressTracker(
+        progress_callback,
+        estimate_work(slot_sizes[:split], half_width) + estimate_work(slot_sizes[split:], half_width) + first_size * second_size
+    )
+
+    half_args = (must_required, half_width, priority_indexes, pot_indexes, calculation_mode, tracker)
+    first = _build_half(slot_stats[:split], slot_ids[:split], slot_cha[:split], slot_must[:split], *half_args)
+    second = _build_half(slot_stats[split:], slot_ids[split:], slot_cha[split:], slot_must[split:], *half_args)
+    tracker.set_total(tracker.done + len(first.stats) * len(second.stats))
+
+    # First halves in order of their best possible priority stats, so the join can stop early
+    weighted = (first.stats[:, priority_indexes] / multipliers[priority_indexes]).sum(axis=1)
+    first.take(np.argsort(-weighted, kind="stable"))
+    weighted = weighted[np.argsort(-weighted, kind="stable")]
+    second_best = (second.stats[:, priority_indexes] / multipliers[priority_indexes]).sum(axis=1).max(initial=-np.inf)
+
+    # The priority stats of the second half, in the order of priority_stats
+    second_priority = second.stats[:, priority_indexes]
+    second_priority_signature = second.signature[:, priority_indexes]
+    priority_multipliers = multipliers[priority_indexes]
+    local_priority = list(range(len(priority_indexes)))
+    local_pot = [None if pot_index is None else priority_indexes.index(pot_index) for pot_index in pot_indexes]
+    per_column = priority_indexes.index(per_index) if per_index in priority_indexes else None
+
+    best_primary = np.zeros(0, dtype=np.int64)
+    best_secondary = np.zeros(0, dtype=np.int64)
+    best_first = np.zeros(0, dtype=np.int64)
+    best_second = np.zeros(0, dtype=np.int64)
+    rows_per_chunk = max(1, chunk_size // max(1, len(second.stats)))
+    joined = 0
+
+    for start in range(0, len(first.stats), rows_per_chunk):
+        # Truncation can raise each priority stat by less than 1, nothing better can follow
+        if calculation_mode != 1 and len(best_primary) >= pool_size and weighted[start] + second_best + len(priority_indexes) < best_primary[-1]:
+            break
+        stop = min(start + rows_per_chunk, len(first.stats))
+        a = first.stats[start:stop]
+
+        # Score the priority stats of every pair first. The extra penalty of the join
+        # applies to stats positive in the first half and in a food of the second
+        a_priority = a[:, priority_indexes]
+        totals = a_priority[:, None, :] + second_priority[None, :, :] - ((a_priority > 0)[:, None, :] & second_priority_signature[None, :, :])
+        actual = np.trunc(totals / priority_multipliers).astype(np.int64)
+        if per_column is not None:
+            np.maximum(actual[..., per_column], -2, out=actual[..., per_column])
+
+        valid = (actual > 0).all(axis=-1)
+        valid &= (first.cha[start:stop, None] + second.cha[None, :]) <= 1
+        if len(must_terms):
+            valid &= ((first.must[start:stop, None, :] + second.must[None, :, :]) >= must_required).all(axis=-1)
+        joined += valid.size
+        tracker.advance(valid.size)
+
+        first_index, second_index = np.nonzero(valid)
+        primary, _ = _score(actual[first_index, second_index], local_priority, local_pot, [], calculation_mode)
+
+        # Only pairs that can enter the pool need their other stats
+        if len(best_primary) >= pool_size:
+            candidates = primary >= best_primary[-1]
+        elif len(primary) > pool_size:
+            candidates = primary >= np.partition(primary, len(primary) - pool_size)[len(primary) - pool_size]
+        else:
+            candidates = slice(None)
+        first_index, second_index, primary = first_index[candidates], second_index[candidates], primary[candidates]
+
+        if len(first_index):
+            pair_a, pair_b = first.stats[first_index + start], second.stats[second_index]
+            full = np.trunc((pair_a + pair_b - ((pair_a > 0) & second.signature[second_index])) / multipliers).astype(np.int64)
+            if per_index is not None:
+                np.maximum(full[:, per_index], -2, out=full[:, per_index])
+            _, secondary = _score(full, priority_indexes, pot_indexes, other_indexes, calculation_mode)
+            best_primary = np.concatenate([best_primary, primary])
+            best_secondary = np.concatenate([best_secondary, secondary])
+            best_first = np.concatenate([best_first, first_index + start])
+            best_second = np.concatenate([best_second, second_index])
+            order = np.lexsort((-best_secondary, -best_primary))[:pool_size]
+            best_primary, best_secondary = best_primary[order], best_secondary[order]
+            best_first, best_second = best_first[order], best_second[order]
+
+    # Replay the best joins food by food for their exact stats
+    foods = np.hstack([first.foods[best_first], second.foods[best_second]])
+    totals = np.zeros((len(foods), len(stat_cols)))
+    for slot, stats in enumerate(slot_stats):
+        totals = _add_food(totals, stats[foods[:, slot]])
+
+    beam = [([slots[slot][food]['Foods'] for slot, food in enumerate(row)], stats) for row, stats in zip(foods, totals)]
+    primary, secondary = _beam_score(totals, priority_indexes, pot_indexes, calculation_mode)
+    beam = [beam[i] for i in np.lexsort((-secondary, -primary))]
+
+    logger.info(
+        f"Meet in the middle: {len(first.stats)} x {len(second.stats)} half combinations, "
+        f"{joined} pairs joined in {time.perf_counter() - start_time:.2f}s"
+    )
+    tracker.finish()
+    return beam, slot_members
@@ -0,0 +1,101 @@
+"""Progress reporting in real work units, with a throughput-based ETA.
+
+Searches count the combinations they actually score. Callbacks are
+rate-limited, so reporting costs almost nothing however fine-grained the
+updates are, and receive a ProgressReport with the measured throughput and
+the estimated time left.
+"""
+import sys
+import time
+from typing import NamedTuple
+
+# Minimum time between two callbacks, in seconds
+DEFAULT_INTERVAL = 0.1
+
+
+def format_duration(seconds):
+    """Format seconds as m:ss or h:mm:ss."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class ProgressReport(NamedTuple):
+    """Snapshot of a search's progress."""
+    done: int  # Work units (scored combinations) done
+    total: int  # Current estimate of the total work units
+    elapsed: float  # Seconds since the start
+    finished: bool = False
+
+    @property
+    def fraction(self):
+        if self.finished:
+            return 1.0
+        return min(1.0, self.done / self.total) if self.total > 0 else 0.0
+
+    @property
+    def rate(self):
+        """Work units per second."""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Estimated seconds left, or None before there is a measured rate."""
+        if self.finished:
+            return 0.0
+        if self.rate <= 0:
+            return None
+        return max(0, self.total - self.done) / self.rate
+
+    def __str__(self):
+        if self.finished:
+            return f"{self.done:,} combinations in {format_duration(self.elapsed)} ({self.rate:,.0f}/s)"
+        text = f"{self.done:,} / {self.total:,} ({self.fraction:.0%})"
+        if self.eta is not None:
+            text += f", {self.rate:,.0f}/s, {format_duration(self.eta)} left"
+        return text
+
+
+class ProgressTracker:
+    """Count work units and call back at most once per ``min_interval`` seconds.
+
+    The total can be revised while the work runs, e.g. when the beam turns
+    out smaller than its width.
+    """
+
+    def __init__(self, callback=None, total=0, min_interval=DEFAULT_INTERVAL):
+        self.callback = callback
+        self.total = total
+        self.done = 0
+        self.min_interval = min_interval
+        self.start_time = time.perf_counter()
+        self._last_report = self.start_time
+
+    def report(self, finished=False):
+        return ProgressReport(self.done, max(self.total, self.done), time.perf_counter() - self.start_time, finished)
+
+    def advance(self, units=1):
+        self.done += units
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        if now - self._last_report >= self.min_interval:
+            self._last_report = now
+            self.callback(self.report())
+
+    def set_total(self, total):
+        self.total = total
+
+    def finish(self):
+        """Send the final report, whatever the rate limit."""
+        self.total = self.done
+        if self.callback is not None:
+            self.callback(self.report(finished=True))
+
+
+def print_progress(report, stream=None):
+    """Callback that rewrites one progress line on a terminal."""
+    stream = stream or sys.stderr
+    stream.write(f"\r{report}".ljust(79) + ("\n" if report.finished else ""))
+    stream.flush()
@@ -0,0 +1,403 @@
+"""Prepared-query API on top of the search engine.
+
+A ``RecipeEngine`` owns the stat matrix of the food database. ``prepare``
+compiles a query once: the candidate pools of each slot, their stat rows, the
+column indexes of the priority stats and the beam sort key. The returned
+``PreparedQuery`` is immutable, so its ``execute`` can be called again with
+another depth, top_x or stat multipliers, from any thread, without redoing
+that work.
+
+The engine also memoizes the beam after each slot of every search, so a
+search whose first slots match an earlier one (the same recipe with one more
+slot, or one less) starts from that beam instead of from scratch.
+
+Example::
+
+    engine = get_engine()
+    query = engine.prepare(["Meat", "Vegetable"], ["str"])
+    results = query.execute(top_x=5, depth=2)
+"""
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from .engine import add_alternatives, beam_key_arrays, beam_sort_key, build_slots, default_beam_width, diversity_cap, inventory_foods, run_beam, select_results
+from .single_stat import single_stat_query, single_stat_search
+
+logger = logging.getLogger(__name__)
+
+# Prepared queries kept per engine, least recently used dropped first
+MAX_PREPARED = 32
+
+# Beam entries kept in memoized prefix beams, least recently used dropped first
+MAX_PREFIX_ENTRIES = 500_000
+
+
+def _prefix_usable(stored_width, sizes, beam_width):
+    """True when a prefix beam searched at ``stored_width``, with beam ``sizes`` after each
+    of its slots, gives the beam of a search at ``beam_width`` (after trimming to it).
+    """
+    if beam_width <= stored_width:
+        # No earlier slot was trimmed differently, the last one only needs trimming
+        return all(size <= beam_width for size in sizes[:-1])
+    # A narrower search is only the same if it never trimmed anything
+    return all(size < stored_width for size in sizes)
+
+
+class PrefixBeams:
+    """Memoized beams after the first slots of past searches, bounded in total entries.
+
+    Beams are keyed by the query's filters and scoring, and by the ingredient
+    types of the slots searched so far, in order.
+    """
+
+    def __init__(self, max_entries=MAX_PREFIX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._beams = OrderedDict()  # (query key, prefix) -> {(beam width, cap): (sizes, beam)}
+        self._entries = 0
+
+    def put(self, key, prefix, beam_width, ingredient_cap, sizes, beam):
+        if len(beam) > self.max_entries:
+            return
+        with self._lock:
+            stored = self._beams.setdefault((key, tuple(prefix)), {})
+            previous = stored.pop((beam_width, ingredient_cap), None)
+            if previous is not None:
+                self._entries -= len(previous[1])
+            stored[(beam_width, ingredient_cap)] = (tuple(sizes), beam)
+            self._entries += len(beam)
+            self._beams.move_to_end((key, tuple(prefix)))
+            while self._entries > self.max_entries:
+                _, evicted = self._beams.popitem(last=False)
+                self._entries -= sum(len(beam) for _, beam in evicted.values())
+
+    def longest(self, key, recipe, beam_width, ingredient_cap):
+        """The longest memoized prefix of the recipe usable at this beam width and cap,
+        as (slot count, beam sizes, beam), or None."""
+        with self._lock:
+            for length in range(len(recipe), 0, -1):
+                stored = self._beams.get((key, tuple(recipe[:length])))
+                if not stored:
+                    continue
+                for (stored_width, stored_cap), (sizes, beam) in stored.items():
+                    if ingredient_cap:
+                        usable = (stored_width, stored_cap) == (beam_width, ingredient_cap)
+                    else:
+                        usable = stored_cap is None and _prefix_usable(stored_width, sizes, beam_width)
+                    if usable:
+                        self._beams.move_to_end((key, tuple(recipe[:length])))
+                        return length, sizes[:-1] + (min(sizes[-1], beam_width),), beam[:beam_width]
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._beams.clear()
+            self._entries = 0
+
+    def discard(self, ingredient_types):
+        """Drop the beams of the prefixes with a slot of one of these ingredient types."""
+        with self._lock:
+            for stored_key in [stored_key for stored_key in self._beams if not ingredient_types.isdisjoint(stored_key[1])]:
+                evicted = self._beams.pop(stored_key)
+                self._entries -= sum(len(beam) for _, beam in evicted.values())
+
+
+class PreparedQuery:
+    """A compiled query: candidate pools and scoring state for one recipe and filter set."""
+
+    def __init__(self, recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, calculation_mode, stat_cols, food_matrix, food_index, collapse_equivalent=True, selected_tags=(), prefix_beams=None, prefix_key=None, inventory=None):
+        self.recipe = tuple(recipe)
+        self.selected_tags = tuple(sorted(selected_tags))
+        self.priority_stats = tuple(priority_stats)
+        self.banned_ingredients = tuple(banned_ingredients)
+        self.must_have_ingredients = tuple(must_have_ingredients)
+        self.calculation_mode = calculation_mode
+        self.stat_cols = list(stat_cols)
+        self.collapse_equivalent = collapse_equivalent
+        self.prefix_beams = prefix_beams  # Shared with the other queries of the engine
+        self.prefix_key = prefix_key
+        self.inventory = dict(inventory) if inventory is not None else None
+        if self.inventory is not None:
+            tag_allowed_foods = inventory_foods(tag_allowed_foods, self.inventory)
+            self.collapse_equivalent = collapse_equivalent = False  # Interchangeable foods have their own counts
+        self.tag_allowed_foods = tag_allowed_foods
+
+        slots, self.slot_members = build_slots(
+            self.recipe, self.priority_stats, tag_allowed_foods, self.banned_ingredients,
+            list(self.must_have_ingredients), collapse_equivalent
+        )
+        self.slot_names = [tuple(food['Foods'] for food in slot) for slot in slots]
+        self.slot_stats = []
+        for slot in slots:
+            # Foods that aren't in the database, like cooked intermediates, bring their own stats
+            stats = np.array([
+                food_matrix[food_index[food['Foods']]] if food['Foods'] in food_index else np.asarray(food['stats'], dtype=float)
+                for food in slot
+            ]).reshape(len(slot), len(self.stat_cols))
+            stats.flags.writeable = False  # Shared between threads
+            self.slot_stats.append(stats)
+        self.sort_key = beam_sort_key(list(self.priority_stats), calculation_mode, self.stat_cols)
+        self.key_arrays = beam_key_arrays(list(self.priority_stats), calculation_mode, self.stat_cols)
+
+    @property
+    def empty(self):
+        """True when a slot has no candidate, so there are no results."""
+        return any(len(names) == 0 for names in self.slot_names)
+
+    def _multipliers(self, stat_multipliers):
+        if stat_multipliers is None:
+            return np.ones(len(self.stat_cols))
+        return np.array([stat_multipliers[stat] for stat in self.stat_cols], dtype=float)
+
+    def describe(self, depth=1, stat_multipliers=None, ingredient_cap=None):
+        """The query with these search settings, as a JSON-friendly dictionary (see ``checkpoint``)."""
+        return {
+            "recipe": list(self.recipe),
+            "priority_stats": list(self.priority_stats),
+            "selected_tags": list(self.selected_tags),
+            "banned_ingredients": sorted(self.banned_ingredients),
+            "must_have_ingredients": sorted(self.must_have_ingredients),
+            "calculation_mode": self.calculation_mode,
+            "depth": depth,
+            "stat_multipliers": {stat: float(value) for stat, value in (stat_multipliers or {}).items()},
+            "ingredient_cap": ingredient_cap,
+            "inventory": self.inventory,
+        }
+
+    def search(self, depth=1, stat_multipliers=None, progress_callback=None, ingredient_cap=None, solver="beam", max_memory=None, spill_dir=None, checkpoint=None, resume=None):
+        """Run the search and return the final beam and the slot members, like ``search_beam``.
+
+        ``solver`` is "beam" or "middle" (meet in the middle, which builds
+        its own halves from the query's foods). ``max_memory`` and
+        ``spill_dir`` let the beam spill to disk, see ``search_beam``, and
+        ``checkpoint`` and ``resume`` save and restore its progress, see
+        ``run_beam``. Without ``resume`` the beam search starts from the
+        memoized beam of the longest matching prefix, if any.
+        """
+        if solver == "middle":
+            if self.inventory is not None:
+                raise ValueError("Meet in the middle doesn't enforce inventory counts, use the beam solver")
+            from .meet_in_middle import search_meet_in_the_middle
+
+            return search_meet_in_the_middle(
+                list(self.recipe), list(self.priority_stats), self.tag_allowed_foods, list(self.banned_ingredients),
+                list(self.must_have_ingredients), progress_callback=progress_callback, depth=depth,
+                calculation_mode=self.calculation_mode, stat_multipliers=stat_multipliers, stat_cols=self.stat_cols,
+                collapse_equivalent=self.collapse_equivalent
+            )
+        if solver != "beam":
+            raise ValueError(f"Unknown solver '{solver}'")
+
+        multipliers = self._multipliers(stat_multipliers)
+        beam_width = default_beam_width(len(self.recipe), depth)
+        on_slot = None
+        if self.prefix_beams is not None and resume is None:
+            # Start from the beam of the longest matching prefix of an earlier search
+            key = (self.prefix_key, multipliers.tobytes())
+            sizes = ()
+            warm = self.prefix_beams.longest(key, self.recipe, beam_width, ingredient_cap)
+            if warm is not None:
+                slot, sizes, warm_beam = warm
+                resume = {"slot": slot, "position": 0, "beam": warm_beam, "partial": []}
+                logger.info(f"Warm start from the beam of {', '.join(self.recipe[:slot])}")
+
+            def on_slot(slot, slot_beam):
+                nonlocal sizes
+                sizes = sizes + (len(slot_beam),)
+                self.prefix_beams.put(key, self.recipe[:slot], beam_width, ingredient_cap, sizes, slot_beam)
+
+        beam = run_beam(
+            self.slot_names, [stats * multipliers for stats in self.slot_stats], beam_width,
+            self.sort_key, progress_callback=progress_callback, ingredient_cap=ingredient_cap,
+            key_arrays=self.key_arrays, max_memory=max_memory, spill_dir=spill_dir, checkpoint=checkpoint, resume=resume,
+            on_slot=on_slot, food_limits=self.inventory
+        )
+        return list(beam), self.slot_members
+
+    def select(self, beam, top_x=5, stat_multipliers=None, list_alternatives=True, min_distance=0):
+        """Get the top_x results of a final beam of this query."""
+        if stat_multipliers is None:
+            stat_multipliers = {stat: 1.0 for stat in self.stat_cols}
+        return select_results(
+            beam, self.slot_members, list(self.priority_stats), list(self.must_have_ingredients), self.stat_cols,
+            stat_multipliers, top_x=top_x, calculation_mode=self.calculation_mode,
+            list_alternatives=list_alternatives, min_distance=min_distance
+        )
+
+    def exact(self, top_x=5, stat_multipliers=None, progress_callback=None, list_alternatives=True):
+        """The exact top_x results of a single priority stat query (see ``single_stat``).
+
+        Returns None when the query doesn't qualify or is too large for it;
+        there is no beam, so exports and checkpoints still need ``search``.
+        """
+        if self.inventory is not None or not single_stat_query(self.priority_stats, stat_multipliers):
+            return None
+        results = single_stat_search(
+            self.slot_names, self.slot_stats, self.priority_stats[0], list(self.must_have_ingredients), self.stat_cols,
+            stat_multipliers, top_x, progress_callback
+        )
+        if results is not None and list_alternatives:
+            add_alternatives(results, self.slot_members)
+        return results
+
+    def execute(self, top_x=5, depth=1, stat_multipliers=None, progress_callback=None, min_distance=0, ingredient_cap=None, solver="beam", list_alternatives=True, max_memory=None, spill_dir=None):
+        """Search and return the top_x results, in the format of ``beam_search``.
+
+        Like ``beam_search``, queries that ``exact`` can answer skip the beam.
+        """
+        if ingredient_cap is None and solver == "beam":
+            ingredient_cap = diversity_cap(default_beam_width(len(self.recipe), depth), min_distance)
+        if solver == "beam" and not ingredient_cap:
+            results = self.exact(top_x, stat_multipliers, progress_callback, list_alternatives)
+            if results is not None:
+                return results
+        beam, _ = self.search(depth, stat_multipliers, progress_callback, ingredient_cap, solver, max_memory, spill_dir)
+        return self.select(beam, top_x, stat_multipliers, list_alternatives, min_distance)
+
+
+class RecipeEngine:
+    """Prepares queries against a food database, caching the compiled ones.
+
+    Safe to share between threads. After the database is reloaded only the
+    rows of the changed foods are patched, and only the prepared queries and
+    prefix beams with a slot of a changed ingredient type are dropped.
+    ``food_matrix`` is the stat matrix of the database in food order, if the
+    caller already has one (e.g. in shared memory); it is used as is.
+    """
+
+    def __init__(self, database, max_prepared=MAX_PREPARED, max_prefix_entries=MAX_PREFIX_ENTRIES, food_matrix=None):
+        self.database = database
+        self._given_matrix = food_matrix
+        self.max_prepared = max_prepared
+        self.prefix_beams = PrefixBeams(max_prefix_entries)
+        self._lock = threading.Lock()
+        self._version = None
+        self._prepared = OrderedDict()
+        self._pending = []  # FoodChanges of the reloads not applied yet
+
+        # The database keeps its listeners, so it only holds a weak reference to the engine
+        reference = weakref.WeakMethod(self._on_reload)
+
+        def listener(database, changes):
+            on_reload = reference()
+            if on_reload is None:
+                database.unsubscribe(listener)
+            else:
+                on_reload(changes)
+        database.subscribe(listener)
+
+    def _on_reload(self, changes):
+        with self._lock:
+            self._pending.append(changes)
+
+    def _refresh(self):
+        """Bring the food matrix up to date with the database. Call with the lock held."""
+        if self._version == self.database.version and not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        if self._version is None or self._version + len(pending) < self.database.version:
+            # First use, or reloads whose changes haven't arrived yet: rebuild everything
+            foods = self.database.foods_list
+            if self._given_matrix is not None and self._version is None:
+                self._food_matrix, self._given_matrix = self._given_matrix, None
+            else:
+                self._food_matrix = np.array([food['stats'] for food in foods], dtype=float).reshape(len(foods), len(self.database.stat_cols))
+            self._food_matrix.flags.writeable = False
+            self._food_index = {food['Foods']: i for i, food in enumerate(foods)}
+            self._prepared.clear()
+            self.prefix_beams.clear()
+        else:
+            for changes in pending:
+                self._patch(changes)
+        self._version = self.database.version
+
+    def _patch(self, changes):
+        """Update the rows of the changed foods and drop what was compiled from their ingredient types.
+
+        Rows of removed foods are left unused. Call with the lock held.
+        """
+        foods_by_name = self.database.foods_by_name
+        food_index = dict(self._food_index)
+        matrix = self._food_matrix.copy()  # Prepared queries compiling outside the lock may be reading the old one
+        added = []
+        for name in sorted(changes.names):
+            food = foods_by_name.get(name)
+            if food is None:
+                food_index.pop(name, None)
+            elif name in food_index:
+                matrix[food_index[name]] = food['stats']
+            else:
+                food_index[name] = len(matrix) + len(added)
+                added.append(food['stats'])
+        if added:
+            matrix = np.vstack([matrix, np.array(added, dtype=float).reshape(len(added), matrix.shape[1])])
+        matrix.flags.writeable = False
+        self._food_matrix, self._food_index = matrix, food_index
+
+        for key in [key for key in self._prepared if not changes.types.isdisjoint(key[0])]:
+            del self._prepared[key]
+        self.prefix_beams.discard(changes.types)
+
+    def prepare(self, recipe, priority_stats, selected_tags=None, banned_ingredients=(), must_have_ingredients=(), calculation_mode=0, collapse_equivalent=True, extra_foods=(), inventory=None):
+        """Compile a query, or get the compiled one of an identical earlier call.
+
+        ``selected_tags`` defaults to every tag of the database.
+        ``extra_foods`` are more candidate records, e.g. cooked intermediates.
+        ``inventory`` maps the owned food names to their counts, see ``inventory``.
+        """
+        if selected_tags is None:
+            selected_tags = self.database.unique_tags
+        # Everything but the recipe: the candidates of a slot only depend on its type and these
+        prefix_key = (
+            tuple(priority_stats), frozenset(selected_tags), frozenset(banned_ingredients),
+            tuple(sorted(must_have_ingredients)), calculation_mode, collapse_equivalent,
+            tuple((food['Foods'], np.asarray(food['stats']).tobytes()) for food in extra_foods),
+            tuple(sorted(inventory.items())) if inventory is not None else None,
+        )
+        key = (tuple(recipe), prefix_key)
+        with self._lock:
+            self._refresh()
+            prepared = self._prepared.get(key)
+            if prepared is not None:
+                self._prepared.move_to_end(key)
+                return prepared
+            food_matrix, food_index = self._food_matrix, self._food_index
+
+        # Compile outside the lock so other threads aren't held up
+        prepared = PreparedQuery(
+            recipe, priority_stats, self.database.tag_allowed_foods(set(selected_tags)) + list(extra_foods), banned_ingredients,
+            must_have_ingredients, calculation_mode, self.database.stat_cols, food_matrix, food_index, collapse_equivalent,
+            selected_tags, self.prefix_beams, prefix_key, inventory
+        )
+        with self._lock:
+            if self._food_matrix is food_matrix:  # Not compiled against a reloaded database
+                self._prepared[key] = prepared
+                while len(self._prepared) > self.max_prepared:
+                    self._prepared.popitem(last=False)
+        return prepared
+
+    def execute(self, recipe, priority_stats, top_x=5, depth=1, stat_multipliers=None, progress_callback=None, min_distance=0, solver="beam", **filters):
+        """Prepare and execute a query in one call."""
+        return self.prepare(recipe, priority_stats, **filters).execute(
+            top_x=top_x, depth=depth, stat_multipliers=stat_multipliers, progress_callback=progress_callback,
+            min_distance=min_distance, solver=solver
+        )
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Get the shared engine of the shared food database."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from .data import get_database
+
+            _engine = RecipeEngine(get_database())
+        return _engine
@@ -0,0 +1,192 @@
+"""Local-search refinement of search results.
+
+The beam is truncated after every slot, so a final recipe is often one
+ingredient away from a better one. Hill climbing from each result tries every
+single-slot swap against the full candidate list of the slot, and swaps of
+two slots of the same ingredient type at once, all scored in one vectorized
+pass, and moves to the best valid improvement until none is left or the time
+budget runs out.
+"""
+import logging
+import time
+
+import numpy as np
+
+from .engine import add_alternatives, build_slots, contains_cha, diverse_results, infer_stat_cols, inventory_foods, result_sort_key
+from .exhaustive import _score
+
+logger = logging.getLogger(__name__)
+
+# Default time budget of a refinement, in seconds
+DEFAULT_TIME_BUDGET = 1.0
+
+# Entries at the top of the final beam to also start from
+BEAM_SEEDS = 20
+
+# Candidates per slot tried in pairwise swaps, best priority stats first
+PAIR_CANDIDATES = 300
+
+
+class _Problem:
+    """Candidate arrays of a query, to score many combinations at once."""
+
+    def __init__(self, slots, priority_stats, must_have_ingredients, stat_multipliers, stat_cols, calculation_mode, inventory=None):
+        self.multipliers = np.array([stat_multipliers[stat] for stat in stat_cols])
+        self.slot_stats = [np.array([food['stats'] for food in slot], dtype=float) * self.multipliers for slot in slots]
+        self.slot_index = [{food['Foods']: i for i, food in enumerate(slot)} for slot in slots]
+        self.slot_names = [[food['Foods'] for food in slot] for slot in slots]
+        self.slot_cha = [np.array([contains_cha(name) for name in names], dtype=np.int8) for names in self.slot_names]
+        self.must_terms = sorted(set(must_have_ingredients))
+        self.must_required = np.array([must_have_ingredients.count(must) for must in self.must_terms], dtype=np.int16)
+        self.slot_must = [
+            np.array([[must.lower() in name.lower() for must in self.must_terms] for name in names], dtype=np.int16).reshape(len(names), len(self.must_terms))
+            for names in self.slot_names
+        ]
+        self.priority_indexes = [stat_cols.index(stat) for stat in priority_stats]
+        self.pot_indexes = [stat_cols.index(f"{stat}_pot") if f"{stat}_pot" in priority_stats else None for stat in priority_stats]
+        self.other_indexes = [i for i, stat in enumerate(stat_cols) if stat not in priority_stats]
+        self.per_index = stat_cols.index("per") if "per" in stat_cols else None
+        self.calculation_mode = calculation_mode
+        self.slot_foods = self.limits = None
+        if inventory is not None:
+            # Foods as ids shared by every slot, to count their uses in a combination
+            food_ids = {name: i for i, name in enumerate(dict.fromkeys(name for names in self.slot_names for name in names))}
+            self.slot_foods = [np.array([food_ids[name] for name in names], dtype=np.int64) for names in self.slot_names]
+            self.limits = np.array([inventory[name] for name in food_ids], dtype=np.int64)
+
+    def evaluate(self, foods):
+        """Score rows of candidate indexes: (actual stats, primary, secondary, valid)."""
+        totals = np.zeros((len(foods), len(self.multipliers)))
+        cha = np.zeros(len(foods), dtype=np.int64)
+        must = np.zeros((len(foods), len(self.must_terms)), dtype=np.int64)
+        for slot, stats in enumerate(self.slot_stats):
+            food_stats = stats[foods[:, slot]]
+            # Deduct 1 for every pair of the same stat
+            totals = totals + food_stats - ((totals > 0) & (food_stats > 0))
+            cha += self.slot_cha[slot][foods[:, slot]]
+            must += self.slot_must[slot][foods[:, slot]]
+
+        actual = np.trunc(totals / self.multipliers).astype(np.int64)
+        if self.per_index is not None:
+            np.maximum(actual[:, self.per_index], -2, out=actual[:, self.per_index])
+        valid = (actual[:, self.priority_indexes] > 0).all(axis=1) & (cha <= 1)
+        if self.must_terms:
+            valid &= (must >= self.must_required).all(axis=1)
+        if self.limits is not None:
+            ids = np.stack([self.slot_foods[slot][foods[:, slot]] for slot in range(len(self.slot_foods))], axis=1)
+            uses = (ids[:, :, None] == ids[:, None, :]).sum(axis=2)
+            valid &= (uses <= self.limits[ids]).all(axis=1)
+        primary, secondary = _score(actual, self.priority_indexes, self.pot_indexes, self.other_indexes, self.calculation_mode)
+        return actual, primary, secondary, valid
+
+    def neighbours(self, foods, recipe):
+        """Every combination one slot swap, or one same-type pair swap, away."""
+        moves = []
+        for slot, stats in enumerate(self.slot_stats):
+            rows = np.repeat(foods[None, :], len(stats), axis=0)
+            rows[:, slot] = np.arange(len(stats))
+            moves.append(rows)
+        for first in range(len(recipe)):
+            for second in range(first + 1, len(recipe)):
+                if recipe[first] != recipe[second]:
+                    continue
+                count = min(PAIR_CANDIDATES, len(self.slot_stats[first]), len(self.slot_stats[second]))
+                a, b = np.meshgrid(np.arange(count), np.arange(count), indexing="ij")
+                rows = np.repeat(foods[None, :], count * count, axis=0)
+                rows[:, first], rows[:, second] = a.ravel(), b.ravel()
+                moves.append(rows)
+        return np.concatenate(moves)
+
+
+def refine_results(results, recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, top_x=5, calculation_mode=0, stat_multipliers=None, stat_cols=None, collapse_equivalent=True, list_alternatives=False, time_budget=DEFAULT_TIME_BUDGET, seeds=(), min_distance=0, inventory=None):
+    """Improve search results by hill climbing, within ``time_budget`` seconds.
+
+    Takes the results of ``beam_search`` (or ``select_results``) for the
+    query and returns the best top_x recipes among them and their refined
+    versions, and the number of those that came from the refinement. ``seeds`` are
+    more starting recipes as lists of food names, usually the top of the
+    final beam; they may break the constraints, so the climb can find valid
+    recipes when the search found too few. ``min_distance`` keeps the
+    results diverse like in ``select_results``. With an ``inventory`` (food
+    name -> count) only owned foods are tried, within their counts.
+    """
+    if stat_cols is None:
+        stat_cols = infer_stat_cols(tag_allowed_foods)
+    if stat_multipliers is None:
+        stat_multipliers = {stat: 1.0 for stat in stat_cols}
+
+    if inventory is not None:
+        tag_allowed_foods = inventory_foods(tag_allowed_foods, inventory)
+        collapse_equivalent = False
+
+    deadline = time.perf_counter() + time_budget
+    slots, slot_members = build_slots(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, collapse_equivalent)
+    problem = _Problem(slots, priority_stats, must_have_ingredients, stat_multipliers, stat_cols, calculation_mode, inventory)
+
+    def key(foods):
+        return tuple(sorted(problem.slot_names[slot][food] for slot, food in enumerate(foods)))
+
+    starts = []
+    taken = set()
+    for names in [result['Combination'].split(', ') for result in results] + [list(names) for names in seeds]:
+        if len(names) == len(slots) and all(name in index for name, index in zip(names, problem.slot_index)):
+            foods = np.array([index[name] for name, index in zip(names, problem.slot_index)])
+            if key(foods) not in taken:
+                taken.add(key(foods))
+                starts.append(foods)
+
+    refined = []
+    climbed = 0
+    moves = 0
+    for foods in starts:
+        _, primary, secondary, valid = problem.evaluate(foods[None, :])
+        # Any valid neighbour improves on an invalid start
+        current = (primary[0], secondary[0]) if valid[0] else (-np.inf, -np.inf)
+        start_key = key(foods)
+        while time.perf_counter() < deadline:
+            rows = problem.neighbours(foods, recipe)
+            _, primary, secondary, valid = problem.evaluate(rows)
+            better = valid & ((primary > current[0]) | ((primary == current[0]) & (secondary > current[1])))
+            candidates = np.nonzero(better)[0]
+            if len(candidates) == 0:
+                break
+            # Best move to a recipe that isn't already in the results
+            order = candidates[np.lexsort((-secondary[candidates], -primary[candidates]))]
+            move = next((row for row in order if key(rows[row]) not in taken), None)
+            if move is None:
+                break
+            foods = rows[move]
+            current = (primary[move], secondary[move])
+            taken.add(key(foods))
+            moves += 1
+        if key(foods) != start_key:
+            climbed += 1
+            refined.append(foods)
+
+    refined_results = []
+    if refined:
+        actual, _, _, _ = problem.evaluate(np.array(refined))
+        for foods, stats in zip(refined, actual):
+            refined_results.append({
+                'Combination': ', '.join(problem.slot_names[slot][food] for slot, food in enumerate(foods)),
+                **{stat: int(value) for stat, value in zip(stat_cols, stats)}
+            })
+
+    # Keep the originals too, first so they win ties, so refining never makes the results worse
+    originals = [{k: v for k, v in result.items() if k != 'Alternatives'} for result in results]
+    original_combos = {tuple(sorted(result['Combination'].split(', '))) for result in originals}
+    combined = []
+    seen = set()
+    for result in originals + refined_results:
+        combo = tuple(sorted(result['Combination'].split(', ')))
+        if combo not in seen:
+            seen.add(combo)
+            combined.append(result)
+    combined.sort(key=result_sort_key(priority_stats, calculation_mode, stat_cols), reverse=True)
+    combined = diverse_results(combined, top_x, min_distance) if min_distance > 0 else combined[:top_x]
+    improved = sum(tuple(sorted(result['Combination'].split(', '))) not in original_combos for result in combined)
+
+    logger.info(f"Local search climbed from {climbed} of {len(starts)} recipes with {moves} moves, {improved} new results")
+    if list_alternatives:
+        add_alternatives(combined, slot_members)
+    return combined, improved
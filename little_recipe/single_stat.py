@@ -0,0 +1,259 @@
+"""Exact solver for queries with a single priority stat.
+
+With one priority stat the ranking is that stat, then the sum of the other
+stats, in both calculation modes. Adding a food changes the running
+priority stat by its value minus 1 when both are positive, so the best
+final value reachable from a partial recipe only depends on the running
+value and on, per remaining slot, the best food for a positive and for a
+non-positive running value. When the multiplier of the stat is a whole
+number the stats stay whole and that step never decreases with the running
+value, so following the best food of each slot gives the exact best final
+value: a two-state dynamic program over the slots. A recipe holds at most
+one "cha" food, so the program also tracks whether that food is still free,
+and the other bounds take the best cha food in one remaining slot at most.
+
+The search is a branch and bound over partial recipes in blocks, best
+bound first. Each partial recipe is bounded by that exact priority value,
+then by the sum of the best value of every other stat in the remaining
+slots, and dropped when it can't beat the current top results. Complete
+recipes are scored and filtered exactly like ``exhaustive_search``, so the
+results have the same scores as its true optimum, usually after scoring a
+tiny fraction of the combinations. Queries whose bounds prune too little
+give up after ``MAX_SCORED`` scored nodes, and the callers fall back to the
+beam search.
+"""
+import logging
+
+import numpy as np
+
+from .engine import EXPANSION_BLOCK, contains_cha
+from .exhaustive import _expand, _score
+from .progress import ProgressTracker
+
+logger = logging.getLogger(__name__)
+
+# Partial recipes kept waiting at once before giving up for the beam search
+MAX_FRONTIER = 1_000_000
+
+# Scored partial and complete recipes before giving up for the beam search (a few seconds)
+MAX_SCORED = 10_000_000
+
+# Expansions per block of partial recipes: small blocks let the bounds prune more
+FRONTIER_BLOCK = 16_384
+
+
+def single_stat_query(priority_stats, stat_multipliers=None):
+    """True when the exact solver can answer a query.
+
+    The query needs one priority stat, a whole multiplier on it and positive
+    multipliers on every stat.
+    """
+    if len(priority_stats) != 1:
+        return False
+    multipliers = stat_multipliers or {}
+    if any(value <= 0 for value in multipliers.values()):
+        return False
+    return float(multipliers.get(priority_stats[0], 1.0)).is_integer()
+
+
+def _after(key, threshold):
+    """Rows whose (primary, secondary) key is strictly better than the threshold."""
+    return (key[0] > threshold[0]) | ((key[0] == threshold[0]) & (key[1] > threshold[1]))
+
+
+def _free_cha_best(no_cha, any_food):
+    """Best total from each slot on, with no cha food and with at most one.
+
+    ``no_cha`` and ``any_food`` hold the best value of each slot without and
+    with cha foods (-inf when there is none), along the first axis. Returns
+    two arrays with one more row, the totals from each slot to the end.
+    """
+    shape = (len(no_cha) + 1,) + no_cha.shape[1:]
+    used, free = np.zeros(shape), np.zeros(shape)
+    for slot in range(len(no_cha) - 1, -1, -1):
+        used[slot] = no_cha[slot] + used[slot + 1]
+        free[slot] = np.maximum(no_cha[slot] + free[slot + 1], any_food[slot] + used[slot + 1])
+    return used, free
+
+
+def single_stat_search(slot_names, slot_stats, priority_stat, must_have_ingredients, stat_cols, stat_multipliers=None, top_x=5, progress_callback=None, max_frontier=MAX_FRONTIER, max_scored=MAX_SCORED):
+    """The top_x recipes of a single priority stat query, exactly.
+
+    ``slot_names`` and ``slot_stats`` are the candidates of each slot, as
+    built by ``build_slots``, with their stats before the multipliers.
+    Returns results in the format of ``exhaustive_search``, without
+    alternatives, or None if more than ``max_frontier`` partial recipes
+    would have to wait at once or more than ``max_scored`` would be scored.
+    """
+    if stat_multipliers is None:
+        stat_multipliers = {stat: 1.0 for stat in stat_cols}
+    slot_count = len(slot_names)
+    if slot_count == 0 or any(len(names) == 0 for names in slot_names) or top_x <= 0:
+        return []
+
+    stat_count = len(stat_cols)
+    multipliers = np.array([stat_multipliers[stat] for stat in stat_cols], dtype=float)
+    slot_stats = [np.asarray(stats, dtype=float).reshape(len(names), stat_count) * multipliers for names, stats in zip(slot_names, slot_stats)]
+    slot_cha = [np.array([contains_cha(name) for name in names], dtype=np.int8) for names in slot_names]
+    must_terms = sorted(set(must_have_ingredients))
+    must_required = np.array([must_have_ingredients.count(must) for must in must_terms], dtype=np.int16)
+    slot_must = [
+        np.array([[must.lower() in name.lower() for must in must_terms] for name in names], dtype=np.int16).reshape(len(names), len(must_terms))
+        for names in slot_names
+    ]
+    priority_index = stat_cols.index(priority_stat)
+    other_indexes = [i for i in range(stat_count) if i != priority_index]
+    per_index = stat_cols.index("per") if "per" in stat_cols else None
+    # Foods as ids shared by every slot, so recipes can be compared as sorted id rows
+    food_ids = {name: i for i, name in enumerate(dict.fromkeys(name for names in slot_names for name in names))}
+    id_names = list(food_ids)
+    slot_ids = [np.array([food_ids[name] for name in names], dtype=np.int32) for names in slot_names]
+
+    def best_of(values, foods):
+        """Best value of each column among some rows, -inf when there are none."""
+        return values[foods].max(axis=0) if foods.any() else np.full(values.shape[1:], -np.inf)
+
+    # Best step of the priority stat per slot, for a positive and for a non-positive running value,
+    # with (index 1) and without (index 0) the cha foods
+    priority = [stats[:, priority_index] for stats in slot_stats]
+    step_positive = np.array([[best_of(values - (values > 0), cha == 0), best_of(values, cha >= 0)] for values, cha in zip(priority, slot_cha)])
+    step_other = np.array([[best_of(values, cha == 0), best_of(values, cha >= 0)] for values, cha in zip(priority, slot_cha)])
+    # Best value of each stat, and best sum of the other stats but "per", in the remaining slots, from each slot on,
+    # once the cha food is used (index 0) and while it is free (index 1)
+    summed = [i for i in other_indexes if i != per_index]
+    sums = [(stats[:, summed] / multipliers[summed]).sum(axis=1) for stats in slot_stats]
+    rest_best = _free_cha_best(
+        np.array([best_of(stats, cha == 0) for stats, cha in zip(slot_stats, slot_cha)]).reshape(slot_count, stat_count),
+        np.array([stats.max(axis=0) for stats in slot_stats])
+    )
+    rest_sum = _free_cha_best(np.array([best_of(total, cha == 0) for total, cha in zip(sums, slot_cha)]), np.array([total.max() for total in sums]))
+    # Truncating a negative stat can round it up by less than 1, unless its multiplier is whole
+    slack = sum(not float(multipliers[i]).is_integer() for i in summed)
+
+    def bound(stats, cha, slot):
+        """Upper bound of the (primary, secondary) result key of partial recipes filled up to ``slot``."""
+        # Best running value once the cha food is used and while it is free; -inf for impossible states
+        free = cha == 0
+        used = np.where(free, -np.inf, stats[:, priority_index])
+        value = np.where(free, stats[:, priority_index], -np.inf)
+        for remaining in range(slot, slot_count):
+            positive, other = step_positive[remaining], step_other[remaining]
+            used = np.maximum(
+                used + np.where(used > 0, positive[0], other[0]),
+                value + np.where(value > 0, positive[1], other[1])
+            )
+            value = value + np.where(value > 0, positive[0], other[0])
+        primary = np.trunc(np.maximum(used, value) / multipliers[priority_index])
+        rest = np.where(free[:, None], rest_best[1][slot], rest_best[0][slot])
+        # Penalties only lower stats, and truncating toward zero never rounds above the ceiling
+        best = np.ceil((stats[:, other_indexes] + rest[:, other_indexes]) / multipliers[other_indexes])
+        per = 0
+        if per_index is not None and per_index != priority_index:
+            column = other_indexes.index(per_index)
+            best[:, column] = np.maximum(best[:, column], -2)
+            per = best[:, column]
+        # The same sum, taking the best food of each slot for all the stats at once
+        together = np.floor((stats[:, summed] / multipliers[summed]).sum(axis=1) + np.where(free, rest_sum[1][slot], rest_sum[0][slot]) + slack + 1e-9) + per
+        return primary, np.minimum(best.sum(axis=1), together)
+
+    # Top results so far, as arrays sorted best first
+    top_ids = np.zeros((0, slot_count), dtype=np.int32)
+    top_actual = np.zeros((0, stat_count), dtype=np.int64)
+    top_primary = np.zeros(0)
+    top_secondary = np.zeros(0)
+    threshold = (0.0, np.inf)  # Results need a positive priority stat
+
+    def add_results(ids, actual, primary, secondary):
+        nonlocal top_ids, top_actual, top_primary, top_secondary, threshold
+        all_ids = np.vstack([top_ids, ids])
+        all_actual = np.vstack([top_actual, actual])
+        all_primary = np.concatenate([top_primary, primary])
+        all_secondary = np.concatenate([top_secondary, secondary])
+        order = np.lexsort((-all_secondary, -all_primary))
+        # Each recipe once, in its best food order
+        _, first = np.unique(np.sort(all_ids[order], axis=1), axis=0, return_index=True)
+        order = order[np.sort(first)][:top_x]
+        top_ids, top_actual = all_ids[order], all_actual[order]
+        top_primary, top_secondary = all_primary[order], all_secondary[order]
+        if len(order) == top_x:
+            threshold = (top_primary[-1], top_secondary[-1])
+
+    tracker = ProgressTracker(progress_callback, len(slot_names[0]))
+    # Blocks of partial recipes: slot, food ids, multiplied stats, cha count, must-have counts, bounds
+    start = np.zeros((1, stat_count))
+    stack = [(0, np.zeros((1, 0), dtype=np.int32), start, np.zeros(1, dtype=np.int8), np.zeros((1, len(must_terms)), dtype=np.int16), (np.array([np.inf]), np.array([np.inf])))]
+    waiting = 1
+    pending = len(slot_names[0])
+    scored = 0
+    while stack:
+        slot, ids, stats, cha, must, keys = stack.pop()
+        waiting -= len(ids)
+        pending -= len(ids) * len(slot_names[slot])
+        # The threshold may have risen since the block was bounded
+        keep = _after(keys, threshold)
+        if not keep.all():
+            ids, stats, cha, must = ids[keep], stats[keep], cha[keep], must[keep]
+        if len(ids) == 0:
+            continue
+
+        food_count = len(slot_names[slot])
+        rows_per_block = max(1, EXPANSION_BLOCK // food_count)
+        for block in range(0, len(ids), rows_per_block):
+            block_ids = ids[block:block + rows_per_block]
+            rows = len(block_ids)
+            totals = _expand(stats[block:block + rows], slot_stats[slot]).reshape(rows * food_count, stat_count)
+            entries, foods = np.divmod(np.arange(rows * food_count), food_count)
+            child_cha = cha[block:block + rows][entries] + slot_cha[slot][foods]
+            child_must = must[block:block + rows][entries] + slot_must[slot][foods]
+            child_ids = np.hstack([block_ids[entries], slot_ids[slot][foods, None]])
+            scored += len(totals)
+            tracker.advance(len(totals))
+            if scored > max_scored:
+                logger.info(f"Single stat search stopped after scoring {scored} combinations")
+                return None
+
+            if slot + 1 == slot_count:
+                # Complete recipes: the filters and keys of exhaustive_search
+                actual = np.trunc(totals / multipliers).astype(np.int64)
+                if per_index is not None:
+                    np.maximum(actual[:, per_index], -2, out=actual[:, per_index])
+                valid = (actual[:, priority_index] > 0) & (child_cha <= 1)
+                if must_terms:
+                    valid &= (child_must >= must_required).all(axis=1)
+                primary, secondary = _score(actual, [priority_index], [None], other_indexes, 0)
+                valid &= _after((primary, secondary), threshold)
+                if valid.any():
+                    add_results(child_ids[valid], actual[valid], primary[valid], secondary[valid])
+                continue
+
+            primary, secondary = bound(totals, child_cha, slot + 1)
+            keep = _after((primary, secondary), threshold) & (child_cha <= 1)
+            if not keep.any():
+                continue
+            order = np.nonzero(keep)[0]
+            order = order[np.lexsort((-secondary[order], -primary[order]))]
+            # Push the worst blocks first, so the best partial recipes are expanded next
+            chunk_rows = max(1, FRONTIER_BLOCK // len(slot_names[slot + 1]))
+            for chunk in range(((len(order) - 1) // chunk_rows) * chunk_rows, -1, -chunk_rows):
+                rows_kept = order[chunk:chunk + chunk_rows]
+                stack.append((
+                    slot + 1, child_ids[rows_kept], totals[rows_kept], child_cha[rows_kept], child_must[rows_kept],
+                    (primary[rows_kept], secondary[rows_kept])
+                ))
+            waiting += len(order)
+            pending += len(order) * len(slot_names[slot + 1])
+            if waiting > max_frontier:
+                logger.info(f"Single stat search stopped with {waiting} partial recipes waiting")
+                return None
+        tracker.set_total(tracker.done + pending)
+
+    tracker.finish()
+    total = int(np.prod([len(names) for names in slot_names], dtype=float))
+    logger.info(f"Single stat search scored {scored} of {total} combinations")
+    return [
+        {
+            'Combination': ', '.join(id_names[food] for food in row),
+            **{stat: int(value) for stat, value in zip(stat_cols, actual)}
+        }
+        for row, actual in zip(top_ids, top_actual)
+    ]
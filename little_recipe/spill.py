@@ -0,0 +1,157 @@
+"""Out-of-core beam expansion for very deep searches.
+
+The in-memory expansion of a slot scores its candidates in blocks and only
+keeps the best ``beam_width`` between blocks, so it needs one block plus
+the beam. With an ingredient cap every expansion is kept until the caps are
+applied, and at high depths the beam itself grows large. When the estimated
+memory would exceed the RAM cap, the slot is expanded in chunks instead.
+Each chunk is sorted by the beam sort key, trimmed to the beam width and
+written to a temporary directory as a run of fixed-width binary records. A
+k-way merge of the runs then keeps the best ``beam_width`` unique
+combinations, so memory stays bounded by the cap plus the beam itself.
+
+Ties are broken by expansion order, like the stable sort of the in-memory
+beam, so both give the same beam. The only exception is a combination
+reached in several food orders with different stats (negative stats make the
+pair deduction order-dependent): the in-memory beam keeps the first one
+expanded, the spilled beam the best one.
+"""
+import heapq
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Default RAM cap of a slot expansion, in bytes
+DEFAULT_MAX_MEMORY = 2 * 1024 ** 3
+
+# Rough memory of one in-memory beam entry besides its stats: name list and tuple
+ENTRY_OVERHEAD = 350
+
+# Rough memory of one scored candidate of a block besides its stats: ids, keys, indexes and masks
+CANDIDATE_OVERHEAD = 128
+
+# Records read from each run at a time during the merge
+MERGE_BLOCK = 4096
+
+
+def expansion_bytes(beam_size, slot_size, stat_count, beam_width, block_size, capped=False):
+    """Estimated peak memory of expanding a beam in memory (see ``engine.expand_slot``).
+
+    Candidates are scored about ``block_size`` at a time (at least one beam
+    entry times the slot), and the best ``beam_width`` expansions are kept between blocks, or every
+    expansion when the beam is ``capped``. The old and new beams are lists
+    of Python tuples.
+    """
+    expansions = beam_size * slot_size
+    block = min(expansions, max(block_size, slot_size))
+    kept = expansions if capped else min(expansions, beam_width)
+    # Stats, their penalty bits and the new stats of each candidate
+    block_bytes = block * (CANDIDATE_OVERHEAD + 24 * stat_count)
+    # The kept arrays are copied when a block is merged into them
+    kept_bytes = 2 * kept * (CANDIDATE_OVERHEAD // 2 + 8 * stat_count)
+    entries_bytes = (beam_size + min(kept, beam_width)) * (ENTRY_OVERHEAD + 8 * stat_count)
+    return block_bytes + kept_bytes + entries_bytes
+
+
+def _record_dtype(food_count, stat_count):
+    return np.dtype([
+        ('primary', 'f8'), ('secondary', 'f8'), ('seq', 'i8'),
+        ('foods', 'i4', (food_count,)), ('stats', 'f8', (stat_count,)),
+    ])
+
+
+def _read_run(path, dtype):
+    """Yield the merge keys and row of every record of a run file, in order."""
+    with open(path, "rb") as file:
+        while True:
+            block = np.fromfile(file, dtype=dtype, count=MERGE_BLOCK)
+            if len(block) == 0:
+                return
+            for row in block:
+                yield (-row['primary'], -row['secondary'], row['seq']), row
+
+
+def spill_expand(beam, names, stats, beam_width, key_arrays, ingredient_cap=None, max_memory=DEFAULT_MAX_MEMORY, spill_dir=None, tracker=None):
+    """Expand a beam by one slot through sorted runs on disk.
+
+    ``beam`` is a list of (food names, stats) entries, ``names`` and
+    ``stats`` are the candidates of the slot and ``key_arrays`` maps a stats
+    matrix to its (primary, secondary) beam sort keys. Returns the new beam
+    in the format of ``run_beam``.
+    """
+    food_ids = {}
+    id_names = []
+    for name in [name for combo, _ in beam for name in combo] + list(names):
+        if name not in food_ids:
+            food_ids[name] = len(id_names)
+            id_names.append(name)
+    slot_ids = np.array([food_ids[name] for name in names], dtype=np.int32)
+    combo_size = len(beam[0][0]) + 1
+    stat_count = stats.shape[1]
+    dtype = _record_dtype(combo_size, stat_count)
+
+    # Chunks of beam entries whose expansion fits in a quarter of the cap
+    rows_per_chunk = max(1, (max_memory // 4) // max(1, len(names) * dtype.itemsize * 3))
+    positive = stats > 0
+    runs = []
+    written = 0
+    with tempfile.TemporaryDirectory(prefix="little_recipe_beam_", dir=spill_dir) as directory:
+        for start in range(0, len(beam), rows_per_chunk):
+            chunk = beam[start:start + rows_per_chunk]
+            beam_stats = np.array([combo_stats for _, combo_stats in chunk]).reshape(len(chunk), stat_count)
+            beam_ids = np.array([[food_ids[name] for name in combo] for combo, _ in chunk], dtype=np.int32).reshape(len(chunk), combo_size - 1)
+
+            # Deduct 1 for every pair of the same stat, exactly like the in-memory beam
+            new_stats = (beam_stats[:, None, :] + stats[None, :, :] - ((beam_stats > 0)[:, None, :] & positive[None, :, :])).reshape(-1, stat_count)
+            new_ids = np.hstack([np.repeat(beam_ids, len(names), axis=0), np.tile(slot_ids, len(chunk))[:, None]])
+            seq = np.arange(start * len(names), (start + len(chunk)) * len(names), dtype=np.int64)
+            if tracker is not None:
+                tracker.advance(len(new_stats))
+
+            primary, secondary = key_arrays(new_stats)
+            order = np.lexsort((seq, -secondary, -primary))
+            # Keep the first of each combination, then only what can still enter the beam
+            _, first = np.unique(np.sort(new_ids[order], axis=1), axis=0, return_index=True)
+            order = order[np.sort(first)]
+            if not ingredient_cap:
+                order = order[:beam_width]
+
+            records = np.empty(len(order), dtype=dtype)
+            records['primary'], records['secondary'], records['seq'] = primary[order], secondary[order], seq[order]
+            records['foods'], records['stats'] = new_ids[order], new_stats[order]
+            path = os.path.join(directory, f"run_{len(runs):05d}.bin")
+            records.tofile(path)
+            runs.append(path)
+            written += records.nbytes
+            del new_stats, new_ids, records
+
+        # K-way merge of the sorted runs, keeping the first of each combination
+        counts = {}
+        seen = set()
+        new_beam = []
+        readers = [_read_run(path, dtype) for path in runs]
+        for _, row in heapq.merge(*readers, key=lambda item: item[0]):
+            ids = row['foods']
+            key = tuple(sorted(ids.tolist()))
+            if key in seen:
+                continue
+            seen.add(key)
+            combo = [id_names[food] for food in ids]
+            if ingredient_cap:
+                combo_names = set(combo)
+                if any(counts.get(name, 0) >= ingredient_cap for name in combo_names):
+                    continue
+                for name in combo_names:
+                    counts[name] = counts.get(name, 0) + 1
+            new_beam.append((combo, np.array(row['stats'])))
+            if len(new_beam) == beam_width:
+                break
+        for reader in readers:
+            reader.close()  # Close the run files before the directory is removed
+
+    logger.info(f"Spilled {len(runs)} sorted run(s), {written / 1024 ** 2:.1f} MB, to keep {len(new_beam)} beam entries")
+    return new_beam
@@ -0,0 +1,257 @@
+"""Stat multiplier sweep: one shared search for many multiplier vectors.
+
+Multipliers only change how the beam ranks partial recipes. The candidates of
+every slot are the same for all of them, so the sweep expands the slots once
+into a single shared beam. With the raw stat sums ``R`` and overlap penalty
+counts ``P`` of the candidates, the multiplied stats are about ``R * m - P``,
+so the beam scores of many vectors are a single matrix product ``R @ M.T``
+minus the penalties. The penalties are counted where the raw sums are
+positive, which is only exact for multipliers of 1: this ranking is an
+approximation used to choose the beam.
+
+The beam is ranked for up to ``SWEEP_ANCHORS`` vectors spread over the grid,
+and keeps the candidates with the best rank for any of them, at most
+``SWEEP_WIDTH_FACTOR`` times the width of a single search. A sweep then
+costs one to three single searches, however many vectors it has.
+
+The final candidates are replayed food by food for each vector, with its
+exact multiplied stats, and filtered and sorted exactly like ``beam_search``
+results.
+"""
+import logging
+import time
+from itertools import product
+
+import numpy as np
+
+from .engine import add_alternatives, build_slots, contains_cha, default_beam_width, estimate_work, infer_stat_cols
+from .progress import ProgressTracker
+
+logger = logging.getLogger(__name__)
+
+# Number of expanded candidates scored per chunk
+DEFAULT_CHUNK_SIZE = 500_000
+
+# Multiplier vectors the shared beam is ranked for
+SWEEP_ANCHORS = 8
+
+# Width of the shared beam, in widths of a single search
+SWEEP_WIDTH_FACTOR = 2
+
+
+def sweep_values(start, stop, points):
+    """Evenly spaced multiplier values, rounded like the sliders."""
+    if points < 1:
+        raise ValueError("A sweep needs at least one point")
+    return [round(float(value), 2) for value in np.linspace(start, stop, points)]
+
+
+def multiplier_grid(base_multipliers, axes):
+    """Every combination of the swept values, on top of the base multipliers.
+
+    ``axes`` maps each swept stat to its list of values.
+    """
+    for stat in axes:
+        if stat not in base_multipliers:
+            raise ValueError(f"Unknown stat '{stat}'")
+    stats = list(axes)
+    return [{**base_multipliers, **dict(zip(stats, values))} for values in product(*(axes[stat] for stat in stats))]
+
+
+def _beam_scores(raw, penalties, weights, priority_indexes, pot_indexes, calculation_mode):
+    """Beam sort keys of every candidate for every multiplier vector, as (n, K) arrays."""
+    # Multiplied stats are raw * m - penalties, so the sums are matrix products
+    secondary = raw @ weights.T - penalties.sum(axis=1)[:, None]
+    if calculation_mode == 1:
+        primary = np.zeros_like(secondary)
+        for stat_index, pot_index in zip(priority_indexes, pot_indexes):
+            stat = raw[:, stat_index, None] * weights[None, :, stat_index] - penalties[:, stat_index, None]
+            if pot_index is not None:
+                stat = stat * (raw[:, pot_index, None] * weights[None, :, pot_index] - penalties[:, pot_index, None])
+            primary += stat
+    else:
+        primary = raw[:, priority_indexes] @ weights[:, priority_indexes].T - penalties[:, priority_indexes].sum(axis=1)[:, None]
+    return primary, secondary
+
+
+def _top_rows(primary, secondary, width, limit):
+    """Indexes of the rows ranked in the best ``width`` of any column, at most ``limit`` of them.
+
+    Past the limit, the rows with the best rank in any column are kept.
+    """
+    if len(primary) <= limit:
+        return np.arange(len(primary))
+    best_rank = np.full(len(primary), width)
+    for column in range(primary.shape[1]):
+        # Everything at or above the width-th primary score, then the secondary key breaks the ties
+        threshold = np.partition(primary[:, column], len(primary) - width)[len(primary) - width]
+        rows = np.nonzero(primary[:, column] >= threshold)[0]
+        rows = rows[np.lexsort((-secondary[rows, column], -primary[rows, column]))[:width]]
+        best_rank[rows] = np.minimum(best_rank[rows], np.arange(len(rows)))
+    kept = np.nonzero(best_rank < width)[0]
+    if len(kept) > limit:
+        kept = np.sort(kept[np.argsort(best_rank[kept], kind="stable")[:limit]])
+    return kept
+
+
+def _expand(raw, penalties, foods, ids, slot_raw, slot_ids):
+    """Add every food of a slot to every candidate.
+
+    A penalty is counted where the raw sum so far and the food are both
+    positive, the sign of the multiplied stats when the multiplier is 1.
+    """
+    count = len(slot_raw)
+    rows = len(raw) * count
+    new_raw = (raw[:, None, :] + slot_raw[None, :, :]).reshape(rows, raw.shape[1])
+    new_penalties = (penalties[:, None, :] + ((raw - penalties > 0)[:, None, :] & (slot_raw > 0)[None, :, :])).reshape(rows, raw.shape[1])
+    new_foods = np.hstack([np.repeat(foods, count, axis=0), np.tile(np.arange(count, dtype=np.int32), len(foods))[:, None]])
+    new_ids = np.hstack([np.repeat(ids, count, axis=0), np.tile(slot_ids, len(ids))[:, None]])
+    return new_raw, new_penalties, new_foods, new_ids
+
+
+def _unique_first(ids):
+    """Indexes of the first row of each combination of foods, in row order."""
+    _, first = np.unique(np.sort(ids, axis=1), axis=0, return_index=True)
+    return np.sort(first)
+
+
+def sweep_multipliers(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, grid, top_x=5, depth=1, calculation_mode=0, stat_cols=None, collapse_equivalent=True, list_alternatives=False, progress_callback=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run one search for every multiplier vector of ``grid``.
+
+    Returns a list of (multipliers, results) pairs in grid order, with
+    results in the format of ``beam_search``.
+    """
+    if stat_cols is None:
+        stat_cols = infer_stat_cols(tag_allowed_foods)
+    if not grid:
+        return []
+    weights = np.array([[multipliers[stat] for stat in stat_cols] for multipliers in grid], dtype=float)
+    if (weights <= 0).any():
+        raise ValueError("Stat multipliers must be positive")
+
+    start_time = time.perf_counter()
+    beam_width = default_beam_width(len(recipe), depth)
+    slots, slot_members = build_slots(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, collapse_equivalent)
+    if any(len(slot) == 0 for slot in slots):
+        return [(multipliers, []) for multipliers in grid]
+
+    food_ids = {}
+    slot_raw = [np.array([food['stats'] for food in slot], dtype=float) for slot in slots]
+    slot_ids = [np.array([food_ids.setdefault(food['Foods'], len(food_ids)) for food in slot], dtype=np.int32) for slot in slots]
+    priority_indexes = [stat_cols.index(stat) for stat in priority_stats]
+    pot_indexes = [stat_cols.index(f"{stat}_pot") if f"{stat}_pot" in priority_stats else None for stat in priority_stats]
+
+    # Shared beam: raw stat sums, penalty counts, candidate index per slot and food ids.
+    # Penalties are counted on the raw stats, so the beam ranking is approximate; the replay below is exact
+    anchors = weights[np.unique(np.linspace(0, len(grid) - 1, min(len(grid), SWEEP_ANCHORS)).round().astype(int))]
+    shared_width = beam_width * SWEEP_WIDTH_FACTOR
+    raw = np.zeros((1, len(stat_cols)))
+    penalties = np.zeros((1, len(stat_cols)))
+    foods = np.zeros((1, 0), dtype=np.int32)
+    ids = np.zeros((1, 0), dtype=np.int32)
+    checked = 0
+    slot_sizes = [len(slot) for slot in slots]
+    tracker = ProgressTracker(progress_callback, estimate_work(slot_sizes, shared_width))
+
+    for i, (stats, slot_id) in enumerate(zip(slot_raw, slot_ids)):
+        rows_per_chunk = max(1, chunk_size // len(stats))
+        kept = []
+        for start in range(0, len(raw), rows_per_chunk):
+            stop = min(start + rows_per_chunk, len(raw))
+            chunk = _expand(raw[start:stop], penalties[start:stop], foods[start:stop], ids[start:stop], stats, slot_id)
+            tracker.advance(len(chunk[0]))
+            unique = _unique_first(chunk[3])
+            chunk = [array[unique] for array in chunk]
+            checked += len(unique)
+            rows = _top_rows(*_beam_scores(chunk[0], chunk[1], anchors, priority_indexes, pot_indexes, calculation_mode), beam_width, shared_width)
+            kept.append([array[rows] for array in chunk])
+        raw, penalties, foods, ids = (np.concatenate(arrays) for arrays in zip(*kept))
+
+        # The same combination can come from several chunks
+        unique = _unique_first(ids)
+        raw, penalties, foods, ids = raw[unique], penalties[unique], foods[unique], ids[unique]
+        rows = _top_rows(*_beam_scores(raw, penalties, anchors, priority_indexes, pot_indexes, calculation_mode), beam_width, shared_width)
+        raw, penalties, foods, ids = raw[rows], penalties[rows], foods[rows], ids[rows]
+
+        # Revise the remaining work with the size of the shared beam
+        tracker.set_total(tracker.done + estimate_work(slot_sizes[i + 1:], shared_width, len(raw)))
+
+    sweep = []
+    combo_names = [[slots[slot][food]['Foods'] for slot, food in enumerate(row)] for row in foods]
+    cha = np.array([sum(contains_cha(name) for name in names) for names in combo_names])
+    must_terms = sorted(set(must_have_ingredients))
+    must_ok = np.array([
+        all(sum(must.lower() in name.lower() for name in names) >= must_have_ingredients.count(must) for must in must_terms)
+        for names in combo_names
+    ], dtype=bool).reshape(len(combo_names))
+    sorted_ids = np.sort(ids, axis=1)
+    other_indexes = [i for i, stat in enumerate(stat_cols) if stat not in priority_stats]
+    per_index = stat_cols.index("per") if "per" in stat_cols else None
+
+    for multipliers, weight in zip(grid, weights):
+        # Replay the candidates food by food with this vector's multipliers
+        totals = np.zeros((len(foods), len(stat_cols)))
+        for slot, stats in enumerate(slot_raw):
+            food_stats = stats[foods[:, slot]] * weight
+            totals = totals + food_stats - ((totals > 0) & (food_stats > 0))
+
+        beam_primary, beam_secondary = _beam_scores(totals, np.zeros_like(totals), np.ones((1, len(stat_cols))), priority_indexes, pot_indexes, calculation_mode)
+        beam_order = np.lexsort((-beam_secondary[:, 0], -beam_primary[:, 0]))
+
+        actual = np.trunc(totals / weight).astype(np.int64)
+        if per_index is not None:
+            np.maximum(actual[:, per_index], -2, out=actual[:, per_index])
+        valid = (actual[:, priority_indexes] > 0).all(axis=1) & (cha <= 1) & must_ok
+
+        # Keep the first of each combination in beam order, like evaluate_beam
+        candidates = beam_order[valid[beam_order]]
+        _, first = np.unique(sorted_ids[candidates], axis=0, return_index=True)
+        candidates = candidates[np.sort(first)]
+
+        if calculation_mode == 1:
+            primary = sum(actual[candidates, s] * actual[candidates, p] if p is not None else actual[candidates, s] for s, p in zip(priority_indexes, pot_indexes))
+        else:
+            primary = actual[candidates][:, priority_indexes].sum(axis=1)
+        secondary = actual[candidates][:, other_indexes].sum(axis=1)
+        best = candidates[np.lexsort((-secondary, -primary))[:top_x]]
+
+        results = [
+            {'Combination': ', '.join(combo_names[row]), **{stat: int(value) for stat, value in zip(stat_cols, actual[row])}}
+            for row in best
+        ]
+        if list_alternatives:
+            add_alternatives(results, slot_members)
+        sweep.append((multipliers, results))
+
+    logger.info(f"Multiplier sweep of {len(grid)} vectors checked {checked} combinations in {time.perf_counter() - start_time:.2f}s")
+    tracker.finish()
+    return sweep
+
+
+def sweep_report(sweep, priority_stats, base_multipliers=None):
+    """Describe how the top recipes change across a sweep, as text."""
+    if not sweep:
+        return "Empty sweep."
+    base_multipliers = base_multipliers or sweep[0][0]
+    swept = [stat for stat in base_multipliers if len({multipliers[stat] for multipliers, _ in sweep}) > 1]
+
+    lines = [f"Sweep of {len(sweep)} multiplier vectors" + (f" over {', '.join(swept)}" if swept else "")]
+    winners = {}
+    previous = None
+    for multipliers, results in sweep:
+        label = ", ".join(f"{stat}={multipliers[stat]:.2f}" for stat in swept) or "base"
+        if not results:
+            lines.append(f"  {label}: no valid recipes")
+            previous = None
+            continue
+        top = results[0]
+        winners.setdefault(top['Combination'], []).append(label)
+        score = ", ".join(f"{stat}: {top[stat]}" for stat in priority_stats)
+        changed = previous is not None and [r['Combination'] for r in results] != previous
+        lines.append(f"  {label}: {top['Combination']} ({score}){'  <- top recipes changed' if changed else ''}")
+        previous = [r['Combination'] for r in results]
+
+    lines.append(f"{len(winners)} different best recipe(s):")
+    for combination, labels in sorted(winners.items(), key=lambda item: -len(item[1])):
+        lines.append(f"  {combination}: best at {len(labels)} of {len(sweep)} points")
+    return "\n".join(lines)
@@ -1,1238 +1,1427 @@
-import pandas as pd
-import os
-import numpy as np
-import tkinter as tk
-from tkinter import messagebox, filedialog
-from tqdm import tqdm
-import customtkinter as ctk  # Modern UI library
-from tkinter import IntVar
-import json
-import sys
-import logging
-from datetime import datetime  # For timestamping log entries
-
-# Set paths
-current_dir = os.path.dirname(os.path.abspath(__file__))
-input_path = os.path.join(current_dir, "Foods.xlsx")
-output_path = os.path.join(current_dir, "Foods_Calculated.xlsx")
-
-# Set up logging to save console output to a log file
-log_file_path = os.path.join(current_dir, "little_recipe.log")
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file_path),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
-# Load data and preprocess
-data = pd.read_excel(input_path)
-data['IngreType'] = data['IngreType'].str.split(', ')
-data['Tag'] = data['Tag'].str.split(', ')  # Split tags into lists
-stat_cols = [col for col in data.columns if col not in ['Foods', 'IngreType', 'Tag']]
-
-# Convert stats to numpy arrays for faster calculations
-foods_list = data.to_dict('records')
-for food in foods_list:
-    food['stats'] = np.array([food[col] for col in stat_cols])
-
-# Get unique tags from the "Tag" column
-unique_tags = set()
-for tags in data['Tag']:
-    if isinstance(tags, list):  # Check if tags are not NaN or empty
-        unique_tags.update(tags)
-unique_tags = sorted(unique_tags)  # Sort tags alphabetically
-
-# Variable to control tqdm output visibility in the console
-SHOW_TQDM_IN_CONSOLE = False  # Set to False to disable tqdm output in the console
-
-# Add this function to check if an ingredient contains the word "cha"
-def contains_cha(ingredient_name):
-    return "cha" in ingredient_name.lower().split()
-
-# Beam Search
-def beam_search(recipe, priority_stats, tag_allowed_foods, banned_ingredients, must_have_ingredients, top_x=5, progress_callback=None, depth=1, calculation_mode=0, stat_multipliers=None):
-    if stat_multipliers is None:
-        stat_multipliers = {stat: 1.0 for stat in stat_cols}
-        
-    beam_width = (1000 if len(recipe) > 2 else 100000) * depth
-    slots = []
-    for ingre_type in recipe:
-        valid_foods = [food for food in tag_allowed_foods if ingre_type in food['IngreType'] and not any(ban.lower() in food['Foods'].lower() for ban in banned_ingredients)]
-        valid_foods.sort(
-            key=lambda x: sum(x[stat] for stat in priority_stats),
-            reverse=True
-        )
-        slots.append(valid_foods)
-
-    beam = [([], np.zeros(len(stat_cols)))]
-    total_slots = len(slots)
-    
-    # Initialize iteration counters
-    total_iterations = 0
-    start_time = datetime.now()
-
-    for i, slot in enumerate(tqdm(slots, desc="Processing recipe slots", disable=not SHOW_TQDM_IN_CONSOLE)):
-        new_beam = []
-        unique_combinations = set()  # Track unique combinations
-
-        for combo_foods, combo_stats in tqdm(beam, desc=f"Slot {i+1}", leave=False, disable=not SHOW_TQDM_IN_CONSOLE):
-            for food in slot:
-                # Apply the stat multipliers to the food stats
-                multiplied_stats = food['stats'] * np.array([stat_multipliers[stat] for stat in stat_cols])
-                new_stats = combo_stats + multiplied_stats
-                
-                # Deduct 1 for every pair of the same stat
-                for stat_index in range(len(stat_cols)):
-                    if combo_stats[stat_index] > 0 and multiplied_stats[stat_index] > 0:
-                        new_stats[stat_index] -= 1
-                
-                new_combo = combo_foods + [food['Foods']]
-                
-                # Create a sorted tuple of the combo to check for uniqueness
-                sorted_combo = tuple(sorted(new_combo))
-                
-                # Skip if this combination has already been processed
-                if sorted_combo in unique_combinations:
-                    continue
-                
-                unique_combinations.add(sorted_combo)  # Mark this combination as processed
-                new_beam.append((new_combo, new_stats))
-                total_iterations += 1  # Increment iteration counter
-        
-        # Sort the new_beam based on the calculation_mode
-        if calculation_mode == 0:
-            new_beam.sort(
-                key=lambda x: (sum(x[1][stat_cols.index(stat)] for stat in priority_stats), sum(x[1])),
-                reverse=True
-            )
-        elif calculation_mode == 1:
-            new_beam.sort(
-                key=lambda x: (sum(x[1][stat_cols.index(stat)] * x[1][stat_cols.index(f"{stat}_pot")] if f"{stat}_pot" in priority_stats else x[1][stat_cols.index(stat)] for stat in priority_stats), sum(x[1])),
-                reverse=True
-            )
-        else:
-            new_beam.sort(
-                key=lambda x: (sum(x[1][stat_cols.index(stat)] for stat in priority_stats), sum(x[1])),
-                reverse=True
-            )
-        beam = new_beam[:beam_width]
-
-        # Update progress bar
-        if progress_callback:
-            progress = (i + 1) / total_slots
-            progress_callback(progress, total_iterations)
-    
-    # Calculate iterations per second
-    end_time = datetime.now()
-    time_elapsed = (end_time - start_time).total_seconds()
-    iterations_per_second = total_iterations / time_elapsed if time_elapsed > 0 else 0
-
-    # Log the total iterations and iterations per second
-    logging.info(f"Total iterations: {total_iterations}")
-    logging.info(f"Iterations per second: {iterations_per_second:.2f}")
-
-    results = []
-    unique_final_combinations = set()  # Track unique combinations in the final results
-
-    for combo, stats in beam:
-        # Divide the stats by the multipliers to restore the actual stats
-        actual_stats = stats / np.array([stat_multipliers[stat] for stat in stat_cols])
-        stat_dict = {stat_cols[i]: int(actual_stats[i]) for i in range(len(stat_cols))}  # Convert stats to integers
-
-        # Ensure "per" stat is not lower than -2
-        if "per" in stat_dict and stat_dict["per"] < -2:
-            stat_dict["per"] = -2
-
-        if all(stat_dict[stat] > 0 for stat in priority_stats):
-            # Ensure the must-have ingredients appear the exact number of times
-            if must_have_ingredients:
-                combo_ingredients = [ing.lower() for ing in combo]
-                must_have_counts = {must: must_have_ingredients.count(must) for must in set(must_have_ingredients)}
-
-                combo_counts = {must: sum(1 for food in combo_ingredients if must.lower() in food.lower()) for must in set(must_have_ingredients)}
-
-                if not all(combo_counts.get(must, 0) >= count for must, count in must_have_counts.items()):
-                    continue  # Skip this combination if it doesn't include all must-have ingredients the required number of times
-
-            # Check if more than one ingredient contains the word "cha"
-            cha_count = sum(1 for ingredient in combo if contains_cha(ingredient))
-            if cha_count > 1:
-                continue  # Skip this combination if it contains more than one "cha" ingredient
-
-            # Create a sorted tuple of the combo to check for uniqueness
-            sorted_combo = tuple(sorted(combo))
-            
-            # Skip if this combination has already been processed
-            if sorted_combo in unique_final_combinations:
-                continue
-            
-            unique_final_combinations.add(sorted_combo)  # Mark this combination as processed
-
-            results.append({
-                'Combination': ', '.join(combo),
-                **stat_dict
-            })
-    
-    # Final sorting based on calculation_mode
-    if calculation_mode == 0:
-        results.sort(
-            key=lambda x: (sum(x[stat] for stat in priority_stats), sum(x[stat] for stat in stat_cols if stat not in priority_stats)),
-            reverse=True
-        )
-    elif calculation_mode == 1:
-        results.sort(
-            key=lambda x: (sum(x[stat] * x[f"{stat}_pot"] if f"{stat}_pot" in priority_stats else x[stat] for stat in priority_stats), sum(x[stat] for stat in stat_cols if stat not in priority_stats)),
-            reverse=True
-        )
-    else:
-        results.sort(
-            key=lambda x: (sum(x[stat] for stat in priority_stats), sum(x[stat] for stat in stat_cols if stat not in priority_stats)),
-            reverse=True
-        )
-
-    return results[:top_x]
-
-# Define colors for ingredient types
-INGREDIENT_COLORS = {
-    "Meat": "#cc314b",
-    "Cheese": "#f5ea22",
-    "Vegetable": "#2bf032",
-    "Fruit": "#66cc69",
-    "Tempura Flour": "#bddbd8",
-    "Cake Dough": "#c0f0e1",
-    "Gelatine": "#7e918b",
-    "Fish": "#68b1e8",
-    "Bag of Rice": "#e1eef7",
-    "Bread Dough": "#a65656",
-    "Dough": "#947b7b",
-    "Egg": "#ebdfdf",
-    "Flour": "#e7ebdf",
-    "Nut": "#d4ed91",
-    "Pot of Noodle": "#dbe090",
-    "Sauce": "#e82074",
-    "Seasoning": "#5de892",
-    # Add more ingredient types and colors as needed
-}
-
-# Define colors for priority stats
-PRIORITY_STAT_COLORS = {
-    "str": "#b33b49",
-    "end": "#f2541f",
-    "dex": "#59de90",
-    "per": "#59ded3",
-    "ler": "#596fde",
-    "wil": "#8359de",
-    "mag": "#ba59de",
-    "cha": "#f21ff2",
-    "str_pot": "#b33b49",
-    "end_pot": "#f2541f",
-    "dex_pot": "#59de90",
-    "per_pot": "#59ded3",
-    "ler_pot": "#596fde",
-    "wil_pot": "#8359de",
-    "mag_pot": "#ba59de",
-    "cha_pot": "#f21ff2",
-    # Add more stats and colors as needed
-}
-
-# Modern Tkinter UI
-class RecipeApp(ctk.CTk):
-    def __init__(self):
-        super().__init__()
-
-        self.title("Little Recipe")  # Updated window title
-        self.resizable(False, True)
-
-        # Center the window on the screen
-        self.update_idletasks()
-        mscreen_width = self.winfo_screenwidth()
-        mscreen_height = self.winfo_screenheight()
-        mwindow_width = 1085
-        mwindow_height = 600
-
-        mx_position = (mscreen_width - mwindow_width) // 2
-        my_position = (mscreen_height - mwindow_height) // 2
-
-        self.geometry(f"{mwindow_width}x{mwindow_height}+{mx_position}+{my_position}")
-
-        # Appearance settings
-        ctk.set_appearance_mode("dark")
-        ctk.set_default_color_theme("blue")
-
-        # Recipe ingredients list
-        self.recipe = []
-
-        # Priority stats list
-        self.priority_stats = []
-
-        # Banned ingredients list
-        self.banned_ingredients = []
-
-        # Must-have ingredients list
-        self.must_have_ingredients = []
-
-        # Search depth (default is 1)
-        self.depth = 1
-
-        self.calculation_mode = IntVar(value=1)  # 0: Maximize Food Stat Level, 1: Maximize XP Gain, 2: Coming Soon!
-
-        # Tags and their checkboxes
-        self.tag_checkboxes = {}  # Store checkboxes for tags
-        self.selected_tags = set(unique_tags)  # All tags are selected by default
-
-        # Calculation warnings
-        self.calculation_warnings = [
-            "Depth 1: Fastest but least accurate.(Recommended)\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 1x\n2 Ingredient Recipe: 1x\n3 Ingredient Recipe: 1x\n4 Ingredient Recipe: 1x\n5 Ingredient Recipe: 1x",
-            "Depth 2: Slightly slower but more accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 10x\n2 Ingredient Recipe: 100x\n3 Ingredient Recipe: 1000x\n4 Ingredient Recipe: 10000x\n5 Ingredient Recipe: 100000x",
-            "Depth 3: Balanced speed and accuracy.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 100x\n2 Ingredient Recipe: 10000x\n3 Ingredient Recipe: 1000000x\n4 Ingredient Recipe: 100000000x\n5 Ingredient Recipe: 10000000000x",
-            "Depth 4: More accurate but slower.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 1000x\n2 Ingredient Recipe: 1000000x\n3 Ingredient Recipe: 1000000000x\n4 Ingredient Recipe: 1000000000000x\n5 Ingredient Recipe: 1000000000000000x",
-            "Depth 5: Even more accurate but slower.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 10000x\n2 Ingredient Recipe: 100000000x\n3 Ingredient Recipe: 1000000000000x\n4 Ingredient Recipe: 10000000000000000x\n5 Ingredient Recipe: 100000000000000000000x",
-            "Depth 6: Slower but highly accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 100000x\n2 Ingredient Recipe: 10000000000x\n3 Ingredient Recipe: 100000000000000x\n4 Ingredient Recipe: 1000000000000000000x\n5 Ingredient Recipe: 1000000000000000000000000x",
-            "Depth 7: Very slow but very accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 1000000x\n2 Ingredient Recipe: 1000000000000x\n3 Ingredient Recipe: 10000000000000000x\n4 Ingredient Recipe: 100000000000000000000x\n5 Ingredient Recipe: 1000000000000000000000000000x",
-            "Depth 8: Extremely slow but extremely accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 10000000x\n2 Ingredient Recipe: 100000000000000x\n3 Ingredient Recipe: 100000000000000000000x\n4 Ingredient Recipe: 1000000000000000000000000x\n5 Ingredient Recipe: 10000000000000000000000000000000x",
-            "Depth 9: Very slow but very accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 100000000x\n2 Ingredient Recipe: 10000000000000000x\n3 Ingredient Recipe: 10000000000000000000000x\n4 Ingredient Recipe: 100000000000000000000000000x\n5 Ingredient Recipe: 100000000000000000000000000000000000x",
-            "Depth 10: Slowest but most accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 1000000000x\n2 Ingredient Recipe: 100000000000000000x\n3 Ingredient Recipe: 100000000000000000000000x\n4 Ingredient Recipe: 1000000000000000000000000000x\n5 Ingredient Recipe: 1000000000000000000000000000000000000000x"
-        ]
-
-        # Get unique ingredient types
-        self.ingredient_types = set()
-        for types in data['IngreType']:
-            self.ingredient_types.update(types)
-        self.ingredient_types = sorted(self.ingredient_types)
-
-        # Main container with scrollbar
-        self.main_container = ctk.CTkFrame(self)
-        self.main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        self.canvas = tk.Canvas(self.main_container)
-        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        self.scrollbar = ctk.CTkScrollbar(self.main_container, orientation=tk.VERTICAL, command=self.canvas.yview)
-        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-        self.canvas.bind('<Configure>', lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-
-        self.inner_frame = ctk.CTkFrame(self.canvas)
-        self.canvas.create_window((0, 0), window=self.inner_frame, anchor="nw")
-
-        # Inputs
-        self.input_frame = ctk.CTkFrame(self.inner_frame)
-        self.input_frame.pack(fill=tk.BOTH, expand=True, pady=10)
-
-        # Ingredient Selection
-        self.ingredient_frame = ctk.CTkFrame(self.input_frame)
-        self.ingredient_frame.pack(fill=tk.X, pady=5)
-
-        self.ingredient_label = ctk.CTkLabel(self.ingredient_frame, text="Add Ingredients to Recipe:", font=("Arial", 20))
-        self.ingredient_label.pack(pady=5)
-
-        self.ingredient_button_frame = ctk.CTkFrame(self.ingredient_frame)
-        self.ingredient_button_frame.pack(fill=tk.X, pady=5)
-
-        # Dynamically add buttons for each ingredient type
-        self.ingredient_rows = []  # Store rows dynamically
-        row_frame = ctk.CTkFrame(self.ingredient_button_frame)
-        row_frame.pack(fill=tk.X, pady=2)
-        self.ingredient_rows.append(row_frame)
-
-        self.ingredient_buttons = {}
-        buttons_per_row = 7  # Limit per row
-        count = 0
-
-        for ingre_type in self.ingredient_types:
-            if count >= buttons_per_row:
-                row_frame = ctk.CTkFrame(self.ingredient_button_frame)
-                row_frame.pack(fill=tk.X, pady=2)
-                self.ingredient_rows.append(row_frame)
-                count = 0
-
-            color = INGREDIENT_COLORS.get(ingre_type, "#FFFFFF")  # Assign color
-            button = ctk.CTkButton(
-                row_frame,
-                text=ingre_type,
-                fg_color=color,
-                text_color="black" if color != "#FFFFFF" else "white",
-                command=lambda t=ingre_type: self.add_ingredient(t)
-            )
-            button.pack(side=tk.LEFT, padx=5, pady=5)
-
-            self.ingredient_buttons[ingre_type] = button
-            count += 1  # Increment count for row tracking
-
-        # Recipe Display
-        self.recipe_display_frame = ctk.CTkFrame(self.input_frame)
-        self.recipe_display_frame.pack(fill=tk.X, pady=5)
-
-        self.recipe_label = ctk.CTkLabel(self.recipe_display_frame, text="Current Recipe:", font=("Arial", 20))
-        self.recipe_label.pack(pady=5)
-
-        self.recipe_buttons_frame = ctk.CTkFrame(self.recipe_display_frame, width=800, height=100, fg_color="#3e4e59")
-        self.recipe_buttons_frame.pack_propagate(False)
-        self.recipe_buttons_frame.pack(fill=tk.X, pady=5)
-
-        # Tag Checkbox Bar
-        self.tag_frame = ctk.CTkFrame(self.recipe_display_frame)
-        self.tag_frame.pack(fill=tk.X, pady=5)
-
-        self.tag_label = ctk.CTkLabel(self.tag_frame, text="Allowed Tags:", font=("Arial", 20))
-        self.tag_label.pack(pady=5)
-
-        # Dynamically add checkboxes for each tag
-        self.tag_checkbox_frame = ctk.CTkFrame(self.tag_frame)
-        self.tag_checkbox_frame.pack(fill=tk.X, pady=5)
-
-        for tag in unique_tags:
-            checkbox = ctk.CTkCheckBox(
-                self.tag_checkbox_frame,
-                text=tag,
-                command=lambda t=tag: self.update_selected_tags(t)
-            )
-            checkbox.pack(side=tk.LEFT, padx=5, pady=5)
-            checkbox.select()  # Select by default
-            self.tag_checkboxes[tag] = checkbox
-
-        # Priority Stats
-        self.priority_frame = ctk.CTkFrame(self.input_frame)
-        self.priority_frame.pack(fill=tk.X, pady=5)
-
-        self.priority_button_frame = ctk.CTkFrame(self.priority_frame)
-        self.priority_button_frame.pack(fill=tk.X, pady=5)
-
-        # Dynamically add Priority Stats buttons
-        self.priority_rows = []  # Store rows dynamically
-        row_frame = ctk.CTkFrame(self.priority_button_frame)
-        row_frame.pack(fill=tk.X, pady=2)
-        self.priority_rows.append(row_frame)
-
-        self.priority_buttons = {}
-        buttons_per_row = 7  # Limit per row
-        count = 0
-
-        for stat in stat_cols:
-            if count >= buttons_per_row:
-                row_frame = ctk.CTkFrame(self.priority_button_frame)
-                row_frame.pack(fill=tk.X, pady=2)
-                self.priority_rows.append(row_frame)
-                count = 0
-
-            color = PRIORITY_STAT_COLORS.get(stat, "#ADD8E6")  # Assign color for stats
-            button = ctk.CTkButton(
-                row_frame,
-                text=stat,
-                fg_color=color,
-                text_color="black" if color != "#FFFFFF" else "white",
-                command=lambda s=stat: self.add_priority_stat(s)
-            )
-            button.pack(side=tk.LEFT, padx=5, pady=5)
-
-            self.priority_buttons[stat] = button
-            count += 1  # Increment count for row tracking
-           
-        # Priority Label
-        self.priority_label = ctk.CTkLabel(self.priority_button_frame, text="Prioritized Stats:", font=("Arial", 20))
-        self.priority_label.pack(pady=5)
-        
-        # Priority Display
-        self.priority_display_frame = ctk.CTkFrame(self.input_frame, width=800, height=100, fg_color="#3e4e59")
-        self.priority_display_frame.pack_propagate(False)
-        self.priority_display_frame.pack(fill=tk.X, pady=5)
-
-        # Stat Multipliers Button
-        self.stat_multipliers_button = ctk.CTkButton(
-            self.input_frame,
-            text="Edit Stat Weights",
-            font=("Arial", 20),
-            fg_color="#596fde",
-            width=200,
-            command=self.open_stat_multipliers_window
-        )
-        self.stat_multipliers_button.pack(pady=10)
-
-         # Initialize stat multipliers
-        self.stat_multipliers = {stat: 1.0 for stat in stat_cols}
-
-        # Number of Top Recipes Input
-        self.top_x_frame = ctk.CTkFrame(self.input_frame)
-        self.top_x_frame.pack(fill=tk.X, pady=5)
-
-        self.top_x_label = ctk.CTkLabel(self.top_x_frame, text="Number of Top Recipes to Show:", font=("Arial", 20))
-        self.top_x_label.pack(side=tk.LEFT, padx=5)
-
-        self.top_x_entry = ctk.CTkEntry(self.top_x_frame, width=50, font=("Arial", 20))
-        self.top_x_entry.insert(0, "5")  # Default value
-        self.top_x_entry.pack(side=tk.LEFT, padx=5)
-
-        # Calculate Button
-        self.calculate_button = ctk.CTkButton(self.input_frame, text="Calculate Best Recipes",width=200, height=50, font=("Arial", 20), fg_color="#ffffff", text_color="#3f7ef2", command=self.calculate_recipes)
-        self.calculate_button.pack(pady=10)
-
-        # Progress Bar and Label
-        self.progress_frame = ctk.CTkFrame(self.input_frame)
-        self.progress_frame.pack(fill=tk.X, pady=10)
-
-        self.progress_bar = ctk.CTkProgressBar(self.progress_frame, width=300)
-        self.progress_bar.pack(side=tk.TOP, padx=5)
-        self.progress_bar.set(0)  # Initialize progress bar to 0
-
-        # Label to display "checked/maximum to check"
-        self.progress_label = ctk.CTkLabel(self.progress_frame, text="0 / 0", font=("Arial", 16))
-        self.progress_label.pack(side=tk.TOP, padx=5)
-
-        # Save and Load Preset Buttons
-        self.preset_buttons_frame = ctk.CTkFrame(self.input_frame)
-        self.preset_buttons_frame.pack(fill=tk.X, pady=5)
-
-        self.save_preset_button = ctk.CTkButton(self.preset_buttons_frame, text="Save Preset", width=150, command=self.save_preset)
-        self.save_preset_button.pack(side=tk.LEFT, padx=5)
-
-        self.load_preset_button = ctk.CTkButton(self.preset_buttons_frame, text="Load Preset", width=150, command=self.load_preset)
-        self.load_preset_button.pack(side=tk.LEFT, padx=5)
-
-        # Settings Button
-        self.settings_button = ctk.CTkButton(self.preset_buttons_frame, text="Settings", width=150, command=self.open_settings)
-        self.settings_button.pack(side=tk.RIGHT, padx=5)
-
-        # Save and Load Banned Ingredients Buttons
-        self.ban_buttons_frame = ctk.CTkFrame(self.input_frame)
-        self.ban_buttons_frame.pack(fill=tk.X, pady=5)
-
-        self.save_ban_button = ctk.CTkButton(self.ban_buttons_frame, text="Save Banned List", width=150, command=self.save_banned_list)
-        self.save_ban_button.pack(side=tk.LEFT, padx=5)
-
-        self.load_ban_button = ctk.CTkButton(self.ban_buttons_frame, text="Load Banned List", width=150, command=self.load_banned_list)
-        self.load_ban_button.pack(side=tk.LEFT, padx=5)
-
-        # Credits Button
-        self.credits_button = ctk.CTkButton(self.ban_buttons_frame, text="Credits", width=150, command=self.show_credits)
-        self.credits_button.pack(side=tk.RIGHT, padx=5)
-
-        # Ban Ingredient Section
-        self.ban_frame = ctk.CTkFrame(self.input_frame)
-        self.ban_frame.pack(fill=tk.X, pady=5)
-
-        self.ban_label = ctk.CTkLabel(self.ban_frame, text="Banned Ingredients (comma-separated):", font=("Arial", 20))
-        self.ban_label.pack(pady=5)
-
-        self.ban_entry = ctk.CTkEntry(self.ban_frame, width=300)
-        self.ban_entry.pack(pady=5)
-        self.ban_entry.bind("<Return>", lambda e: self.update_banlist_from_entry())
-
-        # Banlist Display
-        self.banlist_display_frame = ctk.CTkFrame(self.input_frame, width=800, height=130, fg_color="#3e4e59")
-        self.banlist_display_frame.pack_propagate(False)
-        self.banlist_display_frame.pack(fill=tk.X, pady=5)
-
-        # Scrollable frame for banned ingredients
-        self.banlist_scroll_frame = ctk.CTkScrollableFrame(self.banlist_display_frame, width=800, height=130, fg_color="#3e4e59")
-        self.banlist_scroll_frame.pack(fill=tk.BOTH, expand=True)
-
-        # Must-Have Ingredient Section
-        self.must_have_frame = ctk.CTkFrame(self.input_frame)
-        self.must_have_frame.pack(fill=tk.X, pady=5)
-
-        self.must_have_label = ctk.CTkLabel(self.must_have_frame, text="Must-Have Ingredients (comma-separated):", font=("Arial", 20))
-        self.must_have_label.pack(pady=5)
-
-        self.must_have_entry = ctk.CTkEntry(self.must_have_frame, width=300)
-        self.must_have_entry.pack(pady=5)
-        self.must_have_entry.bind("<Return>", lambda e: self.update_must_have_from_entry())
-
-        # Must-Have Display
-        self.must_have_display_frame = ctk.CTkFrame(self.input_frame, width=800, height=100, fg_color="#3e4e59")
-        self.must_have_display_frame.pack_propagate(False)
-        self.must_have_display_frame.pack(fill=tk.X, pady=5)
-
-        # Bind mouse wheel to scroll for all widgets in the inner frame
-        self._bind_mousewheel_scroll(self.inner_frame)
-
-    # Function to update the stat multiplier
-    def update_stat_multiplier(self, stat, value):
-        """Update the stat multiplier value."""
-        self.stat_multipliers[stat] = value
-        self.value_labels[stat].configure(text=f"{value:.2f}")
-    
-    def update_selected_tags(self, tag):
-        """Update the selected tags based on checkbox state."""
-        if self.tag_checkboxes[tag].get() == 1:
-            self.selected_tags.add(tag)
-        else:
-            self.selected_tags.discard(tag)
-
-        #print(self.selected_tags)
-
-    def show_credits(self):
-        """Open a new window to display credits."""
-        credits_window = ctk.CTkToplevel(self)
-        credits_window.title("Credits")
-        credits_window.geometry("300x100")
-
-        # Center the window on the screen
-        credits_window.update_idletasks()
-        screen_width = credits_window.winfo_screenwidth()
-        screen_height = credits_window.winfo_screenheight()
-        window_width = 300
-        window_height = 100
-
-        x_position = (screen_width // 2) - (window_width // 2)
-        y_position = (screen_height // 2) - (window_height // 2)
-
-        credits_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
-        self.after(100, lambda: credits_window.focus_force()) # Bring the window to the front
-
-        # Add credits text
-        credits_label = ctk.CTkLabel(credits_window, text="@On4ll\n@mRain", font=("Arial", 20))
-        credits_label.pack(pady=20)
-
-    def _bind_mousewheel_scroll(self, widget):
-        """Recursively bind mouse wheel to all widgets for scrolling."""
-        widget.bind("<MouseWheel>", self._on_mousewheel)
-        for child in widget.winfo_children():
-            self._bind_mousewheel_scroll(child)
-
-    def _on_mousewheel(self, event):
-        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
-    def add_ingredient(self, ingredient):
-        if len(self.recipe) >= 5:
-            messagebox.showwarning("Warning", "Maximum 5 ingredients can be added to the recipe.")
-            return
-        self.recipe.append(ingredient)
-        self.update_recipe_display()
-
-    def update_recipe_display(self):
-        # Clear the recipe buttons frame
-        for widget in self.recipe_buttons_frame.winfo_children():
-            widget.destroy()
-
-        # Create new row containers dynamically
-        row_frame = ctk.CTkFrame(self.recipe_buttons_frame)
-        row_frame.pack(fill=tk.X, pady=2)
-        count = 0
-
-        for i, item in enumerate(self.recipe):
-            if count >= 7:
-                row_frame = ctk.CTkFrame(self.recipe_buttons_frame)
-                row_frame.pack(fill=tk.X, pady=2)
-                count = 0
-
-            color = INGREDIENT_COLORS.get(item, "#FFFFFF")  # Use assigned color
-
-            frame = ctk.CTkFrame(row_frame, corner_radius=10, fg_color=color)
-            frame.pack(side=tk.LEFT, padx=5, pady=5)
-
-            label = ctk.CTkLabel(frame, text=item, text_color="black")
-            label.pack(side=tk.LEFT, padx=5)
-
-            cross_button = ctk.CTkButton(
-                frame,
-                text="×",
-                width=20,
-                height=20,
-                fg_color="transparent",
-                text_color="black",
-                hover_color="#FF0000",
-                command=lambda i=item: self.remove_ingredient(i)
-            )
-            cross_button.pack(side=tk.RIGHT, padx=5)
-
-            count += 1  # Track number of items in row
-
-        # Bind mouse wheel to scroll
-        row_frame.bind("<MouseWheel>", self._on_mousewheel)
-
-    def remove_ingredient(self, ingredient):
-        if ingredient in self.recipe:
-            self.recipe.remove(ingredient)
-            self.update_recipe_display()
-
-    def add_priority_stat(self, stat):
-        if stat not in self.priority_stats:
-            self.priority_stats.append(stat)
-            self.update_priority_display()
-
-    def update_priority_display(self):
-        # Clear the priority display frame
-        for widget in self.priority_display_frame.winfo_children():
-            widget.destroy()
-
-        # Add each priority stat as a rounded button with a cross
-        row_frame = ctk.CTkFrame(self.priority_display_frame)
-        row_frame.pack(fill=tk.X, pady=2)
-        count = 0
-
-        for i, stat in enumerate(self.priority_stats):
-            if count >= 7:
-                row_frame = ctk.CTkFrame(self.priority_display_frame)
-                row_frame.pack(fill=tk.X, pady=2)
-                count = 0
-
-            color = PRIORITY_STAT_COLORS.get(stat, "#ADD8E6")  # Use assigned color
-            frame = ctk.CTkFrame(row_frame, corner_radius=10, fg_color=color)
-            frame.pack(side=tk.LEFT, padx=5, pady=5)
-
-            label = ctk.CTkLabel(frame, text=stat, text_color="black")
-            label.pack(side=tk.LEFT, padx=5)
-
-            cross_button = ctk.CTkButton(
-                frame,
-                text="×",
-                width=20,
-                height=20,
-                fg_color="transparent",
-                text_color="black",
-                hover_color="#FF0000",
-                command=lambda s=stat: self.remove_priority_stat(s)
-            )
-            cross_button.pack(side=tk.RIGHT, padx=5)
-
-            count += 1  # Track number of items in row
-
-        # Bind mouse wheel to scroll
-        row_frame.bind("<MouseWheel>", self._on_mousewheel)
-
-    def remove_priority_stat(self, stat):
-        if stat in self.priority_stats:
-            self.priority_stats.remove(stat)
-            self.update_priority_display()
-
-    # Modify the calculate_recipes method to pass the calculation mode to beam_search
-    def calculate_recipes(self):
-        if not self.recipe:
-            messagebox.showwarning("Warning", "Please add at least one ingredient to the recipe.")
-            return
-
-        if not self.priority_stats:
-            messagebox.showwarning("Warning", "Please add at least one priority stat.")
-            return
-
-        try:
-            top_x = int(self.top_x_entry.get())
-        except ValueError:
-            messagebox.showwarning("Warning", "Please enter a valid number for top recipes.")
-            return
-
-        # Get banned ingredients
-        banned_ingredients = [ingredient.strip().lower() for ingredient in self.ban_entry.get().split(",") if ingredient.strip()]
-        banned_ingredients = list(set(banned_ingredients))
-        self.banned_ingredients = banned_ingredients
-
-        # Get must-have ingredients
-        must_have_ingredients = [ingredient.strip().lower() for ingredient in self.must_have_entry.get().split(",") if ingredient.strip()]
-        self.must_have_ingredients = must_have_ingredients
-
-        # Filter ingredients based on selected tags
-        tag_allowed_foods = []
-        for food in foods_list:
-            if not isinstance(food['Tag'], list):  # Add if tags are missing because it's a normal ingredient
-                tag_allowed_foods.append(food)
-                continue
-            # Check if the food has any of the deselected tags
-            if any(tag not in self.selected_tags for tag in food['Tag']):
-                continue  # Skip this food if it has any deselected tag
-            tag_allowed_foods.append(food)
-
-        # Reset progress bar and label
-        self.progress_bar.set(0)
-        self.progress_label.configure(text="0 / 0")
-        self.update()
-
-        # Calculate the total number of combinations to check
-        total_combinations = 1
-        for ingre_type in self.recipe:
-            valid_foods_for_type = [food for food in tag_allowed_foods if ingre_type in food['IngreType'] and not any(ban.lower() in food['Foods'].lower() for ban in banned_ingredients)]
-            total_combinations *= len(valid_foods_for_type)
-
-        # Adjust total combinations based on depth
-        total_combinations *= (10 ** (self.depth - 1)) ** len(self.recipe)
-
-        # Perform beam search with progress updates
-        def update_progress(progress, checked_combinations):
-            self.progress_bar.set(progress)
-            self.progress_label.configure(text=f"{checked_combinations} / {total_combinations}")
-            self.update()
-
-        # Get the stat multipliers from the dictionary
-        stat_multipliers = {stat: self.stat_multipliers[stat] for stat in stat_cols}
-
-        best_combinations = beam_search(
-            self.recipe,
-            self.priority_stats,
-            tag_allowed_foods, 
-            banned_ingredients,
-            must_have_ingredients,
-            top_x=top_x,
-            progress_callback=lambda progress, checked: update_progress(progress, checked),
-            depth=self.depth,
-            calculation_mode=self.calculation_mode.get(),
-            stat_multipliers=stat_multipliers
-        )
-
-        # Update progress bar to 100%
-        self.progress_bar.set(1)
-        self.progress_label.configure(text=f"{total_combinations} / {total_combinations}")
-        self.update()
-
-        # Open new window to show results
-        result_window = ctk.CTkToplevel(self)
-        result_window.title("Best Recipes Results")
-        result_window.geometry("800x600")
-
-        # Center the window on the screen
-        result_window.update_idletasks()
-        screen_width = result_window.winfo_screenwidth()
-        screen_height = result_window.winfo_screenheight()
-        window_width = 950
-        window_height = 600
-
-        x_position = (screen_width // 2) - (window_width // 2)
-        y_position = (screen_height // 2) - (window_height // 2)
-
-        result_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
-        self.after(100, lambda: result_window.focus_force())
-
-        # Create a scrollable frame for results
-        result_scroll_frame = ctk.CTkScrollableFrame(result_window)
-        result_scroll_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        if best_combinations:
-            for i, combo in enumerate(best_combinations, 1):
-                # Recipe combination
-                combo_frame = ctk.CTkFrame(result_scroll_frame, corner_radius=10)
-                combo_frame.pack(fill=tk.X, pady=5, padx=5)
-
-                # Display ingredients as small rounded buttons
-                ingredients_frame = ctk.CTkFrame(combo_frame)
-                ingredients_frame.pack(fill=tk.X, pady=5)
-
-                row_frame = ctk.CTkFrame(ingredients_frame)
-                row_frame.pack(fill=tk.X, pady=2)
-                count = 0
-
-                for ingredient in combo['Combination'].split(', '):
-                    if count >= 4:
-                        row_frame = ctk.CTkFrame(ingredients_frame)
-                        row_frame.pack(fill=tk.X, pady=2)
-                        count = 0
-
-                    ingredient_frame = ctk.CTkFrame(row_frame, corner_radius=10, fg_color="#FFFDD0")
-                    ingredient_frame.pack(side=tk.LEFT, padx=5, pady=5)
-
-                    include_button = ctk.CTkButton(
-                        ingredient_frame,
-                        text="Include",
-                        width=20,
-                        height=20,
-                        fg_color="#90EE90",
-                        text_color="black",
-                        hover_color="#32CD32",
-                        command=lambda ing=ingredient: self.add_must_have_ingredient(ing)
-                    )
-                    include_button.pack(side=tk.LEFT, padx=5)
-
-                    ingredient_label = ctk.CTkLabel(ingredient_frame, text=ingredient, text_color="black")
-                    ingredient_label.pack(side=tk.LEFT, padx=5)
-
-                    ban_button = ctk.CTkButton(
-                        ingredient_frame,
-                        text="Ban",
-                        width=20,
-                        height=20,
-                        fg_color="#f2aab4",
-                        text_color="black",
-                        hover_color="#FF0000",
-                        command=lambda ing=ingredient: self.ban_ingredient(ing)
-                    )
-                    ban_button.pack(side=tk.RIGHT, padx=5)
-
-                    count += 1  # Track number of items in row
-
-                # Calculate total prioritized stat XP, non-prioritized stat XP, and total XP
-                if self.calculation_mode.get() < 2:
-                    prioritized_xp = 0
-                    non_prioritized_xp = 0
-                    total_potency = 0
-
-                    for stat in combo:
-                        if stat == "Combination":
-                            continue
-                        elif "_pot" in stat:
-                            total_potency += combo[stat]
-                            continue
-                        elif stat in self.priority_stats:
-                            prioritized_xp += combo[stat] * combo.get(f"{stat}_pot", 1)
-                        else:
-                            temp_pot = combo.get(f"{stat}_pot", 1)
-                            non_prioritized_xp += combo[stat] * (1 if temp_pot == 0 else temp_pot)
-
-                    total_xp = prioritized_xp + non_prioritized_xp
-
-                    # Display XP information
-                    xp_text = f"Prioritized XP: {prioritized_xp}\nNon-Prioritized XP: {non_prioritized_xp}\nTotal XP: {total_xp}\nTotal Potency: {total_potency}"
-                    xp_label = ctk.CTkLabel(
-                        combo_frame, 
-                        text=xp_text, 
-                        font=("Arial", 12), 
-                        anchor="w", 
-                        justify="left"
-                    )
-                    xp_label.pack(fill=tk.X, padx=10, pady=5, anchor="w")
-
-                # Display non-zero stats in text format (left-aligned)
-                stats_text = ""
-                for stat in sorted(combo.keys(), key=lambda x: combo[x] if x != "Combination" else 0, reverse=True):
-                    if stat != "Combination" and combo[stat] != 0:  # Only show non-zero stats
-                        stats_text += f"{stat}: {int(combo[stat])}"
-                        # If the stat has a corresponding "_pot" stat, calculate and display the product
-                        if f"{stat}_pot" in combo and combo[f"{stat}_pot"] != 0:
-                            stats_text += f" ({stat} * {stat}_pot = {int(combo[stat] * combo[f'{stat}_pot'])})"
-                        stats_text += "\n"
-
-                stats_label = ctk.CTkLabel(
-                    combo_frame, 
-                    text=stats_text.strip(), 
-                    font=("Arial", 12), 
-                    anchor="w", 
-                    justify="left"
-                )
-                stats_label.pack(fill=tk.X, padx=10, pady=5, anchor="w")
-        else:
-            no_results_label = ctk.CTkLabel(result_scroll_frame, text="No valid recipes found.", font=("Arial", 20))
-            no_results_label.pack(pady=10)
-
-    def ban_ingredient(self, ingredient):
-        current_banned = self.ban_entry.get()
-        if current_banned:
-            new_banned = f"{current_banned}, {ingredient}"
-        else:
-            new_banned = ingredient
-        self.ban_entry.delete(0, tk.END)
-        self.ban_entry.insert(0, new_banned)
-        self.banned_ingredients = list(set([ing.lower() for ing in self.banned_ingredients + [ingredient.lower()]]))  # Prevent duplicates
-        self.update_banlist_display()
-
-    def add_must_have_ingredient(self, ingredient):
-        current_must_have = self.must_have_entry.get()
-        if current_must_have:
-            new_must_have = f"{current_must_have}, {ingredient}"
-        else:
-            new_must_have = ingredient
-        self.must_have_entry.delete(0, tk.END)
-        self.must_have_entry.insert(0, new_must_have)
-        self.must_have_ingredients.append(ingredient.lower())
-        self.update_must_have_display()
-
-    def update_banlist_from_entry(self):
-        banned_ingredients = [ingredient.strip().lower() for ingredient in self.ban_entry.get().split(",") if ingredient.strip()]
-        banned_ingredients = list(set(banned_ingredients))  # Remove duplicates
-        self.banned_ingredients = banned_ingredients
-        self.update_banlist_display()
-
-    def update_must_have_from_entry(self):
-        must_have_ingredients = [ingredient.strip().lower() for ingredient in self.must_have_entry.get().split(",") if ingredient.strip()]
-        self.must_have_ingredients = must_have_ingredients
-        self.update_must_have_display()
-
-    def update_banlist_display(self):
-        # Clear the banlist display frame
-        for widget in self.banlist_scroll_frame.winfo_children():
-            widget.destroy()
-
-        # Add each banned ingredient as a rounded button with a cross
-        row_frame = ctk.CTkFrame(self.banlist_scroll_frame)
-        row_frame.pack(fill=tk.X, pady=2)
-        count = 0
-
-        for i, ingredient in enumerate(self.banned_ingredients):
-            if count >= 7:
-                row_frame = ctk.CTkFrame(self.banlist_scroll_frame)
-                row_frame.pack(fill=tk.X, pady=2)
-                count = 0
-
-            frame = ctk.CTkFrame(row_frame, corner_radius=10, fg_color="#FFCCCB")
-            frame.pack(side=tk.LEFT, padx=5, pady=5)
-
-            label = ctk.CTkLabel(frame, text=ingredient, text_color="black")
-            label.pack(side=tk.LEFT, padx=5)
-
-            cross_button = ctk.CTkButton(
-                frame,
-                text="×",
-                width=20,
-                height=20,
-                fg_color="transparent",
-                text_color="black",
-                hover_color="#FF0000",
-                command=lambda ing=ingredient: self.remove_banned_ingredient(ing)
-            )
-            cross_button.pack(side=tk.RIGHT, padx=5)
-
-            count += 1  # Track number of items in row
-
-    def remove_banned_ingredient(self, ingredient):
-        if ingredient.lower() in self.banned_ingredients:
-            self.banned_ingredients.remove(ingredient.lower())
-            self.ban_entry.delete(0, tk.END)
-            self.ban_entry.insert(0, ", ".join(self.banned_ingredients))
-            self.update_banlist_display()
-
-    def update_must_have_display(self):
-        # Clear the must-have display frame
-        for widget in self.must_have_display_frame.winfo_children():
-            widget.destroy()
-
-        # Add each must-have ingredient as a rounded button with a cross
-        row_frame = ctk.CTkFrame(self.must_have_display_frame)
-        row_frame.pack(fill=tk.X, pady=2)
-        count = 0
-
-        for i, ingredient in enumerate(self.must_have_ingredients):
-            if count >= 7:
-                row_frame = ctk.CTkFrame(self.must_have_display_frame)
-                row_frame.pack(fill=tk.X, pady=2)
-                count = 0
-
-            frame = ctk.CTkFrame(row_frame, corner_radius=10, fg_color="#90EE90")
-            frame.pack(side=tk.LEFT, padx=5, pady=5)
-
-            label = ctk.CTkLabel(frame, text=ingredient, text_color="black")
-            label.pack(side=tk.LEFT, padx=5)
-
-            cross_button = ctk.CTkButton(
-                frame,
-                text="×",
-                width=20,
-                height=20,
-                fg_color="transparent",
-                text_color="black",
-                hover_color="#FF0000",
-                command=lambda ing=ingredient: self.remove_must_have_ingredient(ing)
-            )
-            cross_button.pack(side=tk.RIGHT, padx=5)
-
-            count += 1  # Track number of items in row
-
-        # Bind mouse wheel to scroll
-        row_frame.bind("<MouseWheel>", self._on_mousewheel)
-
-    def remove_must_have_ingredient(self, ingredient):
-        if ingredient.lower() in self.must_have_ingredients:
-            self.must_have_ingredients.remove(ingredient.lower())
-            self.must_have_entry.delete(0, tk.END)
-            self.must_have_entry.insert(0, ", ".join(self.must_have_ingredients))
-            self.update_must_have_display()
-
-    def save_banned_list(self):
-        """Save the banned ingredient list to a file."""
-        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text Files", "*.txt")])
-        if file_path:
-            with open(file_path, "w") as file:
-                file.write(", ".join(self.banned_ingredients))
-            messagebox.showinfo("Success", "Banned ingredient list saved successfully!")
-
-    def load_banned_list(self):
-        """Load the banned ingredient list from a file."""
-        file_path = filedialog.askopenfilename(filetypes=[("Text Files", "*.txt")])
-        if file_path:
-            with open(file_path, "r") as file:
-                banned_ingredients = file.read().strip().split(", ")
-                self.banned_ingredients = list(set([ing.lower() for ing in banned_ingredients if ing.strip()]))
-                self.ban_entry.delete(0, tk.END)
-                self.ban_entry.insert(0, ", ".join(self.banned_ingredients))
-                self.update_banlist_display()
-            messagebox.showinfo("Success", "Banned ingredient list loaded successfully!")
-
-    def save_preset(self):
-        """Save the current preset (recipe, priority stats, banned ingredients, must-have ingredients, and top_x) to a file."""
-        preset = {
-            "recipe": self.recipe,
-            "priority_stats": self.priority_stats,
-            "banned_ingredients": self.banned_ingredients,
-            "must_have_ingredients": self.must_have_ingredients,
-            "top_x": self.top_x_entry.get()
-        }
-        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
-        if file_path:
-            with open(file_path, "w") as file:
-                json.dump(preset, file)
-            messagebox.showinfo("Success", "Preset saved successfully!")
-
-    def load_preset(self):
-        """Load a preset from a file and update the UI."""
-        file_path = filedialog.askopenfilename(filetypes=[("JSON Files", "*.json")])
-        if file_path:
-            with open(file_path, "r") as file:
-                preset = json.load(file)
-                self.recipe = preset.get("recipe", [])
-                self.priority_stats = preset.get("priority_stats", [])
-                self.banned_ingredients = preset.get("banned_ingredients", [])
-                self.must_have_ingredients = preset.get("must_have_ingredients", [])
-                self.top_x_entry.delete(0, tk.END)
-                self.top_x_entry.insert(0, preset.get("top_x", "5"))
-
-                # Update the ban entry
-                self.ban_entry.delete(0, tk.END)
-                self.ban_entry.insert(0, ", ".join(self.banned_ingredients))
-
-                # Update the must-have entry
-                self.must_have_entry.delete(0, tk.END)
-                self.must_have_entry.insert(0, ", ".join(self.must_have_ingredients))
-
-                # Update UI
-                self.update_recipe_display()
-                self.update_priority_display()
-                self.update_banlist_display()
-                self.update_must_have_display()
-            messagebox.showinfo("Success", "Preset loaded successfully!")
-
-    def open_settings(self):
-        """Open the settings window."""
-        settings_window = ctk.CTkToplevel(self)
-        settings_window.title("Settings")
-        settings_window.geometry("400x400")
-
-        # Center the window on the screen
-        settings_window.update_idletasks()  # Ensure the window dimensions are updated
-        screen_width = settings_window.winfo_screenwidth()
-        screen_height = settings_window.winfo_screenheight()
-        window_width = 400
-        window_height = 400
-
-        x_position = (screen_width // 2) - (window_width // 2)
-        y_position = (screen_height // 2) - (window_height // 2)
-
-        settings_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
-        self.after(100, lambda: settings_window.focus_force()) # Bring the window to the front
-
-        # Search Depth Label
-        depth_label = ctk.CTkLabel(settings_window, text="Search Depth:", font=("Arial", 16))
-        depth_label.pack(pady=10)
-
-        # Slider for search depth
-        self.depth_slider = ctk.CTkSlider(settings_window, from_=1, to=10, number_of_steps=9, command=self.update_depth)
-        self.depth_slider.set(self.depth)
-        self.depth_slider.pack(pady=10)
-
-        # Warning message box
-        self.warning_message = ctk.CTkLabel(settings_window, text=self.calculation_warnings[int(self.depth) - 1], font=("Arial", 12), wraplength=350)
-        self.warning_message.pack(pady=10)
-
-        # Calculation Mode Label
-        mode_label = ctk.CTkLabel(settings_window, text="Calculation Mode:", font=("Arial", 16))
-        mode_label.pack(pady=10)
-
-        # Slider for calculation mode
-        self.mode_slider = ctk.CTkSlider(settings_window, from_=0, to=2, number_of_steps=2, command=self.update_mode)
-        self.mode_slider.set(self.calculation_mode.get())
-        self.mode_slider.pack(pady=10)
-
-        # Mode description label
-        self.mode_description = ctk.CTkLabel(settings_window, text=self.get_mode_description(self.calculation_mode.get()), font=("Arial", 12), wraplength=350)
-        self.mode_description.pack(pady=10)
-
-    def update_mode(self, value):
-        """Update the calculation mode based on the slider value."""
-        self.calculation_mode.set(int(float(value)))
-        self.mode_description.configure(text=self.get_mode_description(self.calculation_mode.get()))
-
-    def get_mode_description(self, mode):
-        """Get the description for the selected calculation mode."""
-        if mode == 0:
-            return "Maximize Food Stat Level: The program will work as it is."
-        elif mode == 1:
-            return "Maximize XP Gain: The program will try to find the highest value with the condition (stat * stat_pot) for priority stats."
-        elif mode == 2:
-            return "Coming Soon!"
-        return ""
-
-    def update_depth(self, value):
-        """Update the search depth based on the slider value."""
-        self.depth = int(float(value))
-        self.warning_message.configure(text=self.calculation_warnings[self.depth - 1])
-    
-    def open_stat_multipliers_window(self):
-        """Open a new window to configure stat multipliers."""
-        self.stat_window = ctk.CTkToplevel(self)  # Store the window as an instance variable
-        self.stat_window.title("Stat Multipliers")
-        self.stat_window.geometry("600x300")
-
-        # Center the window on the screen
-        self.stat_window.update_idletasks()
-        screen_width = self.stat_window.winfo_screenwidth()
-        screen_height = self.stat_window.winfo_screenheight()
-        window_width = 900
-        window_height = 400
-
-        x_position = (screen_width // 2) - (window_width // 2)
-        y_position = (screen_height // 2) - (window_height // 2)
-
-        self.stat_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
-        self.after(100, lambda: self.stat_window.focus_force())  # Bring the window to the front
-
-        # Stat Multipliers Frame
-        self.stat_multipliers_frame = ctk.CTkFrame(self.stat_window)
-        self.stat_multipliers_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        self.stat_multipliers_label = ctk.CTkLabel(self.stat_multipliers_frame, text="Stat Multipliers:", font=("Arial", 20))
-        self.stat_multipliers_label.pack(pady=5)
-
-        # Create a frame to hold the sliders
-        self.sliders_frame = ctk.CTkFrame(self.stat_multipliers_frame)
-        self.sliders_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Initialize a dictionary to store the slider values
-        self.value_labels = {}  # Store value labels
-        self.sliders = {}  # Store sliders
-
-        # Add sliders for each stat
-        for i, stat in enumerate(stat_cols):
-            slider_frame = ctk.CTkFrame(self.sliders_frame)
-            slider_frame.pack(side=tk.LEFT, padx=10, pady=5)
-
-            slider_label = ctk.CTkLabel(slider_frame, text=stat, font=("Arial", 12))
-            slider_label.pack(pady=5)
-
-            slider = ctk.CTkSlider(
-                slider_frame,
-                from_=0.01,
-                to=5,
-                number_of_steps=200,  # 0.01 increments
-                orientation="vertical",
-                height=200,  # Set uniform height
-                width=20,  # Set uniform width,
-                command=lambda value, s=stat: self.update_stat_multiplier(s, float(value))
-            )
-            slider.set(self.stat_multipliers[stat])  # Set to current value
-            slider.pack(pady=5)
-
-            # Value Label (Shows current slider value)
-            value_label = ctk.CTkLabel(slider_frame, text=f"{self.stat_multipliers[stat]:.2f}", font=("Arial", 12))
-            value_label.pack()
-
-            # Store the slider and label in dictionaries for easy access
-            self.value_labels[stat] = value_label
-            self.sliders[stat] = slider
-
-        # Add a "Reset" button
-        reset_button = ctk.CTkButton(
-            self.stat_multipliers_frame,
-            text="Reset",
-            font=("Arial", 16),
-            command=self.reset_stat_multipliers
-        )
-        reset_button.pack(pady=10)
-
-    def reset_stat_multipliers(self):
-        """Reset all stat multipliers to 1.0 and update slider positions."""
-        for stat in stat_cols:
-            self.stat_multipliers[stat] = 1.0
-            self.value_labels[stat].configure(text="1.00")
-            self.sliders[stat].set(1.0)  # Reset the slider position to 1.0
-
-# Run the application
-if __name__ == "__main__":
-    app = RecipeApp()
-    app.mainloop()
\ No newline at end of file
+"""Tkinter user interface.
+
+Only imported when the GUI starts, so the engine can be used without tkinter
+or customtkinter installed.
+"""
+import tkinter as tk
+from tkinter import messagebox, filedialog
+import customtkinter as ctk  # Modern UI library
+from tkinter import IntVar
+import json
+import logging
+import os
+import queue
+
+from .archive import get_archive
+from .auto_depth import auto_depth_search
+from .chain import load_chains, recipe_cooked_foods
+from .inventory import load_inventory, resolve_inventory
+from .checkpoint import SearchCheckpoint, checkpoint_query
+from .atlas import build_atlas_in_background, get_atlas
+from .cache import ResultCache, query_key
+from .data import FoodDatabaseWatcher, get_database, output_path
+from .engine import default_beam_width, diversity_cap
+from .meet_in_middle import MIN_SLOTS as MEET_IN_THE_MIDDLE_MIN_SLOTS
+from .recipe_engine import get_engine
+from .spill import DEFAULT_MAX_MEMORY
+from .refine import BEAM_SEEDS, refine_results
+
+# Define colors for ingredient types
+INGREDIENT_COLORS = {
+    "Meat": "#cc314b",
+    "Cheese": "#f5ea22",
+    "Vegetable": "#2bf032",
+    "Fruit": "#66cc69",
+    "Tempura Flour": "#bddbd8",
+    "Cake Dough": "#c0f0e1",
+    "Gelatine": "#7e918b",
+    "Fish": "#68b1e8",
+    "Bag of Rice": "#e1eef7",
+    "Bread Dough": "#a65656",
+    "Dough": "#947b7b",
+    "Egg": "#ebdfdf",
+    "Flour": "#e7ebdf",
+    "Nut": "#d4ed91",
+    "Pot of Noodle": "#dbe090",
+    "Sauce": "#e82074",
+    "Seasoning": "#5de892",
+    # Add more ingredient types and colors as needed
+}
+
+# Define colors for priority stats
+PRIORITY_STAT_COLORS = {
+    "str": "#b33b49",
+    "end": "#f2541f",
+    "dex": "#59de90",
+    "per": "#59ded3",
+    "ler": "#596fde",
+    "wil": "#8359de",
+    "mag": "#ba59de",
+    "cha": "#f21ff2",
+    "str_pot": "#b33b49",
+    "end_pot": "#f2541f",
+    "dex_pot": "#59de90",
+    "per_pot": "#59ded3",
+    "ler_pot": "#596fde",
+    "wil_pot": "#8359de",
+    "mag_pot": "#ba59de",
+    "cha_pot": "#f21ff2",
+    # Add more stats and colors as needed
+}
+
+class ChipList:
+    """Keyed display of removable chips laid out in rows.
+
+    ``sync`` only creates chips for new items and destroys chips for removed
+    ones. Grid positions are updated by a single reflow per event-loop tick,
+    however many changes happened in between.
+    """
+
+    def __init__(self, container, make_chip, per_row=7):
+        self.container = container
+        self.make_chip = make_chip  # Called as make_chip(parent, item)
+        self.per_row = per_row
+        self.chips = {}  # key -> chip widget
+        self.positions = {}  # key -> (row, column) the chip is gridded at
+        self.order = []
+        self._reflow_pending = False
+
+    @staticmethod
+    def keys_for(items):
+        """Key each item by its value and occurrence so duplicates get their own chip."""
+        seen = {}
+        keys = []
+        for item in items:
+            occurrence = seen.get(item, 0)
+            seen[item] = occurrence + 1
+            keys.append((item, occurrence))
+        return keys
+
+    def sync(self, items):
+        """Update the chips to show ``items``."""
+        self.order = self.keys_for(items)
+        wanted = set(self.order)
+
+        for key in [key for key in self.chips if key not in wanted]:
+            self.chips.pop(key).destroy()
+            self.positions.pop(key, None)
+
+        for key in self.order:
+            if key not in self.chips:
+                self.chips[key] = self.make_chip(self.container, key[0])
+
+        if not self._reflow_pending:
+            self._reflow_pending = True
+            self.container.after_idle(self._reflow)
+
+    def _reflow(self):
+        """Move the chips whose position changed."""
+        self._reflow_pending = False
+        for index, key in enumerate(self.order):
+            chip = self.chips.get(key)
+            if chip is None:
+                continue
+            position = divmod(index, self.per_row)
+            if self.positions.get(key) != position:
+                chip.grid(row=position[0], column=position[1], padx=5, pady=5, sticky="w")
+                self.positions[key] = position
+
+# Modern Tkinter UI
+class RecipeApp(ctk.CTk):
+    def __init__(self):
+        super().__init__()
+
+        self.title("Little Recipe")  # Updated window title
+        self.resizable(False, True)
+
+        # Center the window on the screen
+        self.update_idletasks()
+        mscreen_width = self.winfo_screenwidth()
+        mscreen_height = self.winfo_screenheight()
+        mwindow_width = 1085
+        mwindow_height = 600
+
+        mx_position = (mscreen_width - mwindow_width) // 2
+        my_position = (mscreen_height - mwindow_height) // 2
+
+        self.geometry(f"{mwindow_width}x{mwindow_height}+{mx_position}+{my_position}")
+
+        # Food database (loaded on first use)
+        self.db = get_database()
+        self.engine = get_engine()
+
+        # Appearance settings
+        ctk.set_appearance_mode("dark")
+        ctk.set_default_color_theme("blue")
+
+        # Recipe ingredients list
+        self.recipe = []
+
+        # Priority stats list
+        self.priority_stats = []
+
+        # Banned ingredients list
+        self.banned_ingredients = []
+
+        # Must-have ingredients list
+        self.must_have_ingredients = []
+
+        # Search depth (default is 1)
+        self.depth = 1
+
+        self.calculation_mode = IntVar(value=1)  # 0: Maximize Food Stat Level, 1: Maximize XP Gain, 2: Coming Soon!
+
+        # Search long recipes by joining the best halves instead of with the beam
+        self.meet_in_the_middle = tk.BooleanVar(value=True)
+
+        # Improve the results with a short local search after the search
+        self.refine = tk.BooleanVar(value=False)
+        self.refine_seconds = 1.0
+
+        # Return recipes that differ by at least diversity_distance ingredients
+        self.diverse = tk.BooleanVar(value=False)
+        self.diversity_distance = 2
+
+        # Slots whose expansion needs more memory than this are expanded through temporary files
+        self.max_memory = DEFAULT_MAX_MEMORY
+
+        # Save the progress of beam searches, so Resume can continue them after a crash
+        self.checkpoints = tk.BooleanVar(value=False)
+
+        # Also fill intermediate slots with the best results of their sub-recipes (Foods_Chains.json)
+        self.chain_mode = tk.BooleanVar(value=False)
+
+        # Only search the owned foods of Foods_Inventory.json, each at most as many times as owned
+        self.inventory_mode = tk.BooleanVar(value=False)
+
+        # Answer single priority stat queries with the exact solver instead of the beam
+        self.exact_single_stat = tk.BooleanVar(value=False)
+
+        # Deepen the search up to the slider depth until the results stop changing
+        self.auto_depth = tk.BooleanVar(value=False)
+        self.auto_depth_seconds = 60.0
+
+        # Tags and their checkboxes
+        self.tag_checkboxes = {}  # Store checkboxes for tags
+        self.selected_tags = set(self.db.unique_tags)  # All tags are selected by default
+
+        # Calculation warnings
+        self.calculation_warnings = [
+            "Depth 1: Fastest but least accurate.(Recommended)\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 1x\n2 Ingredient Recipe: 1x\n3 Ingredient Recipe: 1x\n4 Ingredient Recipe: 1x\n5 Ingredient Recipe: 1x",
+            "Depth 2: Slightly slower but more accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 10x\n2 Ingredient Recipe: 100x\n3 Ingredient Recipe: 1000x\n4 Ingredient Recipe: 10000x\n5 Ingredient Recipe: 100000x",
+            "Depth 3: Balanced speed and accuracy.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 100x\n2 Ingredient Recipe: 10000x\n3 Ingredient Recipe: 1000000x\n4 Ingredient Recipe: 100000000x\n5 Ingredient Recipe: 10000000000x",
+            "Depth 4: More accurate but slower.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 1000x\n2 Ingredient Recipe: 1000000x\n3 Ingredient Recipe: 1000000000x\n4 Ingredient Recipe: 1000000000000x\n5 Ingredient Recipe: 1000000000000000x",
+            "Depth 5: Even more accurate but slower.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 10000x\n2 Ingredient Recipe: 100000000x\n3 Ingredient Recipe: 1000000000000x\n4 Ingredient Recipe: 10000000000000000x\n5 Ingredient Recipe: 100000000000000000000x",
+            "Depth 6: Slower but highly accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 100000x\n2 Ingredient Recipe: 10000000000x\n3 Ingredient Recipe: 100000000000000x\n4 Ingredient Recipe: 1000000000000000000x\n5 Ingredient Recipe: 1000000000000000000000000x",
+            "Depth 7: Very slow but very accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 1000000x\n2 Ingredient Recipe: 1000000000000x\n3 Ingredient Recipe: 10000000000000000x\n4 Ingredient Recipe: 100000000000000000000x\n5 Ingredient Recipe: 1000000000000000000000000000x",
+            "Depth 8: Extremely slow but extremely accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 10000000x\n2 Ingredient Recipe: 100000000000000x\n3 Ingredient Recipe: 100000000000000000000x\n4 Ingredient Recipe: 1000000000000000000000000x\n5 Ingredient Recipe: 10000000000000000000000000000000x",
+            "Depth 9: Very slow but very accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 100000000x\n2 Ingredient Recipe: 10000000000000000x\n3 Ingredient Recipe: 10000000000000000000000x\n4 Ingredient Recipe: 100000000000000000000000000x\n5 Ingredient Recipe: 100000000000000000000000000000000000x",
+            "Depth 10: Slowest but most accurate.\n\nApproximate calculation time multiplier:\n1 Ingredient Recipe: 1000000000x\n2 Ingredient Recipe: 100000000000000000x\n3 Ingredient Recipe: 100000000000000000000000x\n4 Ingredient Recipe: 1000000000000000000000000000x\n5 Ingredient Recipe: 1000000000000000000000000000000000000000x"
+        ]
+
+        # Get unique ingredient types
+        self.ingredient_types = self.db.ingredient_types
+
+        # Main container with scrollbar
+        self.main_container = ctk.CTkFrame(self)
+        self.main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.canvas = tk.Canvas(self.main_container)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.scrollbar = ctk.CTkScrollbar(self.main_container, orientation=tk.VERTICAL, command=self.canvas.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.bind('<Configure>', lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+
+        self.inner_frame = ctk.CTkFrame(self.canvas)
+        self.canvas.create_window((0, 0), window=self.inner_frame, anchor="nw")
+
+        # Inputs
+        self.input_frame = ctk.CTkFrame(self.inner_frame)
+        self.input_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+
+        # Ingredient Selection
+        self.ingredient_frame = ctk.CTkFrame(self.input_frame)
+        self.ingredient_frame.pack(fill=tk.X, pady=5)
+
+        self.ingredient_label = ctk.CTkLabel(self.ingredient_frame, text="Add Ingredients to Recipe:", font=("Arial", 20))
+        self.ingredient_label.pack(pady=5)
+
+        self.ingredient_button_frame = ctk.CTkFrame(self.ingredient_frame)
+        self.ingredient_button_frame.pack(fill=tk.X, pady=5)
+
+        # Dynamically add buttons for each ingredient type
+        self.ingredient_rows = []  # Store rows dynamically
+        row_frame = ctk.CTkFrame(self.ingredient_button_frame)
+        row_frame.pack(fill=tk.X, pady=2)
+        self.ingredient_rows.append(row_frame)
+
+        self.ingredient_buttons = {}
+        for ingre_type in self.ingredient_types:
+            self._add_ingredient_button(ingre_type)
+
+        # Recipe Display
+        self.recipe_display_frame = ctk.CTkFrame(self.input_frame)
+        self.recipe_display_frame.pack(fill=tk.X, pady=5)
+
+        self.recipe_label = ctk.CTkLabel(self.recipe_display_frame, text="Current Recipe:", font=("Arial", 20))
+        self.recipe_label.pack(pady=5)
+
+        self.recipe_buttons_frame = ctk.CTkFrame(self.recipe_display_frame, width=800, height=100, fg_color="#3e4e59")
+        self.recipe_buttons_frame.pack_propagate(False)
+        self.recipe_buttons_frame.grid_propagate(False)
+        self.recipe_buttons_frame.pack(fill=tk.X, pady=5)
+        self.recipe_chips = ChipList(
+            self.recipe_buttons_frame,
+            lambda parent, item: self._make_chip(parent, item, INGREDIENT_COLORS.get(item, "#FFFFFF"), self.remove_ingredient)
+        )
+
+        # Tag Checkbox Bar
+        self.tag_frame = ctk.CTkFrame(self.recipe_display_frame)
+        self.tag_frame.pack(fill=tk.X, pady=5)
+
+        self.tag_label = ctk.CTkLabel(self.tag_frame, text="Allowed Tags:", font=("Arial", 20))
+        self.tag_label.pack(pady=5)
+
+        # Dynamically add checkboxes for each tag
+        self.tag_checkbox_frame = ctk.CTkFrame(self.tag_frame)
+        self.tag_checkbox_frame.pack(fill=tk.X, pady=5)
+
+        for tag in self.db.unique_tags:
+            self._add_tag_checkbox(tag)
+
+        # Priority Stats
+        self.priority_frame = ctk.CTkFrame(self.input_frame)
+        self.priority_frame.pack(fill=tk.X, pady=5)
+
+        self.priority_button_frame = ctk.CTkFrame(self.priority_frame)
+        self.priority_button_frame.pack(fill=tk.X, pady=5)
+
+        # Dynamically add Priority Stats buttons
+        self.priority_rows = []  # Store rows dynamically
+        row_frame = ctk.CTkFrame(self.priority_button_frame)
+        row_frame.pack(fill=tk.X, pady=2)
+        self.priority_rows.append(row_frame)
+
+        self.priority_buttons = {}
+        buttons_per_row = 7  # Limit per row
+        count = 0
+
+        for stat in self.db.stat_cols:
+            if count >= buttons_per_row:
+                row_frame = ctk.CTkFrame(self.priority_button_frame)
+                row_frame.pack(fill=tk.X, pady=2)
+                self.priority_rows.append(row_frame)
+                count = 0
+
+            color = PRIORITY_STAT_COLORS.get(stat, "#ADD8E6")  # Assign color for stats
+            button = ctk.CTkButton(
+                row_frame,
+                text=stat,
+                fg_color=color,
+                text_color="black" if color != "#FFFFFF" else "white",
+                command=lambda s=stat: self.add_priority_stat(s)
+            )
+            button.pack(side=tk.LEFT, padx=5, pady=5)
+
+            self.priority_buttons[stat] = button
+            count += 1  # Increment count for row tracking
+           
+        # Priority Label
+        self.priority_label = ctk.CTkLabel(self.priority_button_frame, text="Prioritized Stats:", font=("Arial", 20))
+        self.priority_label.pack(pady=5)
+        
+        # Priority Display
+        self.priority_display_frame = ctk.CTkFrame(self.input_frame, width=800, height=100, fg_color="#3e4e59")
+        self.priority_display_frame.pack_propagate(False)
+        self.priority_display_frame.grid_propagate(False)
+        self.priority_display_frame.pack(fill=tk.X, pady=5)
+        self.priority_chips = ChipList(
+            self.priority_display_frame,
+            lambda parent, stat: self._make_chip(parent, stat, PRIORITY_STAT_COLORS.get(stat, "#ADD8E6"), self.remove_priority_stat)
+        )
+
+        # Stat Multipliers Button
+        self.stat_multipliers_button = ctk.CTkButton(
+            self.input_frame,
+            text="Edit Stat Weights",
+            font=("Arial", 20),
+            fg_color="#596fde",
+            width=200,
+            command=self.open_stat_multipliers_window
+        )
+        self.stat_multipliers_button.pack(pady=10)
+
+         # Initialize stat multipliers
+        self.stat_multipliers = {stat: 1.0 for stat in self.db.stat_cols}
+
+        # Number of Top Recipes Input
+        self.top_x_frame = ctk.CTkFrame(self.input_frame)
+        self.top_x_frame.pack(fill=tk.X, pady=5)
+
+        self.top_x_label = ctk.CTkLabel(self.top_x_frame, text="Number of Top Recipes to Show:", font=("Arial", 20))
+        self.top_x_label.pack(side=tk.LEFT, padx=5)
+
+        self.top_x_entry = ctk.CTkEntry(self.top_x_frame, width=50, font=("Arial", 20))
+        self.top_x_entry.insert(0, "5")  # Default value
+        self.top_x_entry.pack(side=tk.LEFT, padx=5)
+
+        # Calculate Button
+        self.calculate_button = ctk.CTkButton(self.input_frame, text="Calculate Best Recipes",width=200, height=50, font=("Arial", 20), fg_color="#ffffff", text_color="#3f7ef2", command=self.calculate_recipes)
+        self.calculate_button.pack(pady=10)
+
+        # Progress Bar and Label
+        self.progress_frame = ctk.CTkFrame(self.input_frame)
+        self.progress_frame.pack(fill=tk.X, pady=10)
+
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame, width=300)
+        self.progress_bar.pack(side=tk.TOP, padx=5)
+        self.progress_bar.set(0)  # Initialize progress bar to 0
+
+        # Label to display "checked/maximum to check"
+        self.progress_label = ctk.CTkLabel(self.progress_frame, text="0 / 0", font=("Arial", 16))
+        self.progress_label.pack(side=tk.TOP, padx=5)
+
+        # Save and Load Preset Buttons
+        self.preset_buttons_frame = ctk.CTkFrame(self.input_frame)
+        self.preset_buttons_frame.pack(fill=tk.X, pady=5)
+
+        self.save_preset_button = ctk.CTkButton(self.preset_buttons_frame, text="Save Preset", width=150, command=self.save_preset)
+        self.save_preset_button.pack(side=tk.LEFT, padx=5)
+
+        self.load_preset_button = ctk.CTkButton(self.preset_buttons_frame, text="Load Preset", width=150, command=self.load_preset)
+        self.load_preset_button.pack(side=tk.LEFT, padx=5)
+
+        # Resume Button, continues the search of the last checkpoint
+        self.resume_button = ctk.CTkButton(self.preset_buttons_frame, text="Resume", width=100, command=self.resume_search)
+        self.resume_button.pack(side=tk.LEFT, padx=5)
+
+        # Settings Button
+        self.settings_button = ctk.CTkButton(self.preset_buttons_frame, text="Settings", width=150, command=self.open_settings)
+        self.settings_button.pack(side=tk.RIGHT, padx=5)
+
+        # Save and Load Banned Ingredients Buttons
+        self.ban_buttons_frame = ctk.CTkFrame(self.input_frame)
+        self.ban_buttons_frame.pack(fill=tk.X, pady=5)
+
+        self.save_ban_button = ctk.CTkButton(self.ban_buttons_frame, text="Save Banned List", width=150, command=self.save_banned_list)
+        self.save_ban_button.pack(side=tk.LEFT, padx=5)
+
+        self.load_ban_button = ctk.CTkButton(self.ban_buttons_frame, text="Load Banned List", width=150, command=self.load_banned_list)
+        self.load_ban_button.pack(side=tk.LEFT, padx=5)
+
+        # Credits Button
+        self.credits_button = ctk.CTkButton(self.ban_buttons_frame, text="Credits", width=150, command=self.show_credits)
+        self.credits_button.pack(side=tk.RIGHT, padx=5)
+
+        # Ban Ingredient Section
+        self.ban_frame = ctk.CTkFrame(self.input_frame)
+        self.ban_frame.pack(fill=tk.X, pady=5)
+
+        self.ban_label = ctk.CTkLabel(self.ban_frame, text="Banned Ingredients (comma-separated):", font=("Arial", 20))
+        self.ban_label.pack(pady=5)
+
+        self.ban_entry = ctk.CTkEntry(self.ban_frame, width=300)
+        self.ban_entry.pack(pady=5)
+        self.ban_entry.bind("<Return>", lambda e: self.update_banlist_from_entry())
+
+        # Banlist Display
+        self.banlist_display_frame = ctk.CTkFrame(self.input_frame, width=800, height=130, fg_color="#3e4e59")
+        self.banlist_display_frame.pack_propagate(False)
+        self.banlist_display_frame.pack(fill=tk.X, pady=5)
+
+        # Scrollable frame for banned ingredients
+        self.banlist_scroll_frame = ctk.CTkScrollableFrame(self.banlist_display_frame, width=800, height=130, fg_color="#3e4e59")
+        self.banlist_scroll_frame.pack(fill=tk.BOTH, expand=True)
+        self.banlist_chips = ChipList(
+            self.banlist_scroll_frame,
+            lambda parent, ingredient: self._make_chip(parent, ingredient, "#FFCCCB", self.remove_banned_ingredient)
+        )
+
+        # Must-Have Ingredient Section
+        self.must_have_frame = ctk.CTkFrame(self.input_frame)
+        self.must_have_frame.pack(fill=tk.X, pady=5)
+
+        self.must_have_label = ctk.CTkLabel(self.must_have_frame, text="Must-Have Ingredients (comma-separated):", font=("Arial", 20))
+        self.must_have_label.pack(pady=5)
+
+        self.must_have_entry = ctk.CTkEntry(self.must_have_frame, width=300)
+        self.must_have_entry.pack(pady=5)
+        self.must_have_entry.bind("<Return>", lambda e: self.update_must_have_from_entry())
+
+        # Must-Have Display
+        self.must_have_display_frame = ctk.CTkFrame(self.input_frame, width=800, height=100, fg_color="#3e4e59")
+        self.must_have_display_frame.pack_propagate(False)
+        self.must_have_display_frame.grid_propagate(False)
+        self.must_have_display_frame.pack(fill=tk.X, pady=5)
+        self.must_have_chips = ChipList(
+            self.must_have_display_frame,
+            lambda parent, ingredient: self._make_chip(parent, ingredient, "#90EE90", self.remove_must_have_ingredient)
+        )
+
+        # Bind mouse wheel to scroll for all widgets in the inner frame
+        self._bind_mousewheel_scroll(self.inner_frame)
+
+        # Results of earlier searches, dropped per food when the database reloads
+        self.result_cache = ResultCache()
+        self.last_search = None  # Final beam of the last search, for exporting
+
+        # Reload the food database in the background when its file is edited
+        self.database_changes = queue.Queue()
+        self.db.subscribe(lambda db, changes: self.database_changes.put(changes))
+        self.database_watcher = FoodDatabaseWatcher(self.db)
+        self.database_watcher.start()
+        self.after(500, self._poll_database_changes)
+
+        # The atlas depends on the food database, so it is built here rather than shipped
+        build_atlas_in_background(self.db)
+
+    def _add_ingredient_button(self, ingre_type):
+        """Add a button for an ingredient type to the last row of buttons."""
+        buttons_per_row = 7  # Limit per row
+        row_frame = self.ingredient_rows[-1]
+        if sum(1 for button in self.ingredient_buttons.values() if button.master is row_frame) >= buttons_per_row:
+            row_frame = ctk.CTkFrame(self.ingredient_button_frame)
+            row_frame.pack(fill=tk.X, pady=2)
+            self.ingredient_rows.append(row_frame)
+
+        color = INGREDIENT_COLORS.get(ingre_type, "#FFFFFF")  # Assign color
+        button = ctk.CTkButton(
+            row_frame,
+            text=ingre_type,
+            fg_color=color,
+            text_color="black" if color != "#FFFFFF" else "white",
+            command=lambda t=ingre_type: self.add_ingredient(t)
+        )
+        button.pack(side=tk.LEFT, padx=5, pady=5)
+        self.ingredient_buttons[ingre_type] = button
+
+    def _add_tag_checkbox(self, tag):
+        checkbox = ctk.CTkCheckBox(
+            self.tag_checkbox_frame,
+            text=tag,
+            command=lambda t=tag: self.update_selected_tags(t)
+        )
+        checkbox.pack(side=tk.LEFT, padx=5, pady=5)
+        checkbox.select()  # Select by default
+        self.tag_checkboxes[tag] = checkbox
+
+    def _poll_database_changes(self):
+        """Apply database reloads from the watcher thread on the UI thread."""
+        while not self.database_changes.empty():
+            self._on_database_changed(self.database_changes.get_nowait())
+        self.after(500, self._poll_database_changes)
+
+    def _on_database_changed(self, changes):
+        dropped = self.result_cache.invalidate(changes)
+        logging.info(f"Food database changed ({changes}), {dropped} cached result(s) dropped")
+        build_atlas_in_background(self.db)
+
+        if changes.tags_changed:
+            # Add checkboxes for new tags (selected by default) and remove the ones for gone tags
+            for tag in [tag for tag in self.tag_checkboxes if tag not in self.db.unique_tags]:
+                self.tag_checkboxes.pop(tag).destroy()
+                self.selected_tags.discard(tag)
+            for tag in self.db.unique_tags:
+                if tag not in self.tag_checkboxes:
+                    self._add_tag_checkbox(tag)
+                    self.selected_tags.add(tag)
+
+        if changes.types_changed:
+            self.ingredient_types = self.db.ingredient_types
+            for ingre_type in [t for t in self.ingredient_buttons if t not in self.ingredient_types]:
+                self.ingredient_buttons.pop(ingre_type).destroy()
+            for ingre_type in self.ingredient_types:
+                if ingre_type not in self.ingredient_buttons:
+                    self._add_ingredient_button(ingre_type)
+
+    # Function to update the stat multiplier
+    def update_stat_multiplier(self, stat, value):
+        """Update the stat multiplier value."""
+        self.stat_multipliers[stat] = value
+        self.value_labels[stat].configure(text=f"{value:.2f}")
+    
+    def update_selected_tags(self, tag):
+        """Update the selected tags based on checkbox state."""
+        if self.tag_checkboxes[tag].get() == 1:
+            self.selected_tags.add(tag)
+        else:
+            self.selected_tags.discard(tag)
+
+        #print(self.selected_tags)
+
+    def show_credits(self):
+        """Open a new window to display credits."""
+        credits_window = ctk.CTkToplevel(self)
+        credits_window.title("Credits")
+        credits_window.geometry("300x100")
+
+        # Center the window on the screen
+        credits_window.update_idletasks()
+        screen_width = credits_window.winfo_screenwidth()
+        screen_height = credits_window.winfo_screenheight()
+        window_width = 300
+        window_height = 100
+
+        x_position = (screen_width // 2) - (window_width // 2)
+        y_position = (screen_height // 2) - (window_height // 2)
+
+        credits_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
+        self.after(100, lambda: credits_window.focus_force()) # Bring the window to the front
+
+        # Add credits text
+        credits_label = ctk.CTkLabel(credits_window, text="@On4ll\n@mRain", font=("Arial", 20))
+        credits_label.pack(pady=20)
+
+    def _bind_mousewheel_scroll(self, widget):
+        """Recursively bind mouse wheel to all widgets for scrolling."""
+        widget.bind("<MouseWheel>", self._on_mousewheel)
+        for child in widget.winfo_children():
+            self._bind_mousewheel_scroll(child)
+
+    def _on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+
+    def _show_progress(self, report):
+        """Show the progress of a search in scored combinations, with the time left."""
+        self.progress_bar.set(report.fraction)
+        self.progress_label.configure(text=str(report))
+        self.update()
+
+    def _make_chip(self, parent, text, color, on_remove):
+        """Create a rounded chip with a label and a cross button."""
+        frame = ctk.CTkFrame(parent, corner_radius=10, fg_color=color)
+
+        label = ctk.CTkLabel(frame, text=text, text_color="black")
+        label.pack(side=tk.LEFT, padx=5)
+
+        cross_button = ctk.CTkButton(
+            frame,
+            text="×",
+            width=20,
+            height=20,
+            fg_color="transparent",
+            text_color="black",
+            hover_color="#FF0000",
+            command=lambda t=text: on_remove(t)
+        )
+        cross_button.pack(side=tk.RIGHT, padx=5)
+
+        # Bind mouse wheel to scroll
+        frame.bind("<MouseWheel>", self._on_mousewheel)
+        return frame
+
+    def add_ingredient(self, ingredient):
+        if len(self.recipe) >= 5:
+            messagebox.showwarning("Warning", "Maximum 5 ingredients can be added to the recipe.")
+            return
+        self.recipe.append(ingredient)
+        self.update_recipe_display()
+
+    def update_recipe_display(self):
+        # Only the chips that were added or removed are touched
+        self.recipe_chips.sync(self.recipe)
+
+    def remove_ingredient(self, ingredient):
+        if ingredient in self.recipe:
+            self.recipe.remove(ingredient)
+            self.update_recipe_display()
+
+    def add_priority_stat(self, stat):
+        if stat not in self.priority_stats:
+            self.priority_stats.append(stat)
+            self.update_priority_display()
+
+    def update_priority_display(self):
+        self.priority_chips.sync(self.priority_stats)
+
+    def remove_priority_stat(self, stat):
+        if stat in self.priority_stats:
+            self.priority_stats.remove(stat)
+            self.update_priority_display()
+
+    # Modify the calculate_recipes method to pass the calculation mode to beam_search
+    def calculate_recipes(self, resume=False):
+        if not self.recipe:
+            messagebox.showwarning("Warning", "Please add at least one ingredient to the recipe.")
+            return
+
+        if not self.priority_stats:
+            messagebox.showwarning("Warning", "Please add at least one priority stat.")
+            return
+
+        try:
+            top_x = int(self.top_x_entry.get())
+        except ValueError:
+            messagebox.showwarning("Warning", "Please enter a valid number for top recipes.")
+            return
+
+        # Get banned ingredients
+        banned_ingredients = [ingredient.strip().lower() for ingredient in self.ban_entry.get().split(",") if ingredient.strip()]
+        banned_ingredients = list(dict.fromkeys(banned_ingredients))
+        self.banned_ingredients = banned_ingredients
+
+        # Get must-have ingredients
+        must_have_ingredients = [ingredient.strip().lower() for ingredient in self.must_have_entry.get().split(",") if ingredient.strip()]
+        self.must_have_ingredients = must_have_ingredients
+
+        # Reset progress bar and label
+        self.progress_bar.set(0)
+        self.progress_label.configure(text="Starting...")
+        self.update()
+
+        # Get the stat multipliers from the dictionary
+        stat_multipliers = {stat: self.stat_multipliers[stat] for stat in self.db.stat_cols}
+
+        # Reuse the results of an identical earlier search
+        min_distance = self.diversity_distance if self.diverse.get() else 0
+        # The per-food caps of a diversity search and the inventory counts live in the beam, and checkpoints save the beam
+        use_beam = bool(min_distance) or resume or self.checkpoints.get() or self.inventory_mode.get()
+        # Checkpoints save the beam of one depth
+        use_auto_depth = self.auto_depth.get() and not resume and not self.checkpoints.get()
+        use_middle = self.meet_in_the_middle.get() and len(self.recipe) >= MEET_IN_THE_MIDDLE_MIN_SLOTS and not use_beam
+        solver = "middle" if use_middle else "beam"
+        if self.refine.get():
+            solver += f"+refine{self.refine_seconds}"
+        if min_distance:
+            solver += f"+diverse{min_distance}"
+        if use_auto_depth:
+            solver += "+auto"
+        chains = {}
+        if self.chain_mode.get():
+            try:
+                chains = load_chains()
+            except (ValueError, OSError) as error:
+                messagebox.showerror("Error", f"Could not read the cooking chains: {error}")
+                return
+            if chains:
+                solver += "+chain"
+        inventory = None
+        if self.inventory_mode.get():
+            if chains:
+                messagebox.showwarning("Warning", "Cooked foods don't use up the inventory, turn off cooking chains to search the inventory.")
+                return
+            try:
+                inventory = resolve_inventory(load_inventory(), self.db.foods_by_name)
+            except (ValueError, OSError) as error:
+                messagebox.showerror("Error", f"Could not read the inventory: {error}")
+                return
+            solver += "+inventory"
+        use_exact = self.exact_single_stat.get() and not use_auto_depth and not min_distance and not resume and not self.checkpoints.get() and inventory is None
+        cache_key = query_key(
+            self.recipe, self.priority_stats, self.selected_tags, banned_ingredients, must_have_ingredients, top_x, self.depth,
+            self.calculation_mode.get(), stat_multipliers, solver + ("+exact" if use_exact else ""), inventory
+        )
+        best_combinations = self.result_cache.get(cache_key) if not resume else None
+        improved = None  # Number of results improved by the local search
+        auto = None  # Convergence of an automatic depth search
+        source = "cache" if best_combinations is not None else None
+        if best_combinations is None:
+            # Common queries are answered exactly by the precomputed atlas
+            atlas = get_atlas() if not use_beam and not chains else None
+            if atlas is not None:
+                best_combinations = atlas.lookup(
+                    self.db, self.recipe, self.priority_stats, self.selected_tags, banned_ingredients, must_have_ingredients,
+                    top_x=top_x, calculation_mode=self.calculation_mode.get(), stat_multipliers=stat_multipliers
+                )
+                if best_combinations is not None:
+                    source = "recipe atlas"
+                    self.result_cache.put(cache_key, best_combinations)
+        if best_combinations is None:
+            # Intermediate slots also take the best results of their sub-recipes
+            cooked = recipe_cooked_foods(
+                self.recipe, chains, self.priority_stats, self.db.tag_allowed_foods(self.selected_tags), banned_ingredients,
+                self.calculation_mode.get(), stat_multipliers, self.db.stat_cols, self.depth
+            )
+
+            # Compiled once per recipe and filter set, then executed with this run's settings
+            prepared = self.engine.prepare(
+                self.recipe, self.priority_stats, self.selected_tags, banned_ingredients, must_have_ingredients,
+                calculation_mode=self.calculation_mode.get(), extra_foods=cooked, inventory=inventory
+            )
+            ingredient_cap = diversity_cap(default_beam_width(len(self.recipe), self.depth), min_distance) if not use_middle else None
+            checkpoint = resume_state = None
+            if not use_middle and (resume or self.checkpoints.get()):
+                checkpoint = SearchCheckpoint(
+                    {**prepared.describe(self.depth, stat_multipliers, ingredient_cap), "top_x": top_x, "min_distance": min_distance, "chains": chains},
+                    self.db.fingerprint()
+                )
+                if resume:
+                    try:
+                        resume_state = checkpoint.load()
+                    except ValueError as error:
+                        messagebox.showerror("Error", f"Can't resume the search: {error}")
+                        return
+            if use_auto_depth:
+                auto = auto_depth_search(
+                    prepared, top_x=top_x, max_depth=self.depth, time_budget=self.auto_depth_seconds,
+                    stat_multipliers=stat_multipliers, progress_callback=self._show_progress,
+                    solver="middle" if use_middle else "beam", min_distance=min_distance, max_memory=self.max_memory
+                )
+                beam, best_combinations = auto.beam, auto.results
+            else:
+                beam = None  # Built on export when the exact solver answers
+                if use_exact:
+                    # Single priority stat queries are answered exactly, without a beam
+                    best_combinations = prepared.exact(top_x, stat_multipliers, self._show_progress)
+                    if best_combinations is not None:
+                        solver = solver.replace("middle" if use_middle else "beam", "exact", 1)
+                if best_combinations is None:
+                    beam, _ = prepared.search(
+                        depth=self.depth, stat_multipliers=stat_multipliers, progress_callback=self._show_progress,
+                        ingredient_cap=ingredient_cap, solver="middle" if use_middle else "beam", max_memory=self.max_memory,
+                        checkpoint=checkpoint, resume=resume_state
+                    )
+                    best_combinations = prepared.select(beam, top_x, stat_multipliers, min_distance=min_distance)
+            if self.refine.get():
+                best_combinations, improved = refine_results(
+                    best_combinations, self.recipe, self.priority_stats, prepared.tag_allowed_foods, banned_ingredients, must_have_ingredients,
+                    top_x=top_x, calculation_mode=self.calculation_mode.get(), stat_multipliers=stat_multipliers,
+                    stat_cols=self.db.stat_cols, list_alternatives=True, time_budget=self.refine_seconds,
+                    seeds=[names for names, _ in (beam or [])[:BEAM_SEEDS]], min_distance=min_distance, inventory=inventory
+                )
+            self.result_cache.put(cache_key, best_combinations)
+            if checkpoint is not None:
+                checkpoint.clear()
+
+            # Keep the final beam, or the query to build it, so the whole result set can be exported
+            self.last_search = {
+                "cache_key": cache_key,
+                "beam": beam,
+                "prepared": prepared,
+                "depth": self.depth,
+                "solver": "middle" if use_middle else "beam",
+                "priority_stats": list(self.priority_stats),
+                "must_have_ingredients": must_have_ingredients,
+                "stat_multipliers": stat_multipliers,
+            }
+
+        if source != "cache":
+            # Searches and atlas answers are archived for later reverse lookups
+            get_archive().record(
+                self.recipe, self.priority_stats, best_combinations, calculation_mode=self.calculation_mode.get(),
+                depth=auto.curve[-1].depth if auto else self.depth, top_x=top_x, banned_ingredients=banned_ingredients, must_have_ingredients=must_have_ingredients,
+                stat_multipliers=stat_multipliers, solver="atlas" if source else solver, stat_cols=self.db.stat_cols,
+                database=self.db.fingerprint()
+            )
+
+        # The search sent its final report itself
+        self.progress_bar.set(1)
+        if source is not None:
+            self.progress_label.configure(text=f"Results from the {source}")
+        self.update()
+
+        # Open new window to show results
+        result_window = ctk.CTkToplevel(self)
+        result_window.title("Best Recipes Results")
+        result_window.geometry("800x600")
+
+        # Center the window on the screen
+        result_window.update_idletasks()
+        screen_width = result_window.winfo_screenwidth()
+        screen_height = result_window.winfo_screenheight()
+        window_width = 950
+        window_height = 600
+
+        x_position = (screen_width // 2) - (window_width // 2)
+        y_position = (screen_height // 2) - (window_height // 2)
+
+        result_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
+        self.after(100, lambda: result_window.focus_force())
+
+        # Export Button
+        export_button = ctk.CTkButton(
+            result_window,
+            text="Export All Results",
+            width=150,
+            command=lambda key=cache_key: self.export_results(key)
+        )
+        export_button.pack(pady=(10, 0))
+
+        if auto is not None:
+            # Convergence curve: the score of each depth and where it stopped changing
+            auto_label = ctk.CTkLabel(result_window, text=auto.describe(), font=("Arial", 12), justify=tk.LEFT)
+            auto_label.pack(pady=(5, 0))
+
+        if improved is not None:
+            refine_label = ctk.CTkLabel(result_window, text=f"Local search improved {improved} recipe(s)", font=("Arial", 14))
+            refine_label.pack(pady=(5, 0))
+
+        # Create a scrollable frame for results
+        result_scroll_frame = ctk.CTkScrollableFrame(result_window)
+        result_scroll_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        if best_combinations:
+            for i, combo in enumerate(best_combinations, 1):
+                # Recipe combination
+                combo_frame = ctk.CTkFrame(result_scroll_frame, corner_radius=10)
+                combo_frame.pack(fill=tk.X, pady=5, padx=5)
+
+                # Display ingredients as small rounded buttons
+                ingredients_frame = ctk.CTkFrame(combo_frame)
+                ingredients_frame.pack(fill=tk.X, pady=5)
+
+                row_frame = ctk.CTkFrame(ingredients_frame)
+                row_frame.pack(fill=tk.X, pady=2)
+                count = 0
+
+                for ingredient in combo['Combination'].split(', '):
+                    if count >= 4:
+                        row_frame = ctk.CTkFrame(ingredients_frame)
+                        row_frame.pack(fill=tk.X, pady=2)
+                        count = 0
+
+                    ingredient_frame = ctk.CTkFrame(row_frame, corner_radius=10, fg_color="#FFFDD0")
+                    ingredient_frame.pack(side=tk.LEFT, padx=5, pady=5)
+
+                    include_button = ctk.CTkButton(
+                        ingredient_frame,
+                        text="Include",
+                        width=20,
+                        height=20,
+                        fg_color="#90EE90",
+                        text_color="black",
+                        hover_color="#32CD32",
+                        command=lambda ing=ingredient: self.add_must_have_ingredient(ing)
+                    )
+                    include_button.pack(side=tk.LEFT, padx=5)
+
+                    ingredient_label = ctk.CTkLabel(ingredient_frame, text=ingredient, text_color="black")
+                    ingredient_label.pack(side=tk.LEFT, padx=5)
+
+                    ban_button = ctk.CTkButton(
+                        ingredient_frame,
+                        text="Ban",
+                        width=20,
+                        height=20,
+                        fg_color="#f2aab4",
+                        text_color="black",
+                        hover_color="#FF0000",
+                        command=lambda ing=ingredient: self.ban_ingredient(ing)
+                    )
+                    ban_button.pack(side=tk.RIGHT, padx=5)
+
+                    count += 1  # Track number of items in row
+
+                # List the foods that could replace each ingredient without changing the stats
+                alternatives = combo.get('Alternatives') or []
+                combo = {key: value for key, value in combo.items() if key != 'Alternatives'}  # Cached results must stay intact
+                alternatives_text = "\n".join(
+                    f"{names[0]} = {', '.join(names[1:])}" for names in alternatives if len(names) > 1
+                )
+                if alternatives_text:
+                    alternatives_label = ctk.CTkLabel(
+                        combo_frame,
+                        text=f"Interchangeable:\n{alternatives_text}",
+                        font=("Arial", 12),
+                        anchor="w",
+                        justify="left"
+                    )
+                    alternatives_label.pack(fill=tk.X, padx=10, pady=5, anchor="w")
+
+                # Calculate total prioritized stat XP, non-prioritized stat XP, and total XP
+                if self.calculation_mode.get() < 2:
+                    prioritized_xp = 0
+                    non_prioritized_xp = 0
+                    total_potency = 0
+
+                    for stat in combo:
+                        if stat == "Combination":
+                            continue
+                        elif "_pot" in stat:
+                            total_potency += combo[stat]
+                            continue
+                        elif stat in self.priority_stats:
+                            prioritized_xp += combo[stat] * combo.get(f"{stat}_pot", 1)
+                        else:
+                            temp_pot = combo.get(f"{stat}_pot", 1)
+                            non_prioritized_xp += combo[stat] * (1 if temp_pot == 0 else temp_pot)
+
+                    total_xp = prioritized_xp + non_prioritized_xp
+
+                    # Display XP information
+                    xp_text = f"Prioritized XP: {prioritized_xp}\nNon-Prioritized XP: {non_prioritized_xp}\nTotal XP: {total_xp}\nTotal Potency: {total_potency}"
+                    xp_label = ctk.CTkLabel(
+                        combo_frame, 
+                        text=xp_text, 
+                        font=("Arial", 12), 
+                        anchor="w", 
+                        justify="left"
+                    )
+                    xp_label.pack(fill=tk.X, padx=10, pady=5, anchor="w")
+
+                # Display non-zero stats in text format (left-aligned)
+                stats_text = ""
+                for stat in sorted(combo.keys(), key=lambda x: combo[x] if x != "Combination" else 0, reverse=True):
+                    if stat != "Combination" and combo[stat] != 0:  # Only show non-zero stats
+                        stats_text += f"{stat}: {int(combo[stat])}"
+                        # If the stat has a corresponding "_pot" stat, calculate and display the product
+                        if f"{stat}_pot" in combo and combo[f"{stat}_pot"] != 0:
+                            stats_text += f" ({stat} * {stat}_pot = {int(combo[stat] * combo[f'{stat}_pot'])})"
+                        stats_text += "\n"
+
+                stats_label = ctk.CTkLabel(
+                    combo_frame, 
+                    text=stats_text.strip(), 
+                    font=("Arial", 12), 
+                    anchor="w", 
+                    justify="left"
+                )
+                stats_label.pack(fill=tk.X, padx=10, pady=5, anchor="w")
+        else:
+            no_results_label = ctk.CTkLabel(result_scroll_frame, text="No valid recipes found.", font=("Arial", 20))
+            no_results_label.pack(pady=10)
+
+    def export_results(self, cache_key):
+        """Export the whole final beam of a search to a file."""
+        from .export import export_beam
+
+        if self.last_search is None or self.last_search["cache_key"] != cache_key:
+            messagebox.showwarning("Warning", "These results came from the cache or the recipe atlas. Recalculate to export the full result set.")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            initialdir=os.path.dirname(output_path),
+            initialfile=os.path.basename(output_path),
+            filetypes=[("Excel Files", "*.xlsx"), ("CSV Files", "*.csv"), ("JSON Lines Files", "*.jsonl"), ("Parquet Files", "*.parquet")]
+        )
+        if not file_path:
+            return
+        include_rejected = messagebox.askyesno("Export", "Also export the recipes rejected by the filters?")
+
+        search = self.last_search
+        if search["beam"] is None:
+            # The exact solver has no beam: search it now, like the CLI does for --export
+            search["beam"], _ = search["prepared"].search(
+                depth=search["depth"], stat_multipliers=search["stat_multipliers"], progress_callback=self._show_progress,
+                solver=search["solver"], max_memory=self.max_memory
+            )
+        try:
+            count = export_beam(
+                search["beam"], file_path, search["priority_stats"], search["must_have_ingredients"], self.db.stat_cols,
+                stat_multipliers=search["stat_multipliers"], include_rejected=include_rejected
+            )
+        except (ValueError, ImportError, OSError) as error:
+            messagebox.showerror("Error", str(error))
+            return
+        messagebox.showinfo("Success", f"Exported {count} recipes successfully!")
+
+    def ban_ingredient(self, ingredient):
+        current_banned = self.ban_entry.get()
+        if current_banned:
+            new_banned = f"{current_banned}, {ingredient}"
+        else:
+            new_banned = ingredient
+        self.ban_entry.delete(0, tk.END)
+        self.ban_entry.insert(0, new_banned)
+        self.banned_ingredients = list(dict.fromkeys([ing.lower() for ing in self.banned_ingredients + [ingredient.lower()]]))  # Prevent duplicates, keeping order so existing chips stay put
+        self.update_banlist_display()
+
+    def add_must_have_ingredient(self, ingredient):
+        current_must_have = self.must_have_entry.get()
+        if current_must_have:
+            new_must_have = f"{current_must_have}, {ingredient}"
+        else:
+            new_must_have = ingredient
+        self.must_have_entry.delete(0, tk.END)
+        self.must_have_entry.insert(0, new_must_have)
+        self.must_have_ingredients.append(ingredient.lower())
+        self.update_must_have_display()
+
+    def update_banlist_from_entry(self):
+        banned_ingredients = [ingredient.strip().lower() for ingredient in self.ban_entry.get().split(",") if ingredient.strip()]
+        banned_ingredients = list(dict.fromkeys(banned_ingredients))  # Remove duplicates, keeping order
+        self.banned_ingredients = banned_ingredients
+        self.update_banlist_display()
+
+    def update_must_have_from_entry(self):
+        must_have_ingredients = [ingredient.strip().lower() for ingredient in self.must_have_entry.get().split(",") if ingredient.strip()]
+        self.must_have_ingredients = must_have_ingredients
+        self.update_must_have_display()
+
+    def update_banlist_display(self):
+        self.banlist_chips.sync(self.banned_ingredients)
+
+    def remove_banned_ingredient(self, ingredient):
+        if ingredient.lower() in self.banned_ingredients:
+            self.banned_ingredients.remove(ingredient.lower())
+            self.ban_entry.delete(0, tk.END)
+            self.ban_entry.insert(0, ", ".join(self.banned_ingredients))
+            self.update_banlist_display()
+
+    def update_must_have_display(self):
+        self.must_have_chips.sync(self.must_have_ingredients)
+
+    def remove_must_have_ingredient(self, ingredient):
+        if ingredient.lower() in self.must_have_ingredients:
+            self.must_have_ingredients.remove(ingredient.lower())
+            self.must_have_entry.delete(0, tk.END)
+            self.must_have_entry.insert(0, ", ".join(self.must_have_ingredients))
+            self.update_must_have_display()
+
+    def save_banned_list(self):
+        """Save the banned ingredient list to a file."""
+        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text Files", "*.txt")])
+        if file_path:
+            with open(file_path, "w") as file:
+                file.write(", ".join(self.banned_ingredients))
+            messagebox.showinfo("Success", "Banned ingredient list saved successfully!")
+
+    def load_banned_list(self):
+        """Load the banned ingredient list from a file."""
+        file_path = filedialog.askopenfilename(filetypes=[("Text Files", "*.txt")])
+        if file_path:
+            with open(file_path, "r") as file:
+                banned_ingredients = file.read().strip().split(", ")
+                self.banned_ingredients = list(dict.fromkeys([ing.lower() for ing in banned_ingredients if ing.strip()]))
+                self.ban_entry.delete(0, tk.END)
+                self.ban_entry.insert(0, ", ".join(self.banned_ingredients))
+                self.update_banlist_display()
+            messagebox.showinfo("Success", "Banned ingredient list loaded successfully!")
+
+    def save_preset(self):
+        """Save the current preset (recipe, priority stats, banned ingredients, must-have ingredients, and top_x) to a file."""
+        preset = {
+            "recipe": self.recipe,
+            "priority_stats": self.priority_stats,
+            "banned_ingredients": self.banned_ingredients,
+            "must_have_ingredients": self.must_have_ingredients,
+            "top_x": self.top_x_entry.get()
+        }
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
+        if file_path:
+            with open(file_path, "w") as file:
+                json.dump(preset, file)
+            messagebox.showinfo("Success", "Preset saved successfully!")
+
+    def load_preset(self):
+        """Load a preset from a file and update the UI."""
+        file_path = filedialog.askopenfilename(filetypes=[("JSON Files", "*.json")])
+        if file_path:
+            with open(file_path, "r") as file:
+                preset = json.load(file)
+                self.recipe = preset.get("recipe", [])
+                self.priority_stats = preset.get("priority_stats", [])
+                self.banned_ingredients = preset.get("banned_ingredients", [])
+                self.must_have_ingredients = preset.get("must_have_ingredients", [])
+                self.top_x_entry.delete(0, tk.END)
+                self.top_x_entry.insert(0, preset.get("top_x", "5"))
+
+                # Update the ban entry
+                self.ban_entry.delete(0, tk.END)
+                self.ban_entry.insert(0, ", ".join(self.banned_ingredients))
+
+                # Update the must-have entry
+                self.must_have_entry.delete(0, tk.END)
+                self.must_have_entry.insert(0, ", ".join(self.must_have_ingredients))
+
+                # Update UI
+                self.update_recipe_display()
+                self.update_priority_display()
+                self.update_banlist_display()
+                self.update_must_have_display()
+            messagebox.showinfo("Success", "Preset loaded successfully!")
+
+    def resume_search(self):
+        """Restore the query of the last checkpoint and continue its search."""
+        query = checkpoint_query()
+        if query is None:
+            messagebox.showinfo("Resume", "There is no interrupted search to resume.")
+            return
+
+        self.recipe = list(query["recipe"])
+        self.priority_stats = list(query["priority_stats"])
+        self.banned_ingredients = list(query["banned_ingredients"])
+        self.must_have_ingredients = list(query["must_have_ingredients"])
+        self.selected_tags = set(query["selected_tags"])
+        for tag, checkbox in self.tag_checkboxes.items():
+            if tag in self.selected_tags:
+                checkbox.select()
+            else:
+                checkbox.deselect()
+        self.calculation_mode.set(query["calculation_mode"])
+        self.depth = query["depth"]
+        self.stat_multipliers.update(query["stat_multipliers"])
+        self.diverse.set(query.get("min_distance", 0) > 0)
+        self.chain_mode.set(bool(query.get("chains")))
+        self.inventory_mode.set(bool(query.get("inventory")))
+        if query.get("min_distance"):
+            self.diversity_distance = query["min_distance"]
+        self.top_x_entry.delete(0, tk.END)
+        self.top_x_entry.insert(0, str(query.get("top_x", 5)))
+        self.ban_entry.delete(0, tk.END)
+        self.ban_entry.insert(0, ", ".join(self.banned_ingredients))
+        self.must_have_entry.delete(0, tk.END)
+        self.must_have_entry.insert(0, ", ".join(self.must_have_ingredients))
+        self.update_recipe_display()
+        self.update_priority_display()
+        self.update_banlist_display()
+        self.update_must_have_display()
+
+        self.calculate_recipes(resume=True)
+
+    def open_settings(self):
+        """Open the settings window."""
+        settings_window = ctk.CTkToplevel(self)
+        settings_window.title("Settings")
+        settings_window.geometry("400x800")
+
+        # Center the window on the screen
+        settings_window.update_idletasks()  # Ensure the window dimensions are updated
+        screen_width = settings_window.winfo_screenwidth()
+        screen_height = settings_window.winfo_screenheight()
+        window_width = 400
+        window_height = 800
+
+        x_position = (screen_width // 2) - (window_width // 2)
+        y_position = (screen_height // 2) - (window_height // 2)
+
+        settings_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
+        self.after(100, lambda: settings_window.focus_force()) # Bring the window to the front
+
+        # Search Depth Label
+        depth_label = ctk.CTkLabel(settings_window, text="Search Depth:", font=("Arial", 16))
+        depth_label.pack(pady=10)
+
+        # Slider for search depth
+        self.depth_slider = ctk.CTkSlider(settings_window, from_=1, to=10, number_of_steps=9, command=self.update_depth)
+        self.depth_slider.set(self.depth)
+        self.depth_slider.pack(pady=10)
+
+        # Warning message box
+        self.warning_message = ctk.CTkLabel(settings_window, text=self.calculation_warnings[int(self.depth) - 1], font=("Arial", 12), wraplength=350)
+        self.warning_message.pack(pady=10)
+
+        # Calculation Mode Label
+        mode_label = ctk.CTkLabel(settings_window, text="Calculation Mode:", font=("Arial", 16))
+        mode_label.pack(pady=10)
+
+        # Slider for calculation mode
+        self.mode_slider = ctk.CTkSlider(settings_window, from_=0, to=2, number_of_steps=2, command=self.update_mode)
+        self.mode_slider.set(self.calculation_mode.get())
+        self.mode_slider.pack(pady=10)
+
+        # Mode description label
+        self.mode_description = ctk.CTkLabel(settings_window, text=self.get_mode_description(self.calculation_mode.get()), font=("Arial", 12), wraplength=350)
+        self.mode_description.pack(pady=10)
+
+        # Solver for long recipes
+        middle_checkbox = ctk.CTkCheckBox(
+            settings_window,
+            text=f"Meet in the middle for {MEET_IN_THE_MIDDLE_MIN_SLOTS}+ ingredient recipes (more accurate)",
+            variable=self.meet_in_the_middle
+        )
+        middle_checkbox.pack(pady=10)
+
+        refine_checkbox = ctk.CTkCheckBox(
+            settings_window,
+            text=f"Refine results with a {self.refine_seconds:g}s local search",
+            variable=self.refine
+        )
+        refine_checkbox.pack(pady=10)
+
+        diverse_checkbox = ctk.CTkCheckBox(
+            settings_window,
+            text=f"Diverse results (differ by at least {self.diversity_distance} ingredients)",
+            variable=self.diverse
+        )
+        diverse_checkbox.pack(pady=10)
+
+        checkpoint_checkbox = ctk.CTkCheckBox(
+            settings_window,
+            text="Save checkpoints of long searches (continue them with Resume)",
+            variable=self.checkpoints
+        )
+        checkpoint_checkbox.pack(pady=10)
+
+        chain_checkbox = ctk.CTkCheckBox(
+            settings_window,
+            text="Cook intermediate ingredients from their sub-recipes (Foods_Chains.json)",
+            variable=self.chain_mode
+        )
+        chain_checkbox.pack(pady=10)
+
+        inventory_checkbox = ctk.CTkCheckBox(
+            settings_window,
+            text="Only use the foods I own (Foods_Inventory.json)",
+            variable=self.inventory_mode
+        )
+        inventory_checkbox.pack(pady=10)
+
+        auto_depth_checkbox = ctk.CTkCheckBox(
+            settings_window,
+            text=f"Automatic depth up to the slider depth (at most {self.auto_depth_seconds:g}s)",
+            variable=self.auto_depth
+        )
+        auto_depth_checkbox.pack(pady=10)
+
+        exact_checkbox = ctk.CTkCheckBox(
+            settings_window,
+            text="Exact search for a single priority stat (falls back to the normal search)",
+            variable=self.exact_single_stat
+        )
+        exact_checkbox.pack(pady=10)
+
+    def update_mode(self, value):
+        """Update the calculation mode based on the slider value."""
+        self.calculation_mode.set(int(float(value)))
+        self.mode_description.configure(text=self.get_mode_description(self.calculation_mode.get()))
+
+    def get_mode_description(self, mode):
+        """Get the description for the selected calculation mode."""
+        if mode == 0:
+            return "Maximize Food Stat Level: The program will work as it is."
+        elif mode == 1:
+            return "Maximize XP Gain: The program will try to find the highest value with the condition (stat * stat_pot) for priority stats."
+        elif mode == 2:
+            return "Coming Soon!"
+        return ""
+
+    def update_depth(self, value):
+        """Update the search depth based on the slider value."""
+        self.depth = int(float(value))
+        self.warning_message.configure(text=self.calculation_warnings[self.depth - 1])
+    
+    def open_stat_multipliers_window(self):
+        """Open a new window to configure stat multipliers."""
+        self.stat_window = ctk.CTkToplevel(self)  # Store the window as an instance variable
+        self.stat_window.title("Stat Multipliers")
+        self.stat_window.geometry("600x300")
+
+        # Center the window on the screen
+        self.stat_window.update_idletasks()
+        screen_width = self.stat_window.winfo_screenwidth()
+        screen_height = self.stat_window.winfo_screenheight()
+        window_width = 900
+        window_height = 460
+
+        x_position = (screen_width // 2) - (window_width // 2)
+        y_position = (screen_height // 2) - (window_height // 2)
+
+        self.stat_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
+        self.after(100, lambda: self.stat_window.focus_force())  # Bring the window to the front
+
+        # Stat Multipliers Frame
+        self.stat_multipliers_frame = ctk.CTkFrame(self.stat_window)
+        self.stat_multipliers_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.stat_multipliers_label = ctk.CTkLabel(self.stat_multipliers_frame, text="Stat Multipliers:", font=("Arial", 20))
+        self.stat_multipliers_label.pack(pady=5)
+
+        # Create a frame to hold the sliders
+        self.sliders_frame = ctk.CTkFrame(self.stat_multipliers_frame)
+        self.sliders_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Initialize a dictionary to store the slider values
+        self.value_labels = {}  # Store value labels
+        self.sliders = {}  # Store sliders
+
+        # Add sliders for each stat
+        for i, stat in enumerate(self.db.stat_cols):
+            slider_frame = ctk.CTkFrame(self.sliders_frame)
+            slider_frame.pack(side=tk.LEFT, padx=10, pady=5)
+
+            slider_label = ctk.CTkLabel(slider_frame, text=stat, font=("Arial", 12))
+            slider_label.pack(pady=5)
+
+            slider = ctk.CTkSlider(
+                slider_frame,
+                from_=0.01,
+                to=5,
+                number_of_steps=200,  # 0.01 increments
+                orientation="vertical",
+                height=200,  # Set uniform height
+                width=20,  # Set uniform width,
+                command=lambda value, s=stat: self.update_stat_multiplier(s, float(value))
+            )
+            slider.set(self.stat_multipliers[stat])  # Set to current value
+            slider.pack(pady=5)
+
+            # Value Label (Shows current slider value)
+            value_label = ctk.CTkLabel(slider_frame, text=f"{self.stat_multipliers[stat]:.2f}", font=("Arial", 12))
+            value_label.pack()
+
+            # Store the slider and label in dictionaries for easy access
+            self.value_labels[stat] = value_label
+            self.sliders[stat] = slider
+
+        # Add a "Reset" button
+        reset_button = ctk.CTkButton(
+            self.stat_multipliers_frame,
+            text="Reset",
+            font=("Arial", 16),
+            command=self.reset_stat_multipliers
+        )
+        reset_button.pack(pady=10)
+
+        # Sweep one stat's multiplier over a range of values
+        sweep_frame = ctk.CTkFrame(self.stat_multipliers_frame)
+        sweep_frame.pack(pady=5)
+
+        ctk.CTkLabel(sweep_frame, text="Sweep", font=("Arial", 16)).pack(side=tk.LEFT, padx=5)
+        self.sweep_stat = ctk.CTkOptionMenu(sweep_frame, values=list(self.db.stat_cols), width=100)
+        self.sweep_stat.pack(side=tk.LEFT, padx=5)
+
+        self.sweep_entries = {}
+        for name, default in (("from", "0.5"), ("to", "2"), ("points", "10")):
+            ctk.CTkLabel(sweep_frame, text=name, font=("Arial", 12)).pack(side=tk.LEFT, padx=2)
+            entry = ctk.CTkEntry(sweep_frame, width=50)
+            entry.insert(0, default)
+            entry.pack(side=tk.LEFT, padx=2)
+            self.sweep_entries[name] = entry
+
+        sweep_button = ctk.CTkButton(sweep_frame, text="Run Sweep", width=100, command=self.run_multiplier_sweep)
+        sweep_button.pack(side=tk.LEFT, padx=5)
+
+    def run_multiplier_sweep(self):
+        """Search with every value of the swept multiplier and show how the top recipes change."""
+        from .sweep import multiplier_grid, sweep_multipliers, sweep_report, sweep_values
+
+        if not self.recipe or not self.priority_stats:
+            messagebox.showwarning("Warning", "Please add at least one ingredient and one priority stat.")
+            return
+        try:
+            start = float(self.sweep_entries["from"].get())
+            stop = float(self.sweep_entries["to"].get())
+            points = int(self.sweep_entries["points"].get())
+            top_x = int(self.top_x_entry.get())
+            grid = multiplier_grid(
+                {stat: self.stat_multipliers[stat] for stat in self.db.stat_cols},
+                {self.sweep_stat.get(): sweep_values(start, stop, points)}
+            )
+        except ValueError as error:
+            messagebox.showwarning("Warning", f"Invalid sweep: {error}")
+            return
+
+        banned_ingredients = list(dict.fromkeys(ingredient.strip().lower() for ingredient in self.ban_entry.get().split(",") if ingredient.strip()))
+        must_have_ingredients = [ingredient.strip().lower() for ingredient in self.must_have_entry.get().split(",") if ingredient.strip()]
+        try:
+            sweep = sweep_multipliers(
+                self.recipe, self.priority_stats, self.db.tag_allowed_foods(self.selected_tags), banned_ingredients, must_have_ingredients,
+                grid, top_x=top_x, depth=self.depth, calculation_mode=self.calculation_mode.get(), stat_cols=self.db.stat_cols,
+                progress_callback=self._show_progress
+            )
+        except ValueError as error:
+            messagebox.showerror("Error", str(error))
+            return
+
+        report_window = ctk.CTkToplevel(self)
+        report_window.title("Multiplier Sweep")
+        report_window.geometry("900x500")
+        self.after(100, lambda: report_window.focus_force())
+
+        report_text = ctk.CTkTextbox(report_window, font=("Consolas", 13), wrap="none")
+        report_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        report_text.insert("1.0", sweep_report(sweep, self.priority_stats))
+        report_text.configure(state="disabled")
+
+    def reset_stat_multipliers(self):
+        """Reset all stat multipliers to 1.0 and update slider positions."""
+        for stat in self.db.stat_cols:
+            self.stat_multipliers[stat] = 1.0
+            self.value_labels[stat].configure(text="1.00")
+            self.sliders[stat].set(1.0)  # Reset the slider position to 1.0
+
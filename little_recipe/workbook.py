@@ -0,0 +1,211 @@
+"""Multi-sheet food workbook reader.
+
+Reads every sheet of a workbook (e.g. the per-category ``Foods_Separated.xlsx``)
+into a single food table, which replaces merging the sheets by hand with the
+``excel_sheet_combiner.vbs`` script.
+
+Each sheet is cached under a hash of its cell contents, in memory and on disk,
+so editing one category only re-parses that sheet. Sheets that need parsing
+are parsed in parallel worker processes.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import re
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Columns every sheet must have
+REQUIRED_COLUMNS = ('Foods', 'IngreType', 'Tag')
+
+# Bump when the cached sheet format changes
+CACHE_VERSION = 1
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Shared-string cell values, which are indexes into xl/sharedStrings.xml
+_SHARED_STRING_CELL = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+
+# Parsed sheets by content hash, shared by every load in this process
+_sheet_cache = {}
+
+
+class LoadReport:
+    """Timing and cache report of a workbook load."""
+
+    def __init__(self, path):
+        self.path = path
+        self.sheets = []  # One dict per sheet: name, rows, cached, seconds
+        self.total_seconds = 0.0
+
+    @property
+    def parsed_sheets(self):
+        return [sheet['name'] for sheet in self.sheets if not sheet['cached']]
+
+    def __str__(self):
+        lines = [f"Loaded {os.path.basename(self.path)} in {self.total_seconds:.2f}s"]
+        for sheet in self.sheets:
+            source = "cache" if sheet['cached'] else f"parsed in {sheet['seconds']:.2f}s"
+            lines.append(f"  {sheet['name']}: {sheet['rows']} rows ({source})")
+        return "\n".join(lines)
+
+
+def _read_shared_strings(archive):
+    """Get the shared strings table of the workbook."""
+    try:
+        root = ET.fromstring(archive.read("xl/sharedStrings.xml"))
+    except KeyError:  # Workbooks without any text cells have no table
+        return []
+    return ["".join(text.text or "" for text in item.iter(f"{_MAIN_NS}t")) for item in root.iter(f"{_MAIN_NS}si")]
+
+
+def _list_sheets(archive):
+    """Get (sheet name, part name) for each sheet, in workbook order."""
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{_PKG_REL_NS}Relationship")}
+
+    sheets = []
+    for sheet in workbook.iter(f"{_MAIN_NS}sheet"):
+        target = targets[sheet.get(f"{_REL_NS}id")]
+        part = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+        sheets.append((sheet.get("name"), part))
+    return sheets
+
+
+def sheet_content_hash(sheet_xml, shared_strings):
+    """Hash the cell data of a sheet.
+
+    Only the <sheetData> element is hashed, so selecting cells or resizing
+    columns does not invalidate the cache. Shared-string indexes are replaced
+    by the strings themselves, because Excel renumbers the table when any
+    sheet is edited.
+    """
+    start = sheet_xml.find(b"<sheetData")
+    end = sheet_xml.rfind(b"</sheetData>")
+    if start != -1 and end != -1:
+        sheet_xml = sheet_xml[start:end]
+
+    digest = hashlib.sha256()
+    position = 0
+    for match in _SHARED_STRING_CELL.finditer(sheet_xml):
+        digest.update(sheet_xml[position:match.start(1)])
+        digest.update(shared_strings[int(match.group(1))].encode("utf-8"))
+        position = match.end(1)
+    digest.update(sheet_xml[position:])
+    return digest.hexdigest()
+
+
+def _parse_sheet(path, sheet_name):
+    """Parse one sheet into a DataFrame. Runs in a worker process."""
+    import pandas as pd
+
+    start_time = time.perf_counter()
+    frame = pd.read_excel(path, sheet_name=sheet_name)
+    return frame, time.perf_counter() - start_time
+
+
+def _cache_file(cache_dir, content_hash):
+    return os.path.join(cache_dir, f"{content_hash}.pkl")
+
+
+def _load_cached(cache_dir, content_hash):
+    """Get a parsed sheet from the memory or disk cache, or None."""
+    frame = _sheet_cache.get(content_hash)
+    if frame is not None or cache_dir is None:
+        return frame
+    try:
+        with open(_cache_file(cache_dir, content_hash), "rb") as file:
+            version, frame = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    if version != CACHE_VERSION:
+        return None
+    _sheet_cache[content_hash] = frame
+    return frame
+
+
+def _store_cached(cache_dir, content_hash, frame):
+    _sheet_cache[content_hash] = frame
+    if cache_dir is None:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(_cache_file(cache_dir, content_hash), "wb") as file:
+            pickle.dump((CACHE_VERSION, frame), file, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as error:
+        logger.warning(f"Could not write the sheet cache: {error}")
+
+
+def _validate_headers(frames):
+    """Check that all sheets have the same columns as the first one."""
+    expected = None
+    for name, frame in frames:
+        columns = list(frame.columns)
+        missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+        if missing:
+            raise ValueError(f"Sheet '{name}' is missing the column(s): {', '.join(missing)}")
+        if expected is None:
+            expected = (name, columns)
+        elif columns != expected[1]:
+            raise ValueError(
+                f"Sheet '{name}' has the columns {columns}, "
+                f"but sheet '{expected[0]}' has {expected[1]}"
+            )
+
+
+def read_food_workbook(path, cache_dir=None, max_workers=None):
+    """Read every sheet of a food workbook into one table.
+
+    Returns the combined DataFrame, with the rows in sheet order, and a
+    LoadReport. Sheets whose content hash is cached are not parsed again.
+    """
+    import pandas as pd
+
+    start_time = time.perf_counter()
+    report = LoadReport(path)
+
+    with zipfile.ZipFile(path) as archive:
+        shared_strings = _read_shared_strings(archive)
+        sheets = [(name, sheet_content_hash(archive.read(part), shared_strings)) for name, part in _list_sheets(archive)]
+
+    frames = {}
+    to_parse = []
+    for name, content_hash in sheets:
+        frame = _load_cached(cache_dir, content_hash)
+        if frame is None:
+            to_parse.append((name, content_hash))
+        else:
+            frames[name] = frame
+            report.sheets.append({'name': name, 'rows': len(frame), 'cached': True, 'seconds': 0.0})
+
+    if len(to_parse) > 1:
+        # Parse the changed sheets in parallel
+        workers = min(len(to_parse), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_parse_sheet, path, name) for name, _ in to_parse]
+            parsed = [future.result() for future in futures]
+    else:
+        parsed = [_parse_sheet(path, name) for name, _ in to_parse]
+
+    for (name, content_hash), (frame, seconds) in zip(to_parse, parsed):
+        _store_cached(cache_dir, content_hash, frame)
+        frames[name] = frame
+        report.sheets.append({'name': name, 'rows': len(frame), 'cached': False, 'seconds': seconds})
+
+    # Keep the report and the table in workbook order
+    order = {name: index for index, (name, _) in enumerate(sheets)}
+    report.sheets.sort(key=lambda sheet: order[sheet['name']])
+    ordered_frames = [(name, frames[name]) for name, _ in sheets]
+    _validate_headers(ordered_frames)
+
+    data = pd.concat([frame for _, frame in ordered_frames], ignore_index=True)
+    report.total_seconds = time.perf_counter() - start_time
+    return data, report
@@ -0,0 +1,32 @@
+"""The engine and the package import without the GUI and pandas, and quickly."""
+import json
+import os
+import subprocess
+import sys
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous bound on the import time, to catch a heavy import creeping back in
+MAX_IMPORT_SECONDS = 2.0
+
+
+def _imported(statement):
+    """Run an import in a fresh interpreter and return the modules it loaded and the seconds it took."""
+    code = f"import json, sys, time; start = time.perf_counter(); {statement}; print(json.dumps([time.perf_counter() - start, sorted(sys.modules)]))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+    seconds, modules = json.loads(output.splitlines()[-1])
+    return set(modules), seconds
+
+
+def test_package_import_is_lazy():
+    modules, _ = _imported("import little_recipe")
+    assert not {"numpy", "pandas", "tkinter", "little_recipe.engine"} & modules
+
+
+def test_engine_skips_gui_and_pandas():
+    start = time.perf_counter()
+    modules, seconds = _imported("import little_recipe.engine")
+    assert not {"pandas", "tkinter", "customtkinter", "openpyxl"} & modules
+    assert seconds < MAX_IMPORT_SECONDS
+    assert time.perf_counter() - start < MAX_IMPORT_SECONDS * 5  # Interpreter startup included
@@ -0,0 +1,47 @@
+"""Regression tests of the exact single priority stat solver."""
+import time
+
+import numpy as np
+import pytest
+
+from little_recipe.data import get_database
+from little_recipe.engine import beam_search, build_slots, result_sort_key, search_beam, select_results
+from little_recipe.single_stat import single_stat_search
+
+
+@pytest.fixture(scope="module")
+def database():
+    return get_database()
+
+
+def _slots(database, recipe, priority_stat):
+    foods = database.tag_allowed_foods(set(database.unique_tags))
+    slots, _ = build_slots(recipe, [priority_stat], foods, [], [])
+    return [[food['Foods'] for food in slot] for slot in slots], [np.array([food['stats'] for food in slot], dtype=float) for slot in slots]
+
+
+@pytest.mark.parametrize("slot_count", [4, 5])
+def test_cha_queries_stay_bounded(database, slot_count):
+    """Cha foods are limited to one per recipe, which the bounds must know to prune cha queries."""
+    foods = database.tag_allowed_foods(set(database.unique_tags))
+    start = time.perf_counter()
+    results = beam_search(["Vegetable"] * slot_count, ["cha"], foods, [], [], stat_cols=database.stat_cols)
+    assert time.perf_counter() - start < 60
+    assert all(result['cha'] > 0 for result in results)
+
+
+def test_cha_query_is_exact(database):
+    names, stats = _slots(database, ["Vegetable"] * 4, "cha")
+    exact = single_stat_search(names, stats, "cha", [], database.stat_cols)
+    assert exact is not None
+    foods = database.tag_allowed_foods(set(database.unique_tags))
+    beam, slot_members = search_beam(["Vegetable"] * 4, ["cha"], foods, [], [], stat_cols=database.stat_cols)
+    approximate = select_results(beam, slot_members, ["cha"], [], database.stat_cols, {stat: 1.0 for stat in database.stat_cols})
+    # The beam can only match or trail the true best recipes
+    key = result_sort_key(["cha"], 0, database.stat_cols)
+    assert [key(result) for result in exact] >= [key(result) for result in approximate]
+
+
+def test_budget_falls_back(database):
+    names, stats = _slots(database, ["Vegetable"] * 5, "cha")
+    assert single_stat_search(names, stats, "cha", [], database.stat_cols, max_scored=100_000) is None